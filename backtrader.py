@@ -2,18 +2,53 @@
 Author: Ngusum Akofu
 Date Created: Nov 18, 2020
 """
+import numpy as np
 import pandas as pd
 from urllib.error import HTTPError
 from werkzeug.exceptions import HTTPException
 import time
+import barblock
+import vectorized
+
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap']
+
 
 
 class Backtrader:
 
 
 
-	def __init__(self):
+	"""
+	Parameters:
+		bar_cache (BarCache): Optional on-disk cache consulted before any bars are requested from the API.
+		replay (SessionReplay): Optional in-memory store. When supplied, run() prefetches the whole session for each timeframe up front.
+	"""
+	def __init__(self, bar_cache=None, replay=None, checkpointer=None):
 		self.assets_ohlc = []
+		self.bar_cache = bar_cache
+		self.replay = replay
+		self.checkpointer = checkpointer
+		self.base_time_frame = None #When set, minute timeframes longer than this one are built from it rather than requested from the API
+
+
+
+	"""
+	List of dictionaries holding the fallback ohlcv of each security in play, in the same order as assets. Assigning it also rebuilds assets_ohlc_table,
+	a numpy array of the same values with one row per security and one column per field of OHLCV_COLUMNS (missing fields are nan).
+	"""
+	@property
+	def assets_ohlc(self):
+		return self._assets_ohlc
+
+	@assets_ohlc.setter
+	def assets_ohlc(self, assets_ohlc):
+		self._assets_ohlc = assets_ohlc
+		self.assets_ohlc_table = np.full((len(assets_ohlc), len(OHLCV_COLUMNS)), np.nan)
+		for i in range(0, len(assets_ohlc)):
+			for j in range(0, len(OHLCV_COLUMNS)):
+				if assets_ohlc[i].get(OHLCV_COLUMNS[j]) is not None:
+					self.assets_ohlc_table[i][j] = assets_ohlc[i].get(OHLCV_COLUMNS[j])
 
 
 
@@ -30,12 +65,14 @@ class Backtrader:
 		barset.df (pandas.DataFrame): Dataframe for securities specified within the time range specified by start date and end date, at intervals specified by the timeframe
 	"""
 	def _get_df(self, config, assets, time_frame, start_dt, end_dt):
+		adjustment = 'raw'
+
 		def get_barset(assets):
 
 			barset_got = False
 			while(not barset_got):
 				try:
-					return config.api.get_bars(assets, time_frame, start_dt, end_dt, adjustment='raw')
+					return config.api.get_bars(assets, time_frame, start_dt, end_dt, adjustment=adjustment)
 
 				#except HTTPError:
 				except HTTPException:
@@ -43,28 +80,35 @@ class Backtrader:
 					time.sleep(3)#Suspends thread for specified num seconds					
 					barset_got = False
 
+		if self.bar_cache is not None:
+			df = self.bar_cache.get(assets, time_frame, start_dt, end_dt, adjustment)
+			if df is not None:
+				return df
+
 		barset = get_barset(assets)
 
+		if self.bar_cache is not None:
+			self.bar_cache.put(assets, time_frame, start_dt, end_dt, adjustment, barset.df)
+
 		return barset.df
 
 
 
 	"""
-	Transforms a dataframe into a one dimensional list.
+	Transforms a single column dataframe, holding limit rows for each security one security after the other, into a (limit, num_assets) array.
+	The array is a reshaped and transposed view of the column's buffer, so no values are copied.
 	Parameters:
 		flattened_df (pandas.DataFrame): A single column dataframe.
 		num_assets (Int): Number of securities in play
 		limit (Int): Number of candlsticks represented in dataframe.
+		as_list (Boolean): Return nested lists instead of a numpy array, for callers that need them.
 	Returns:
-		arr ([[Float]]): List containing the values extracted from non-indexed column of the dataframe
-	"""
-	def unflatten(self, flattened_df, num_assets, limit):#, num_rows):
-		arr = []
-		for i in range(0, limit):
-			row = [] #Each row is a time df
-			for j in range(0, num_assets):
-				row.append(flattened_df[(limit*j) + i])
-			arr.append(row)
+		arr (numpy.ndarray): Row i holds the values of the ith candlestick for every security in play.
+	"""
+	def unflatten(self, flattened_df, num_assets, limit, as_list=False):
+		arr = np.asarray(flattened_df).reshape(num_assets, limit).T
+		if as_list:
+			return arr.tolist()
 		return arr
 
 
@@ -82,11 +126,77 @@ class Backtrader:
 		(pandas.DataFrame): Dataframe for securities specified within the time range specified by start date and end date, at intervals specified by the timeframe
 	"""
 	def get_df(self, config, assets, time_frame, start_dt, end_dt):
+		minutes = self.timeframe_minutes(time_frame)
+		if self.base_time_frame is not None and minutes is not None and minutes > self.timeframe_minutes(self.base_time_frame):
+			#Every base candlestick that falls within the buckets starting between start_dt and end_dt
+			base_start_dt = start_dt.floor(str(minutes)+'min')
+			base_end_dt = end_dt.floor(str(minutes)+'min') + pd.Timedelta(minutes - 1, 'min')
+			df = self.resample_df(self.get_df(config, assets, self.base_time_frame, base_start_dt, base_end_dt), minutes)
+			return df[(df.index >= start_dt) & (df.index <= end_dt)]
+
+		if self.replay is not None:
+			df = self.replay.get(assets, time_frame, start_dt, end_dt)
+			if df is not None:
+				return df
+
 		return self._get_df(config, assets, time_frame, start_dt.isoformat(), end_dt.isoformat())
 
 
 
 
+	"""
+	Returns the number of minutes spanned by a candlestick of the specified timeframe.
+	Parameters:
+		time_frame (TimeFrame):
+	Returns:
+		(Int): Number of minutes, or None if the timeframe is not measured in minutes (eg daily).
+	"""
+	def timeframe_minutes(self, time_frame):
+		time_frame = str(time_frame)
+		if time_frame.endswith('Min'):
+			return int(time_frame[:-3])
+		return None
+
+
+
+	"""
+	Builds candlesticks of a longer timeframe out of the candlesticks in a dataframe. Open is the first open, high the highest high, low the lowest low,
+	close the last close, volume and trade count are summed and vwap is weighted by each candlestick's volume.
+	Parameters:
+		df (pandas.DataFrame): Dataframe in the layout returned by get_bars(), at a shorter timeframe (eg 1 minute).
+		minutes (Int): Number of minutes spanned by each of the candlesticks to be built.
+	Returns:
+		df (pandas.DataFrame): Dataframe in the layout returned by get_bars(), one row per security and bucket of the specified number of minutes.
+	"""
+	def resample_df(self, df, minutes):
+		df_indexed = df.reset_index()
+		if len(df_indexed.index) == 0:
+			return df
+
+		df_indexed = df_indexed.sort_values(['symbol', 'timestamp'], kind='stable')
+		df_indexed['bucket'] = df_indexed['timestamp'].dt.floor(str(minutes)+'min')
+		df_indexed['vwap_volume'] = df_indexed['vwap'] * df_indexed['volume']
+
+		resampled = df_indexed.groupby(['symbol', 'bucket'], sort=True).agg(
+			open=('open', 'first'),
+			high=('high', 'max'),
+			low=('low', 'min'),
+			close=('close', 'last'),
+			volume=('volume', 'sum'),
+			trade_count=('trade_count', 'sum'),
+			vwap_volume=('vwap_volume', 'sum'),
+			vwap=('vwap', 'last')
+		).reset_index()
+
+		#Volume weighted vwap. Buckets without any volume keep the vwap of their last candlestick
+		traded = resampled['volume'] > 0
+		resampled['vwap'] = np.where(traded, resampled['vwap_volume'] / resampled['volume'].where(traded, 1), resampled['vwap'])
+
+		df = resampled.rename(columns={'bucket':'timestamp'}).set_index('timestamp')
+		return df[['open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap', 'symbol']]
+
+
+
 	"""
 	Ensures that all rows of the same security appear contiguously in a single block. In the raw dataframe, some rows may ocassinaly be out of place.
 	Parameters:
@@ -97,48 +207,22 @@ class Backtrader:
 		df (pandas.DataFrame): Rearrange dataframe (all rows of the same security appear contiguously).
 	"""
 	def rearrange_rows_by_symbol(self, df, assets):
+		columns = OHLCV_COLUMNS + ['symbol']
+
+		if len(df.index) == 0:
+			df = pd.DataFrame({col_name: [] for col_name in columns}, index=[])
+			df.index.name = 'timestamp'
+			return df
+
+		df_indexed = df.reset_index()  #Make sure indexes pair with number of rows
 
-		def fill_lists(timestamps, timestamp, opens, opn, highs, high, lows, low, closes, close, volumes, volume, trade_counts, trade_count, vwaps, vwap, symbols, symbol):
-			timestamps.append(timestamp)
-			opens.append(opn)
-			highs.append(high)
-			lows.append(low)
-			closes.append(close)
-			volumes.append(volume)
-			trade_counts.append(trade_count)
-			vwaps.append(vwap)
-			symbols.append(symbol)			
-		df_indexed = df.reset_index()  #Mmake sure indexes pair with number of rows
-	
-		timestamps = []
-		opens = []
-		highs = []
-		lows= []
-		closes = []
-		volumes = []
-		trade_counts = []
-		vwaps = []
-		symbols = []
-
-		for i in range(0, len(assets)):
-
-			for row in df_indexed.itertuples():
-				if assets[i] == row.symbol:
-					#Insert row
-					fill_lists(timestamps, row.timestamp, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)				
-
-		df = pd.DataFrame({
-    		'open': opens,
-    		'high': highs,
-    		'low': lows,
-    		'close': closes,
-    		'volume':volumes,
-    		'trade_count':trade_counts,
-    		'vwap':vwaps,
-    		'symbol':symbols
-
-		},index=timestamps)	
-		df.index.name = 'timestamp'		
+		#Position of each row's symbol in assets (-1 for symbols not in play), then timestamp within each symbol
+		asset_positions = pd.Categorical(df_indexed['symbol'], categories=assets).codes
+		timestamps = pd.to_datetime(df_indexed['timestamp'], utc=True).to_numpy(dtype='datetime64[ns]').view(np.int64)
+		order = np.lexsort((timestamps, asset_positions))
+		order = order[asset_positions[order] >= 0]
+
+		df = df_indexed.iloc[order].set_index('timestamp')[columns]
 
 		return df
 
@@ -146,6 +230,9 @@ class Backtrader:
 
 	"""
 	Some securities particularly during pre and post market hours, may be missing some candlesticks. This function interpolates the dataframe to fill those missing candlesticks.
+	The rows of each security (which follow one another in the dataframe) are all kept, in order. Before the first one, time slots are filled in from the
+	start date, before every other one from the time of the row before it, and after the last one up to the end date, times being compared to the minute.
+	A filled in slot takes the values of the next candlestick of the same security, or of its last candlestick if there is none after it.
 	Parameters:
 		df (pandas.DataFrame): The raw dataframe which may be missing some candlesticks for some securities.
 		time_delta (String):
@@ -155,117 +242,49 @@ class Backtrader:
 		df (pandas.DataFrame): A copy of the raw dataframe with missing candlesticks filled in. 
 	"""
 	def fill_missing_dates(self, df, time_delta, start_date, end_date):
-
-		def fill_lists(timestamps, timestamp, opens, opn, highs, high, lows, low, closes, close, volumes, volume, trade_counts, trade_count, vwaps, vwap, symbols, symbol):
-			timestamps.append(timestamp)
-			opens.append(opn)
-			highs.append(high)
-			lows.append(low)
-			closes.append(close)
-			volumes.append(volume)
-			trade_counts.append(trade_count)
-			vwaps.append(vwap)
-			symbols.append(symbol)			
-		
-		#Dataframe returns dates in UTC. So need to convert from local time to UTC
-		dataframe_start_dt_utc = start_date.tz_convert('UTC')
-		dataframe_end_dt_utc = end_date.tz_convert('UTC')
-		dataframe_end_dt_utc_hour_min = dataframe_end_dt_utc.replace(second=0, microsecond=0)	
-
-		df_indexed = df.reset_index()  # make sure indexes pair with number of rows
-		prev_row = None
-
-		timestamps = []
-		opens = []
-		highs = []
-		lows= []
-		closes = []
-		volumes = []
-		trade_counts = []
-		vwaps = []
-		symbols = []
-		num_symbols = 1
-
-		for row in df_indexed.itertuples():
-			if row.Index > 0:
-
-				if prev_row.symbol == row.symbol:
-					expected_time = prev_row.timestamp + pd.Timedelta(time_delta)
-					expected_time_hour_min = expected_time.replace(second=0, microsecond=0)
-					row_timestamp_hour_min = row.timestamp.replace(second=0, microsecond=0)
-					while expected_time_hour_min < row_timestamp_hour_min:					
-						#Expected time was skipped. Insert before current row.
-						fill_lists(timestamps, expected_time, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)
-						expected_time += pd.Timedelta(time_delta)
-						expected_time_hour_min = expected_time.replace(second=0, microsecond=0)
-
-					fill_lists(timestamps, row.timestamp, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)	
-
-				
-				else:#End of an old symbol and start of a new symbol
-					num_symbols += 1
-					#End of old symbol
-					last_time_slot = prev_row.timestamp
-					last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
-					if last_time_slot_hour_min < dataframe_end_dt_utc_hour_min:
-						last_time_slot += pd.Timedelta(time_delta)
-						last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
-						fill_lists(timestamps, last_time_slot, opens, prev_row.open, highs, prev_row.high, lows, prev_row.low, closes, prev_row.close, volumes, prev_row.volume, trade_counts, prev_row.trade_count, vwaps, prev_row.vwap, symbols, prev_row.symbol)	
-					while last_time_slot_hour_min < dataframe_end_dt_utc_hour_min:
-						last_time_slot += pd.Timedelta(time_delta)
-						last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
-						fill_lists(timestamps, last_time_slot, opens, prev_row.open, highs, prev_row.high, lows, prev_row.low, closes, prev_row.close, volumes, prev_row.volume, trade_counts, prev_row.trade_count, vwaps, prev_row.vwap, symbols, prev_row.symbol)	
-					
-					#Start of new symbol
-					expected_time = dataframe_start_dt_utc
-					expected_time_hour_min = expected_time.replace(second=0, microsecond=0)
-					row_timestamp_hour_min = row.timestamp.replace(second=0, microsecond=0)
-					while expected_time_hour_min < row_timestamp_hour_min:
-						fill_lists(timestamps, expected_time, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)
-						expected_time += pd.Timedelta(time_delta)	
-						expected_time_hour_min = expected_time.replace(second=0, microsecond=0)					
-					
-					fill_lists(timestamps, row.timestamp, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)
-			else:
-				#For first row
-				expected_time = dataframe_start_dt_utc
-				expected_time_hour_min = expected_time.replace(second=0, microsecond=0)
-				row_timestamp_hour_min = row.timestamp.replace(second=0, microsecond=0)
-				while expected_time_hour_min < row_timestamp_hour_min:
-					fill_lists(timestamps, expected_time, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)
-					expected_time += pd.Timedelta(time_delta)	
-					expected_time_hour_min = expected_time.replace(second=0, microsecond=0)
-
-				fill_lists(timestamps, row.timestamp, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)				
-				
-			prev_row = row
-
-		#End df iteration
-		if prev_row != None:
-			last_time_slot = prev_row.timestamp
-			last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
-			if last_time_slot_hour_min < dataframe_end_dt_utc_hour_min:
-				last_time_slot += pd.Timedelta(time_delta)
-				fill_lists(timestamps, last_time_slot, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)	
-				last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
-			while last_time_slot_hour_min < dataframe_end_dt_utc_hour_min:
-				last_time_slot += pd.Timedelta(time_delta)
-				fill_lists(timestamps, last_time_slot, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)	
-				last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
-
-
-		df = pd.DataFrame({
-    		'open': opens,
-    		'high': highs,
-    		'low': lows,
-    		'close': closes,
-    		'volume':volumes,
-    		'trade_count':trade_counts,
-    		'vwap':vwaps,
-    		'symbol':symbols
-
-		},index=timestamps)	
-		df.index.name = 'timestamp'		
+		columns = OHLCV_COLUMNS + ['symbol']
+
+		if len(df.index) == 0:
+			df = pd.DataFrame({col_name: [] for col_name in columns}, index=[])
+			df.index.name = 'timestamp'
+			return df
+
+		#Dataframe returns dates in UTC. So need to convert from local time to UTC. Times are in epoch nanoseconds from here on
+		dataframe_start_dt_utc = start_date.tz_convert('UTC').value
+		minute = pd.Timedelta('1minutes').value
+		dataframe_end_dt_utc_hour_min = end_date.tz_convert('UTC').value//minute*minute
+		step = pd.Timedelta(time_delta).value
+
+		timestamps = pd.to_datetime(df.index, utc=True).as_unit('ns').asi8
+		timestamps_hour_min = timestamps//minute*minute
+		symbols = df['symbol'].to_numpy()
+		first_of_symbol = np.ones(len(symbols), dtype=bool)
+		first_of_symbol[1:] = symbols[1:] != symbols[:-1]
+		last_of_symbol = np.ones(len(symbols), dtype=bool)
+		last_of_symbol[:-1] = first_of_symbol[1:]
+
+		#Slots filled in before each row, at previous + i*step while that is before the row's minute: i from 0 after the start date, from 1 after
+		#the row before it. ceil(a/b) is -(-a//b)
+		previous = np.where(first_of_symbol, dataframe_start_dt_utc, np.roll(timestamps, 1))
+		first_step = np.where(first_of_symbol, 0, 1)
+		num_before = np.maximum(-((previous - timestamps_hour_min)//step) - first_step, 0)
+		#Slots filled in after the last row of a security, at its time + i*step for i from 1 while the slot before is before the end date's minute
+		num_after = np.where(last_of_symbol, np.maximum(-((timestamps - dataframe_end_dt_utc_hour_min)//step), 0), 0)
+
+		if not num_before.any() and not num_after.any():
+			#Nothing to fill in
+			return df[columns]
+
+		#Each row is preceded by the slots filled in before it and followed by those filled in after it, all taking its values
+		num_copies = num_before + 1 + num_after
+		rows = np.repeat(np.arange(len(symbols)), num_copies)
+		position = np.arange(len(rows)) - np.repeat(np.cumsum(num_copies) - num_copies, num_copies)
+		before = np.repeat(num_before, num_copies)
+		filled_timestamps = np.where(position < before, previous[rows] + (position + first_step[rows])*step, timestamps[rows] + (position - before)*step)
+
+		df = df.iloc[rows][columns]
+		df.index = pd.to_datetime(filled_timestamps, utc=True)
+		df.index.name = 'timestamp'
 
 		return df
 
@@ -286,105 +305,44 @@ class Backtrader:
 		df (pandas.DataFrame): A copy of the raw dataframe with missing securities filled in. 
 	"""
 	def fill_missing_stocks(self, df, assets, start_date, end_date, time_delta, time_frame, limit):#Start and end dates are adjusted start and end for the relevant timeframe
-		
-		def fill_lists(timestamps, timestamp, opens, opn, highs, high, lows, low, closes, close, volumes, volume, trade_counts, trade_count, vwaps, vwap, symbols, symbol):
-			timestamps.append(timestamp)
-			opens.append(opn)
-			highs.append(high)
-			lows.append(low)
-			closes.append(close)
-			volumes.append(volume)
-			trade_counts.append(trade_count)
-			vwaps.append(vwap)
-			symbols.append(symbol)		
-
-
-
-		def iterate_assets(asset_index, timestamps, opens, opn, highs, high, lows, low, closes, close, volumes, volume, trade_counts, trade_count, vwaps, vwap, symbols, symbol):
-			#insert some rows for that asset before inserting curr row	
-			start = dataframe_start_dt_utc
-			end = dataframe_end_dt_utc
-			curr = start
-			if limit == 1:#2:
-				while curr <= end_date: 
-					fill_lists(timestamps, curr, opens, opn, highs, high, lows, low, closes, close, volumes, volume, trade_counts, trade_count, vwaps, vwap, symbols, symbol)	
-					curr += pd.Timedelta(time_delta)
-			else:
-				fill_lists(timestamps, curr, opens, None, highs, None, lows, None, closes, None, volumes, None, trade_counts, None, vwaps, None, symbols, symbol)				
-			asset_index += 1	
-
-			return asset_index
-
 
 		#Dataframe returns dates in UTC. So need to convert from local time to UTC
 		dataframe_start_dt_utc = start_date.tz_convert('UTC')
-		dataframe_end_dt_utc = end_date.tz_convert('UTC')		
+		dataframe_end_dt_utc = end_date.tz_convert('UTC')
 
-		df_indexed = df.reset_index()  #Make sure indexes pair with number of rows
-		prev_row = None
-
-		timestamps = []
-		opens = []
-		highs = []
-		lows= []
-		closes = []
-		volumes = []
-		trade_counts = []
-		vwaps = []
-		symbols = []
-		asset_index = 0
-
-		if len(df.index) == 0:		
-			while asset_index < len(assets):
-				#insert some rows for that asset before inserting curr row	
-				asset_index = iterate_assets(asset_index, timestamps, opens, self.assets_ohlc[asset_index].get("open"), highs, self.assets_ohlc[asset_index].get("high"), lows, self.assets_ohlc[asset_index].get("low"), closes, self.assets_ohlc[asset_index].get("close"), volumes, self.assets_ohlc[asset_index].get("volume"), trade_counts, self.assets_ohlc[asset_index].get("trade_count"), vwaps, self.assets_ohlc[asset_index].get("vwap"), symbols, assets[asset_index])			
-
-		else:#There are rows
-			for row in df_indexed.itertuples():
-
-				if row.Index > 0:
-					if prev_row.symbol == row.symbol:
-						pass			
-					else:#End of an old symbol and start of a new symbol
-
-						asset_index += 1#Move along assets list. New asset should be new row symbol otherwise, fill
-						#New row
-						while row.symbol != assets[asset_index]: #Next asset(s)'s  symbol(s) is(are) not same as that of current row.
-							#insert some rows for that asset before inserting curr row	
-							asset_index = iterate_assets(asset_index, timestamps, opens, self.assets_ohlc[asset_index].get("open"), highs, self.assets_ohlc[asset_index].get("high"), lows, self.assets_ohlc[asset_index].get("low"), closes, self.assets_ohlc[asset_index].get("close"), volumes, self.assets_ohlc[asset_index].get("volume"), trade_counts, self.assets_ohlc[asset_index].get("trade_count"), vwaps, self.assets_ohlc[asset_index].get("vwap"), symbols, assets[asset_index])
-					
-				else:
-					#First row	
-					while row.symbol != assets[asset_index]: #First asset(s)'s  symbol(s) is(are) not same as that of current row.
-						#insert some rows for that asset before inserting curr row	
-						asset_index = iterate_assets(asset_index, timestamps, opens, self.assets_ohlc[asset_index].get("open"), highs, self.assets_ohlc[asset_index].get("high"), lows, self.assets_ohlc[asset_index].get("low"), closes, self.assets_ohlc[asset_index].get("close"), volumes, self.assets_ohlc[asset_index].get("volume"), trade_counts, self.assets_ohlc[asset_index].get("trade_count"), vwaps, self.assets_ohlc[asset_index].get("vwap"), symbols, assets[asset_index])
-
-				#Now insert current row
-				fill_lists(timestamps, row.timestamp, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)				
-
-				prev_row = row
-
-			#After last row, if there are still untouched assets. 
-			#asset_index at this point should be index of last row's symbol since we must necessarily have gotten here via if row_index > 0 followed by if prev_row.symbol == row.symbol
-			asset_index += 1#Move along assets list.
-			#Asset index should now be one more than index of the last symbol encountered
-			while asset_index < len(assets):
-				asset_index = iterate_assets(asset_index, timestamps, opens, self.assets_ohlc[asset_index].get("open"), highs, self.assets_ohlc[asset_index].get("high"), lows, self.assets_ohlc[asset_index].get("low"), closes, self.assets_ohlc[asset_index].get("close"), volumes, self.assets_ohlc[asset_index].get("volume"), trade_counts, self.assets_ohlc[asset_index].get("trade_count"), vwaps, self.assets_ohlc[asset_index].get("vwap"), symbols, assets[asset_index])
-
-		df = pd.DataFrame({
-    		'open': opens,
-    		'high': highs,
-    		'low': lows,
-    		'close': closes,
-    		'volume':volumes,
-    		'trade_count':trade_counts,
-    		'vwap':vwaps,
-    		'symbol':symbols
-
-		},index=timestamps)	
-		df.index.name = 'timestamp'		
+		if len(df.index) > 0:
+			asset_positions = pd.Categorical(df['symbol'], categories=assets).codes
+		else:
+			asset_positions = np.empty(0, dtype=np.int8)
+		missing_assets = np.setdiff1d(np.arange(len(assets)), asset_positions)
 
-		return df
+		if len(missing_assets) == 0:
+			return df
+
+		if limit == 1:
+			#Missing securities get the fallback ohlcv in every time slot
+			time_slots = pd.date_range(dataframe_start_dt_utc, dataframe_end_dt_utc, freq=pd.Timedelta(time_delta))
+			values = np.empty((len(time_slots), len(missing_assets), len(OHLCV_COLUMNS)))
+			values[:] = self.assets_ohlc_table[missing_assets]
+		else:
+			#A single empty time slot, filled in later from neighbouring candlesticks
+			time_slots = pd.DatetimeIndex([dataframe_start_dt_utc])
+			values = np.full((1, len(missing_assets), len(OHLCV_COLUMNS)), np.nan)
+
+		#(time slot, asset, field) -> one row per asset and time slot, grouped by asset
+		filled_df = pd.DataFrame(values.transpose(1, 0, 2).reshape(-1, len(OHLCV_COLUMNS)), columns=OHLCV_COLUMNS)
+		filled_df['symbol'] = np.repeat(np.asarray(assets)[missing_assets], len(time_slots))
+		filled_df.index = np.tile(time_slots, len(missing_assets))
+		filled_df.index.name = 'timestamp'
+
+		if len(df.index) == 0:
+			return filled_df
+
+		#Slot the filled in securities between the ones present, keeping assets order
+		df = pd.concat([df[OHLCV_COLUMNS + ['symbol']], filled_df])
+		order = np.argsort(np.concatenate([asset_positions, np.repeat(missing_assets, len(time_slots))]), kind='stable')
+
+		return df.iloc[order]
 
 
 
@@ -414,153 +372,74 @@ class Backtrader:
 
 
 
-	def fill_time_slots(self, next_time_slot, timelist, temp_closes, temp_opens, temp_highs, temp_lows, temp_volumes, temp_vwaps, config, assets, time_delta, time_frame, limit, curr_date):
-
-		df = self.grab_df_and_fill_missing_stocks(config, assets, time_delta, time_frame, limit, curr_date)
-		#Go through each row of df
-		df_indexed = df.reset_index() 
-		prev_row = None
-		row = None
-		curr_stock_index = len(assets)-1#0
-	
-		symbols = []
-		closes = []
-		opens = []
-		highs = []
-		lows = []
-		volumes = []
-		vwaps = []
-
-		for curr_row in df_indexed.itertuples():
-			row = curr_row 
-			symbols.append(row.symbol)
-			closes.append(row.close)
-			opens.append(row.open)
-			highs.append(row.high)
-			lows.append(row.low)
-			volumes.append(row.volume)
-			vwaps.append(row.vwap)
-
-		symbols.reverse()
-		closes.reverse()
-		opens.reverse()
-		highs.reverse()
-		lows.reverse()
-		volumes.reverse()
-		vwaps.reverse()
-
-		for row_index in range(0, len(symbols)):
-
-			num_filled_time_slots = 0
-			for i in range(0, len(temp_closes)):
-				for j in range(0, len(temp_closes[i])):
-					num_filled_time_slots += 1
-					j += 1
-				i += 1
-
-			len_timelist = len(timelist) #This number should be same as number of filled timeslots
-			assert num_filled_time_slots == len_timelist 
-
-			if (row_index == 0) or (row_index != 0 and symbols[row_index - 1] != symbols[row_index]): #First row or symbol change
-
-				if row_index != 0:
-					curr_stock_index -= 1
-
-			else: #Same symbol as last row
-				pass
-
-
-			#Insert the row
-			if next_time_slot[curr_stock_index] < limit: #Stop filling if stock in question has reached limit
-				#Should we insert in current child list of temp or prev one? Depends on next_time_slot for stock and length of prev one
-				if next_time_slot[curr_stock_index] + 1 <= num_filled_time_slots:#len(temp_closes[-1]): 
-					#Latest time slot for stock does not exceed index of already filled time slots
-					#So find the bucket and time slot that corresponds with next_time_slot[stock_index] and insert into that bucket at the appropriate stock position
-					next_time_slot_for_curr_stock_index = next_time_slot[curr_stock_index]
-					bucket_index = 0
-					time_slot_index = 0
-					time_slot_count = 0
-					for i in range(0, len(temp_closes)):
-						break_outter_loop = False
-						bucket_index = i
-						for j in range(0, len(temp_closes[i])):
-							time_slot_index = j
-							time_slot_count += 1
-
-							if next_time_slot_for_curr_stock_index + 1 == time_slot_count:
-								break_outter_loop = True
-								break 
-
-						if break_outter_loop:
-							break
-
-					temp_closes[bucket_index][time_slot_index][curr_stock_index] = closes[row_index]
-					temp_opens[bucket_index][time_slot_index][curr_stock_index] = opens[row_index]
-					temp_lows[bucket_index][time_slot_index][curr_stock_index] = lows[row_index]
-					temp_highs[bucket_index][time_slot_index][curr_stock_index] = highs[row_index]
-					temp_volumes[bucket_index][time_slot_index][curr_stock_index] = volumes[row_index]
-					temp_vwaps[bucket_index][time_slot_index][curr_stock_index] = vwaps[row_index]
-
-				else: 
-					#Latest time slot for stock exceeds number of timeslots already inserted. So create new one
-					new_time_slot_close = [0] * len(assets)
-					new_time_slot_open = [0] * len(assets)
-					new_time_slot_low = [0] * len(assets)
-					new_time_slot_high = [0] * len(assets)
-					new_time_slot_volume = [0] * len(assets)
-					new_time_slot_vwap = [0] * len(assets)
-
-					new_time_slot_close[curr_stock_index] = closes[row_index]
-					new_time_slot_open[curr_stock_index] = opens[row_index]
-					new_time_slot_low[curr_stock_index] = lows[row_index]
-					new_time_slot_high[curr_stock_index] = highs[row_index]
-					new_time_slot_volume[curr_stock_index] = volumes[row_index]
-					new_time_slot_vwap[curr_stock_index] = vwaps[row_index]
-					temp_closes[-1].append(new_time_slot_close) 
-					temp_opens[-1].append(new_time_slot_open)
-					temp_lows[-1].append(new_time_slot_low)
-					temp_highs[-1].append(new_time_slot_high)
-					temp_volumes[-1].append(new_time_slot_volume)
-					temp_vwaps[-1].append(new_time_slot_vwap)
-					timelist.append(num_filled_time_slots) #The next index is the current length of list
-
-			next_time_slot[curr_stock_index] += 1 #Increment latest time slot for stock in question by 1 now that row content has been added to lists
-		return next_time_slot, timelist, temp_closes, temp_opens, temp_highs, temp_lows, temp_volumes, temp_vwaps
+	"""
+	Writes the candlesticks of one window of the dataframe into the time slots of each security. Time slot 0 is the most recent candlestick, and each
+	security carries on from the time slot where the previous (more recent) window left it, so its rows are written straight into place.
+	Parameters:
+		next_time_slot (numpy.ndarray): Next time slot to be written for each security. Updated in place.
+		time_slots (numpy.ndarray): Array of shape (limit, securities, OHLCV_COLUMNS) being filled. Updated in place.
+		slot_times (numpy.ndarray): Array of shape (limit, securities) holding the epoch nanoseconds of each candlestick written. Updated in place.
+		config: Reference to config.py
+		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+		time_delta (String):
+		time_frame (TimeFrame):
+		window (Int): Number of candlsticks spanned by the window.
+		curr_date (pandas.Timestamp): End of the window.
+	Returns:
+		next_time_slot (numpy.ndarray):
+	"""
+	def fill_time_slots(self, next_time_slot, time_slots, slot_times, config, assets, time_delta, time_frame, window, curr_date):
+
+		end_dt = curr_date
+		start_dt = end_dt - pd.Timedelta(time_delta)*(window-1)
+		df = self.rearrange_rows_by_symbol(self.get_df(config, assets, time_frame, start_dt, end_dt), assets)
+
+		num_rows = len(df.index)
+		asset_positions = pd.Categorical(df['symbol'], categories=assets).codes.astype(np.int64)
+		rows_per_asset = np.bincount(asset_positions, minlength=len(assets))
+
+		#Rows come grouped by security, oldest first. Count each row's distance from the most recent row of its security.
+		rank_from_most_recent = np.cumsum(rows_per_asset)[asset_positions] - 1 - np.arange(num_rows)
+		slots = next_time_slot[asset_positions] + rank_from_most_recent
+
+		in_limit = slots < len(time_slots) #Stop filling once a security has reached limit
+		time_slots[slots[in_limit], asset_positions[in_limit]] = df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)[in_limit]
+		slot_times[slots[in_limit], asset_positions[in_limit]] = barblock.to_epoch_ns(df.index)[in_limit]
 
+		next_time_slot += rows_per_asset
 
+		return next_time_slot
 
-	def combine_buckets(self, list_of_buckets, col_name):
-		
-		combined_buckets = []
 
-		for i in range(0, len(list_of_buckets)):
-			for j in range(0, len(list_of_buckets[i])):
-				combined_buckets.append(list_of_buckets[i][j])
 
-		combined_buckets.reverse()
+	"""
+	Joins buckets of time slots, such as those filled by fill_time_slots(), into one list running from the oldest time slot to the most recent, and fills the
+	empty (0, None or nan) values of each security with the value of its nearest earlier time slot, or failing that its nearest later time slot,
+	or failing that its fallback value in assets_ohlc.
+	Parameters:
+		list_of_buckets ([[[Float]]]): Buckets of time slots (nested lists or arrays), most recent time slot first. Each time slot holds a value for every security in play.
+		col_name (String): "close", "open", "high", "low", "volume", or "vwap"
+	Returns:
+		combined_buckets (numpy.ndarray): Array of shape (time slots, securities).
+	"""
+	def combine_buckets(self, list_of_buckets, col_name):
+		
+		num_assets = len(self.assets_ohlc_table)
+		combined_buckets = np.concatenate([np.array(bucket, dtype=np.float64).reshape(-1, num_assets) for bucket in list_of_buckets])[::-1]
 
-		#Remove Nans and 0s
-		for i in range(0, len(combined_buckets)): #Every time slot
-			for j in range(0, len(combined_buckets[i])): #Every stock
-				if combined_buckets[i][j] == 0 or combined_buckets[i][j] == None:
-					most_adjacent_value = 0
-					k = i-1
-					while k >= 0:
-						if combined_buckets[k][j] != 0 and combined_buckets[k][j] != None:
-							combined_buckets[i][j] = combined_buckets[k][j]
-						k -= 1
+		num_time_slots = len(combined_buckets)
+		filled = ~(np.isnan(combined_buckets) | (combined_buckets == 0))
+		time_slot_indexes = np.arange(num_time_slots).reshape(-1, 1)
 
-				if combined_buckets[i][j] == 0 or combined_buckets[i][j] == None:
-					k = i+1
-					while k < len(combined_buckets):
-						if combined_buckets[k][j] != 0 and combined_buckets[k][j] != None:
-							combined_buckets[i][j] = combined_buckets[k][j]
-						k += 1
+		#Index of the nearest filled time slot at or before each time slot (-1 if none), and at or after it (num_time_slots if none)
+		prev_filled = np.maximum.accumulate(np.where(filled, time_slot_indexes, -1), axis=0)
+		next_filled = np.minimum.accumulate(np.where(filled, time_slot_indexes, num_time_slots)[::-1], axis=0)[::-1]
+		nearest_filled = np.where(prev_filled >= 0, prev_filled, next_filled)
 
-				if combined_buckets[i][j] == 0 or combined_buckets[i][j] == None:
-					combined_buckets[i][j] = self.assets_ohlc[j].get(col_name)
+		asset_indexes = np.arange(combined_buckets.shape[1]).reshape(1, -1)
+		fallback = self.assets_ohlc_table[:, OHLCV_COLUMNS.index(col_name)].reshape(1, -1)
 
-		return combined_buckets
+		return np.where(nearest_filled < num_time_slots, combined_buckets[np.minimum(nearest_filled, num_time_slots - 1), asset_indexes], fallback)
 
 
 
@@ -575,6 +454,7 @@ class Backtrader:
 		#Last row of combined list will now be assigned to asset properties
 		for i in range(0, len(combined_list[0])): #Every stock (security)
 			self.assets_ohlc[i][col_name] = combined_list[-1][i]
+		self.assets_ohlc_table[:, OHLCV_COLUMNS.index(col_name)] = combined_list[-1]
 
 
 
@@ -589,13 +469,7 @@ class Backtrader:
 		limit (Int): Number of candlsticks represented in dataframe.
 		curr_date (pandas.Timestamp): Current minute.	
 	Returns:
-		timelist ([Int]):
-		combined_closes ([[Folat]]):
-		combined_opens ([[Folat]]): 
-		combined_highs ([[Folat]]): 
-		combined_lows ([[Folat]]): 
-		combined_volumes ([[Folat]]):
-		combined_vwaps ([[Folat]]):
+		bars (BarBlock): Closes, opens, highs, lows, volumes and vwaps of the last limit candlesticks, as (time, security) arrays, and their times.
 	"""
 	def get_closes_opens_his_los_vols_vwaps(self, config, assets, time_delta, time_frame, limit, curr_date):
 		if limit <= 3:
@@ -605,61 +479,48 @@ class Backtrader:
 			start_dt = end_dt - pd.Timedelta(time_delta)*(limit-1)			
 			df = self.fill_missing_dates(df, time_delta, start_dt, end_dt)
 
-			#num_rows = len(df.index)
 			num_assets = len(assets)
 
-			timelist = []
-			[timelist.append(x) for x in df.index.tolist() if x not in timelist]
-			return [
-				timelist,
-				self.unflatten(df.xs('close', axis=1), num_assets, limit),
-				self.unflatten(df.xs('open', axis=1), num_assets, limit),
-				self.unflatten(df.xs('high', axis=1), num_assets, limit),
-				self.unflatten(df.xs('low', axis=1), num_assets, limit),
-				self.unflatten(df.xs('volume', axis=1), num_assets, limit),
-				self.unflatten(df.xs('vwap', axis=1), num_assets, limit)		
-			]	
+			bars = barblock.BarBlock(barblock.to_epoch_ns(df.index[:limit]), np.empty((len(barblock.FIELDS), limit, num_assets)))
+			for i in range(0, len(barblock.FIELDS)):
+				bars.data[i] = self.unflatten(df.xs(barblock.FIELDS[i], axis=1), num_assets, limit)
+
+			return bars
 
 		else:
-			timelist = []
-			temp_closes = []
-			temp_opens = []
-			temp_highs = []
-			temp_lows = []
-			temp_volumes = []
-			temp_vwaps = []
-
-			df_iterations = 0
-			next_time_slot = [0] * len(assets)
-			all_stocks_reached_limit = False
-
-			while not all_stocks_reached_limit: #We will continue to get last n = limit row dataframes till lists are full
-
-				temp_closes.append([])
-				temp_opens.append([])
-				temp_highs.append([])
-				temp_lows.append([])
-				temp_volumes.append([])
-				temp_vwaps.append([])
-
-				next_time_slot, timelist, temp_closes, temp_opens, temp_highs, temp_lows, temp_volumes, temp_vwaps = self.fill_time_slots(next_time_slot, timelist, temp_closes, temp_opens, temp_highs, temp_lows, temp_volumes, temp_vwaps, config, assets, time_delta, time_frame, limit, curr_date)
-
-				curr_date -= pd.Timedelta(time_delta)*(limit)
-				df_iterations += 1
-
-				all_stocks_reached_limit = True
-				for i in range(0, len(assets)):
-					if next_time_slot[i] < limit - 1:
-						all_stocks_reached_limit = False
-						break
+			#(time slot, security, field), most recent time slot first
+			time_slots = np.full((limit, len(assets), len(OHLCV_COLUMNS)), np.nan)
+			slot_times = np.full((limit, len(assets)), pd.NaT.value, dtype=np.int64)
+			next_time_slot = np.zeros(len(assets), dtype=np.int64)
+			#The candlesticks are paged through limit at a time. A security without a single candlestick in a whole page takes up one empty (nan) time
+			#slot, which combine_buckets() later fills in, so that paging comes to an end even for a security which has not traded.
+			rows_in_page = np.zeros(len(assets), dtype=np.int64)
+			page_left = limit
+
+			while next_time_slot.min() < limit: #We will continue to get dataframes till every security has limit rows
+				#Each window ends right before the previous one and spans exactly the time slots still missing, within the page
+				window = min(limit - next_time_slot.min(), page_left)
+				filled_before = next_time_slot.copy()
+				next_time_slot = self.fill_time_slots(next_time_slot, time_slots, slot_times, config, assets, time_delta, time_frame, window, curr_date)
+				rows_in_page += next_time_slot - filled_before
+
+				curr_date -= pd.Timedelta(time_delta)*window
+				page_left -= window
+				if page_left == 0:
+					next_time_slot[rows_in_page == 0] += 1
+					rows_in_page[:] = 0
+					page_left = limit
+
+			#Each time slot is stamped with the time of its most recent candlestick across securities
+			times = slot_times.max(axis=1)[::-1].copy()
 
 			#Combine lists
-			combined_closes = self.combine_buckets(temp_closes, "close")
-			combined_opens = self.combine_buckets(temp_opens, "open")
-			combined_highs = self.combine_buckets(temp_highs, "high")
-			combined_lows = self.combine_buckets(temp_lows, "low")
-			combined_volumes = self.combine_buckets(temp_volumes, "volume")
-			combined_vwaps = self.combine_buckets(temp_vwaps, "vwap")				
+			combined_closes = self.combine_buckets([time_slots[:, :, OHLCV_COLUMNS.index("close")]], "close")
+			combined_opens = self.combine_buckets([time_slots[:, :, OHLCV_COLUMNS.index("open")]], "open")
+			combined_highs = self.combine_buckets([time_slots[:, :, OHLCV_COLUMNS.index("high")]], "high")
+			combined_lows = self.combine_buckets([time_slots[:, :, OHLCV_COLUMNS.index("low")]], "low")
+			combined_volumes = self.combine_buckets([time_slots[:, :, OHLCV_COLUMNS.index("volume")]], "volume")
+			combined_vwaps = self.combine_buckets([time_slots[:, :, OHLCV_COLUMNS.index("vwap")]], "vwap")
 
 			#Last row of combined buckets should replace asset ohlcv
 			self.update_asset_properties(combined_closes, "close")
@@ -669,7 +530,7 @@ class Backtrader:
 			self.update_asset_properties(combined_volumes, "volume")
 			self.update_asset_properties(combined_vwaps, "vwap")
 
-			return [timelist, combined_closes, combined_opens, combined_highs, combined_lows, combined_volumes, combined_vwaps]			
+			return barblock.BarBlock(times, np.stack([combined_closes, combined_opens, combined_highs, combined_lows, combined_volumes, combined_vwaps]))			
 
 
 
@@ -680,50 +541,147 @@ class Backtrader:
 		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
 		start_trading_day (pandas.Timestamp): The timestamp representing the open of the trading day.
 		end_trading_day (pandas.Timestamp): The timestamp representing the end of the trading day.
-		_1min_time_delta (String):
-		_1min_time_frame (TimeFrame):  
-		_5min_time_delta (String): 
-		_5min_time_frame (TimeFrame): 
-		_15min_time_delta (String): 
-		_15min_time_frame (TimeFrame): 
-		day_time_delta (String): 
-		day_time_frame (TimeFrame): 
+		timeframes (Timeframes): Registry of the timeframes to keep track of.
+		first_session (Boolean): False if the run carries on from the previous trading session of a multi-day run, in which case the candlesticks,
+			indicators, plot series and data files are carried over rather than started afresh.
+		last_session (Boolean): False if another trading session of a multi-day run follows, in which case the data files are left open and a snapshot
+			is taken at the end of the session.
+		checkpoint_file (String): Snapshot file to save to and resume from, eg one shared by all the sessions of a multi-day run. Defaults to one per
+			securities, start, end and rows_limit.
+		resume (Boolean): Whether to resume from the snapshot, if there is one. A multi-day run only resumes on the first session it simulates, as
+			every later session carries on from the state left in memory by the one before.
 		kwargs			
 	"""
-	def run(self, strategy, assets, start_trading_day, end_trading_day, _1min_time_delta, _1min_time_frame, _5min_time_delta, _5min_time_frame, _15min_time_delta, _15min_time_frame, day_time_delta, day_time_frame, **kwargs):	
+	def run(self, strategy, assets, start_trading_day, end_trading_day, timeframes, first_session=True, last_session=True, checkpoint_file=None, resume=True, **kwargs):	
 
 		#Modify the number of minutes pre market
 		trigger_time = start_trading_day - pd.Timedelta('0minutes')
 		print("trigger_time "+str(trigger_time))
 
-		kwargs['dt'].delete_files_at_start()
-
 		limit = strategy.rows_limit
 
-		_1min_time_frames, _1min_close_prices, _1min_open_prices, _1min_hi_prices, _1min_lo_prices, _1min_vols, _1min_vwaps = self.get_closes_opens_his_los_vols_vwaps(kwargs['config'], assets, _1min_time_delta, _1min_time_frame, limit, trigger_time)
-		_5min_time_frames, _5min_close_prices, _5min_open_prices, _5min_hi_prices, _5min_lo_prices, _5min_vols, _5min_vwaps = self.get_closes_opens_his_los_vols_vwaps(kwargs['config'], assets, _5min_time_delta, _5min_time_frame, limit, trigger_time)
-		_15min_time_frames, _15min_close_prices, _15min_open_prices, _15min_hi_prices, _15min_lo_prices, _15min_vols, _15min_vwaps = self.get_closes_opens_his_los_vols_vwaps(kwargs['config'], assets, _15min_time_delta, _15min_time_frame, limit, trigger_time)
+		#Longer minute timeframes are built from the base (1 minute) candlesticks
+		self.base_time_frame = timeframes.base.time_frame
 
-		strategy._1min_time_frames, strategy._1min_close_prices, strategy._1min_open_prices, strategy._1min_hi_prices, strategy._1min_lo_prices, strategy._1min_vols, strategy._5min_time_frames, strategy._5min_close_prices, strategy._5min_open_prices, strategy._5min_hi_prices, strategy._5min_lo_prices, strategy._5min_vols, strategy._15min_time_frames, strategy._15min_close_prices, strategy._15min_open_prices, strategy._15min_hi_prices, strategy._15min_lo_prices, strategy._15min_vols = _1min_time_frames, _1min_close_prices, _1min_open_prices, _1min_hi_prices, _1min_lo_prices, _1min_vols, _5min_time_frames, _5min_close_prices, _5min_open_prices, _5min_hi_prices, _5min_lo_prices, _5min_vols, _15min_time_frames, _15min_close_prices, _15min_open_prices, _15min_hi_prices, _15min_lo_prices, _15min_vols
+		if self.replay is not None:
+			#One bulk request for the base timeframe, reaching back far enough to build the longest timeframe's candlesticks.
+			#Every request made from here on which falls within the session is served from memory.
+			self.replay.load(self, kwargs['config'], assets, timeframes.longest.time_delta, timeframes.base.time_frame, limit, trigger_time, end_trading_day)
 
-		kwargs['dt'].create_data_files(assets, limit, _1min_time_frames, _1min_open_prices, _1min_hi_prices, _1min_lo_prices, _1min_close_prices, _1min_vols, 'data_files/_1min_open.cvs', 'data_files/_1min_high.cvs', 'data_files/_1min_low.cvs', 'data_files/_1min_close.cvs', 'data_files/_1min_volume.cvs')
-		kwargs['dt'].create_data_files(assets, limit, _5min_time_frames, _5min_open_prices, _5min_hi_prices, _5min_lo_prices, _5min_close_prices, _5min_vols, 'data_files/_5min_open.cvs', 'data_files/_5min_high.cvs', 'data_files/_5min_low.cvs', 'data_files/_5min_close.cvs', 'data_files/_5min_volume.cvs')
-		kwargs['dt'].create_data_files(assets, limit, _15min_time_frames, _15min_open_prices, _15min_hi_prices, _15min_lo_prices, _15min_close_prices, _15min_vols, 'data_files/_15min_open.cvs', 'data_files/_15min_high.cvs', 'data_files/_15min_low.cvs', 'data_files/_15min_close.cvs', 'data_files/_15min_volume.cvs')		
-	
 		start_execution_time = trigger_time 
 		curr_date = start_execution_time
 
-		while(curr_date < end_trading_day):
+		resumed_date = None
+		if self.checkpointer is not None:
+			if checkpoint_file is None:
+				checkpoint_file = self.checkpointer.checkpoint_file(assets, start_trading_day, end_trading_day, limit)
+		if self.checkpointer is not None and resume:
+			#The fallback ohlcv of this session, should the snapshot be from the end of an earlier one
+			assets_ohlc = self.assets_ohlc
+			resumed_date = self.checkpointer.restore(checkpoint_file, self, strategy, kwargs)
+			if resumed_date is not None and resumed_date < start_execution_time:
+				self.assets_ohlc = assets_ohlc
+				first_session = False
+
+		if resumed_date is not None and resumed_date >= start_execution_time:
+			#Pick up from the minute after the last checkpoint. The warm-up candlesticks and the data files are restored along with it.
+			print("resuming after "+str(resumed_date))
+			curr_date = resumed_date + pd.Timedelta(timeframes.base.time_delta)
+		elif not first_session:
+			#Carry the state of the previous session over, taking in only the candlesticks formed since (eg overnight), from this session's bulk load
+			strategy.new_session()
+			for timeframe in timeframes:
+				kwargs['dt'].carry_over_buffer(timeframe.name, self.get_closes_opens_his_los_vols_vwaps(kwargs['config'], assets, timeframe.time_delta, timeframe.time_frame, limit, trigger_time))
+				strategy.bars[timeframe.name] = kwargs['dt'].get_bars(timeframe.name)
+		else:
+			kwargs['dt'].delete_files_at_start()
+
+			for timeframe in timeframes:
+				strategy.bars[timeframe.name] = self.get_closes_opens_his_los_vols_vwaps(kwargs['config'], assets, timeframe.time_delta, timeframe.time_frame, limit, trigger_time)
+				kwargs['dt'].create_buffer(timeframe.name, assets, limit, strategy.bars[timeframe.name])
+
+		try:
+			while(curr_date < end_trading_day):
+
+				if curr_date < start_trading_day:
+					#Premarket hours
+					strategy.execute(self, assets, curr_date, start_execution_time, start_trading_day, end_trading_day, timeframes, kwargs)
+				else:
+					#Live market hours
+					strategy.execute(self, assets, curr_date, start_execution_time, start_trading_day, end_trading_day, timeframes, kwargs)
+
+				if self.checkpointer is not None and self.checkpointer.is_due():
+					self.checkpointer.save(checkpoint_file, self, strategy, curr_date, kwargs)
 
-			if curr_date < start_trading_day:
-				#Premarket hours
-				strategy.execute(self, assets, curr_date, start_execution_time, start_trading_day, end_trading_day, _1min_time_delta, _1min_time_frame, _5min_time_delta, _5min_time_frame, _15min_time_delta, _15min_time_frame, day_time_delta, day_time_frame, kwargs)
+				#Updates
+				curr_date += pd.Timedelta(timeframes.base.time_delta)#Increment time	
+
+		finally:
+			#Write out whatever the data files still have queued, even if the simulation failed midway
+			if last_session:
+				kwargs['dt'].close()
+			else:
+				kwargs['dt'].flush()
+			if self.bar_cache is not None:
+				self.bar_cache.flush()
+
+		if self.checkpointer is not None:
+			if last_session:
+				#The run has completed, so there is nothing left to resume
+				self.checkpointer.discard(checkpoint_file)
 			else:
-				#Live market hours
-				strategy.execute(self, assets, curr_date, start_execution_time, start_trading_day, end_trading_day, _1min_time_delta, _1min_time_frame, _5min_time_delta, _5min_time_frame, _15min_time_delta, _15min_time_frame, day_time_delta, day_time_frame, kwargs)
-			#Updates
-			curr_date += pd.Timedelta(_1min_time_delta)#Increment time	
+				#The next session picks up from the end of this one
+				self.checkpointer.save(checkpoint_file, self, strategy, curr_date - pd.Timedelta(timeframes.base.time_delta), kwargs)
 
 		print("THE END")
 
 
+
+	"""
+	Alternative to run() for strategies which can be written as array expressions: rather than calling execute() once a minute, calls the strategy's
+	execute_vectorized() once for the whole session with the candlesticks of every timeframe as (time, security) matrices on a 1 minute clock, then
+	fills the positions it returns and computes the profit and loss with numpy (see vectorized.py). The clock starts rows_limit candlesticks of the
+	longest timeframe before the session, so indicators can warm up.
+	Parameters:
+		strategy (Strategy): Instance of Strategy class.
+		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+		start_trading_day (pandas.Timestamp): The timestamp representing the open of the trading day.
+		end_trading_day (pandas.Timestamp): The timestamp representing the end of the trading day.
+		timeframes (Timeframes): Registry of the timeframes to keep track of.
+		commission (Float): Cost of trading a share.
+		kwargs
+	Returns:
+		(SessionResult)
+	"""
+	def run_vectorized(self, strategy, assets, start_trading_day, end_trading_day, timeframes, commission=0.0, **kwargs):
+
+		trigger_time = start_trading_day - pd.Timedelta('0minutes')
+		limit = strategy.rows_limit
+		self.base_time_frame = timeframes.base.time_frame
+
+		if self.replay is not None:
+			self.replay.load(self, kwargs['config'], assets, timeframes.longest.time_delta, timeframes.base.time_frame, limit, trigger_time, end_trading_day)
+
+		#1 minute clock, from the start of the warm-up to the last minute of the session
+		minute = pd.Timedelta('1minutes')
+		clock_start = (trigger_time - pd.Timedelta(timeframes.longest.time_delta)*limit).floor('1min')
+		times = np.arange(clock_start.value, end_trading_day.value, minute.value, dtype=np.int64)
+		in_session = times >= trigger_time.value
+
+		df = self.get_df(kwargs['config'], assets, timeframes.base.time_frame, clock_start, end_trading_day - minute)
+		if self.bar_cache is not None:
+			self.bar_cache.flush()
+
+		fallback_closes = np.full(len(assets), np.nan)
+		if len(self.assets_ohlc) == len(assets):
+			fallback_closes = self.assets_ohlc_table[:, OHLCV_COLUMNS.index('close')]
+
+		bars = {timeframes.base.name: vectorized.to_matrices(df, assets, times, fallback_closes)}
+		for timeframe in timeframes.derived:
+			bars[timeframe.name] = vectorized.forming_candles(bars[timeframes.base.name], timeframe.interval)
+
+		signals, positions = strategy.execute_vectorized(self, assets, bars, in_session, timeframes, kwargs)
+
+		result = vectorized.fill(bars[timeframes.base.name], signals, positions, in_session, commission)
+		print("pnl "+str(round(result.total_pnl, 2)))
+		return result
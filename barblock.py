@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+
+FIELDS = ['close', 'open', 'high', 'low', 'volume', 'vwap']
+
+
+
+"""
+Builds a BarBlock out of per field lists or arrays, each holding one row per candlestick and one column per security.
+Parameters:
+	times ([pandas.Timestamp]): Time of each candlestick.
+	closes ([[Float]]):
+	opens ([[Float]]):
+	highs ([[Float]]):
+	lows ([[Float]]):
+	volumes ([[Float]]):
+	vwaps ([[Float]]): Optional. Left as nan when not supplied.
+Returns:
+	(BarBlock)
+"""
+def from_fields(times, closes, opens, highs, lows, volumes, vwaps=None):
+	closes = np.asarray(closes, dtype=np.float64)
+	data = np.full((len(FIELDS),) + closes.shape, np.nan)
+	data[0] = closes
+	data[1] = opens
+	data[2] = highs
+	data[3] = lows
+	data[4] = volumes
+	if vwaps is not None:
+		data[5] = vwaps
+
+	return BarBlock(to_epoch_ns(times), data)
+
+
+
+"""
+Converts timestamps (pandas.Timestamp, datetime strings or epoch nanoseconds) to an int64 array of epoch nanoseconds.
+"""
+def to_epoch_ns(times):
+	if isinstance(times, np.ndarray) and times.dtype == np.int64:
+		return times
+	return pd.to_datetime(pd.Index(times), utc=True, format='ISO8601').asi8.copy()
+
+
+
+class BarBlock:
+
+
+
+	"""
+	ohlcv plus vwap for all securities in play over a run of candlesticks, held in a single contiguous float64 array of shape
+	(field, time, security) alongside an int64 array of the candlesticks' times in epoch nanoseconds (UTC).
+	The per field accessors (closes, opens, ...) are (time, security) views into that array, so no values are copied.
+	Parameters:
+		times (numpy.ndarray): int64 epoch nanoseconds, one per candlestick, oldest first.
+		data (numpy.ndarray): float64 array of shape (len(FIELDS), len(times), number of securities).
+	"""
+	def __init__(self, times, data):
+		self.times = times
+		self.data = data
+
+
+
+	def __len__(self):
+		return len(self.times)
+
+
+
+	"""
+	Allows the block to be unpacked the way the lists returned by Backtrader.get_closes_opens_his_los_vols_vwaps() used to be:
+		timelist, closes, opens, highs, lows, volumes, vwaps = bars
+	"""
+	def __iter__(self):
+		return iter([self.timelist, self.closes, self.opens, self.highs, self.lows, self.volumes, self.vwaps])
+
+
+
+	@property
+	def num_assets(self):
+		return self.data.shape[2]
+
+	@property
+	def closes(self):
+		return self.data[0]
+
+	@property
+	def opens(self):
+		return self.data[1]
+
+	@property
+	def highs(self):
+		return self.data[2]
+
+	@property
+	def lows(self):
+		return self.data[3]
+
+	@property
+	def volumes(self):
+		return self.data[4]
+
+	@property
+	def vwaps(self):
+		return self.data[5]
+
+	@property
+	def timelist(self):
+		return pd.to_datetime(self.times, utc=True).tolist()
+
+
+
+	"""
+	Returns a (time, security) view of one of the fields.
+	Parameters:
+		name (String): "close", "open", "high", "low", "volume", or "vwap"
+	"""
+	def field(self, name):
+		return self.data[FIELDS.index(name)]
+
+
+
+	"""
+	Returns a view of the last n candlesticks.
+	Parameters:
+		n (Int): Number of candlesticks.
+	Returns:
+		(BarBlock)
+	"""
+	def tail(self, n):
+		n = min(n, len(self.times))
+		return BarBlock(self.times[len(self.times)-n:], self.data[:, len(self.times)-n:])
@@ -0,0 +1,150 @@
+import os
+import os.path
+import json
+import numpy as np
+import barblock
+
+
+MAGIC = b'BARFILE1'
+HEADER_ALIGN = 64
+
+
+
+"""
+Record layout of a bar file holding num_assets securities: the candlestick's time in epoch nanoseconds (UTC), followed by one float64
+per field and security.
+"""
+def record_dtype(num_assets):
+	return np.dtype([('time', '<i8'), ('data', '<f8', (len(barblock.FIELDS), num_assets))])
+
+
+
+"""
+Creates an empty bar file, overwriting any existing file of the same name.
+The file starts with MAGIC, the length of the header and a json header holding the securities, timeframe and fields, padded to HEADER_ALIGN bytes
+so that the records that follow are aligned. Every record after the header has the same width, which is what allows the file to be memory mapped.
+Parameters:
+	filename (String): Name of file.
+	assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+	time_frame (String): Name of the timeframe, eg "5min".
+Returns:
+	(BarFile)
+"""
+def create(filename, assets, time_frame):
+	header = json.dumps({'assets':list(assets), 'time_frame':str(time_frame), 'fields':barblock.FIELDS}).encode()
+	header_len = -(-(len(MAGIC) + 8 + len(header))//HEADER_ALIGN)*HEADER_ALIGN
+
+	tmp_file = filename + '.tmp'
+	with open(tmp_file, 'wb') as f_object:
+		f_object.write(MAGIC)
+		f_object.write(np.int64(header_len).tobytes())
+		f_object.write(header.ljust(header_len - len(MAGIC) - 8, b' '))
+	os.replace(tmp_file, filename)
+
+	return BarFile(filename)
+
+
+
+class BarFile:
+
+
+
+	"""
+	Binary columnar file of candlesticks for all securities in play at one timeframe, read through numpy.memmap.
+	Reading never parses anything: tail() returns a BarBlock whose arrays are slices of the memory map, and any number of processes may map
+	the same file at once.
+	Parameters:
+		filename (String): Name of file created by create().
+		mode (String): "r+" to read and write, "r" to read only.
+	"""
+	def __init__(self, filename, mode='r+'):
+		self.filename = filename
+		self.mode = mode
+
+		with open(filename, 'rb') as f_object:
+			if f_object.read(len(MAGIC)) != MAGIC:
+				raise ValueError(str(filename)+" is not a bar file")
+			self.header_len = int(np.frombuffer(f_object.read(8), dtype='<i8')[0])
+			header = json.loads(f_object.read(self.header_len - len(MAGIC) - 8).decode())
+
+		self.assets = header['assets']
+		self.time_frame = header['time_frame']
+		self.dtype = record_dtype(len(self.assets))
+		self.records = None
+
+
+
+	"""
+	Number of candlesticks in the file, as of the file's current size.
+	"""
+	def __len__(self):
+		return (os.path.getsize(self.filename) - self.header_len)//self.dtype.itemsize
+
+
+
+	def to_records(self, bars):
+		records = np.zeros(len(bars), dtype=self.dtype)
+		records['time'] = bars.times
+		records['data'] = bars.data.transpose(1, 0, 2)
+		return records
+
+
+
+	"""
+	Appends each candlestick of bars to the end of the file.
+	Parameters:
+		bars (BarBlock):
+	"""
+	def append(self, bars):
+		with open(self.filename, 'ab') as f_object:
+			f_object.write(self.to_records(bars).tobytes())
+
+
+
+	"""
+	Overwrites the last candlestick in the file with the last candlestick of bars, in place.
+	Parameters:
+		bars (BarBlock):
+	"""
+	def replace_last(self, bars):
+		num_records = len(self)
+		if num_records == 0:
+			self.append(bars.tail(1))
+			return
+
+		with open(self.filename, 'r+b') as f_object:
+			f_object.seek(self.header_len + (num_records - 1)*self.dtype.itemsize)
+			f_object.write(self.to_records(bars.tail(1)).tobytes())
+
+
+
+	"""
+	Maps the records of the file, re-mapping only if the file has grown or shrunk since the last call.
+	Returns:
+		(numpy.memmap): Structured array with a "time" and a "data" column, or None if the file holds no records.
+	"""
+	def map(self):
+		num_records = len(self)
+		if num_records == 0:
+			return None
+		if self.records is None or len(self.records) != num_records:
+			self.records = np.memmap(self.filename, dtype=self.dtype, mode=self.mode, offset=self.header_len, shape=(num_records,))
+		return self.records
+
+
+
+	"""
+	Returns the last n candlesticks in the file, without copying them.
+	Parameters:
+		n (Int): Number of candlesticks.
+	Returns:
+		(BarBlock): Its arrays are views into the memory map, so they see later calls to replace_last().
+	"""
+	def tail(self, n):
+		records = self.map()
+		if records is None:
+			return barblock.BarBlock(np.empty(0, dtype=np.int64), np.empty((len(barblock.FIELDS), 0, len(self.assets))))
+
+		n = min(n, len(records))
+		records = records[len(records)-n:]
+		return barblock.BarBlock(records['time'], records['data'].transpose(1, 0, 2))
@@ -0,0 +1,643 @@
+"""
+Times the data wrangling functions of Backtrader on synthetic dataframes, against the row by row implementations they replaced.
+On the command line:
+	python3 benchmark.py
+"""
+
+import os
+import time
+import types
+import tempfile
+import numpy as np
+import pandas as pd
+import backtrader as bt
+import barblock
+import candles
+import data
+import indicators
+import replay
+import vectorized
+
+
+
+"""
+Builds a dataframe in the layout returned by get_bars(), with rows shuffled across securities.
+Parameters:
+	num_assets (Int): Number of securities.
+	num_rows (Int): Number of candlesticks per security.
+Returns:
+	assets ([String]): Sorted ticker symbols.
+	df (pandas.DataFrame):
+"""
+def make_df(num_assets, num_rows):
+	rng = np.random.default_rng(0)
+	assets = sorted(['S'+str(i).zfill(4) for i in range(0, num_assets)])
+	timestamps = pd.date_range('2022-11-03 13:30', periods=num_rows, freq='1min', tz='UTC')
+
+	prices = 100 + rng.random(num_assets*num_rows)
+	df = pd.DataFrame({
+		'open':prices,
+		'high':prices + 1,
+		'low':prices - 1,
+		'close':prices + 0.5,
+		'volume':rng.integers(1, 1000, num_assets*num_rows).astype(float),
+		'trade_count':rng.integers(1, 100, num_assets*num_rows).astype(float),
+		'vwap':prices + 0.25,
+		'symbol':np.repeat(assets, num_rows)
+	}, index=np.tile(timestamps, num_assets))
+	df.index.name = 'timestamp'
+
+	return assets, df.iloc[rng.permutation(len(df.index))]
+
+
+
+"""
+The itertuples() implementation of Backtrader.rearrange_rows_by_symbol() kept as a reference.
+"""
+def legacy_rearrange_rows_by_symbol(df, assets):
+	df_indexed = df.reset_index()
+	rows = []
+	for i in range(0, len(assets)):
+		for row in df_indexed.itertuples():
+			if assets[i] == row.symbol:
+				rows.append((row.timestamp, row.open, row.high, row.low, row.close, row.volume, row.trade_count, row.vwap, row.symbol))
+	df = pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap', 'symbol']).set_index('timestamp')
+	return df
+
+
+
+"""
+The row by row implementation of Backtrader.fill_missing_dates() kept as a reference.
+"""
+def legacy_fill_missing_dates(df, time_delta, start_date, end_date):
+
+	def fill_lists(timestamps, timestamp, opens, opn, highs, high, lows, low, closes, close, volumes, volume, trade_counts, trade_count, vwaps, vwap, symbols, symbol):
+		timestamps.append(timestamp)
+		opens.append(opn)
+		highs.append(high)
+		lows.append(low)
+		closes.append(close)
+		volumes.append(volume)
+		trade_counts.append(trade_count)
+		vwaps.append(vwap)
+		symbols.append(symbol)			
+	
+	#Dataframe returns dates in UTC. So need to convert from local time to UTC
+	dataframe_start_dt_utc = start_date.tz_convert('UTC')
+	dataframe_end_dt_utc = end_date.tz_convert('UTC')
+	dataframe_end_dt_utc_hour_min = dataframe_end_dt_utc.replace(second=0, microsecond=0)	
+
+	df_indexed = df.reset_index()  # make sure indexes pair with number of rows
+	prev_row = None
+
+	timestamps = []
+	opens = []
+	highs = []
+	lows= []
+	closes = []
+	volumes = []
+	trade_counts = []
+	vwaps = []
+	symbols = []
+	num_symbols = 1
+
+	for row in df_indexed.itertuples():
+		if row.Index > 0:
+
+			if prev_row.symbol == row.symbol:
+				expected_time = prev_row.timestamp + pd.Timedelta(time_delta)
+				expected_time_hour_min = expected_time.replace(second=0, microsecond=0)
+				row_timestamp_hour_min = row.timestamp.replace(second=0, microsecond=0)
+				while expected_time_hour_min < row_timestamp_hour_min:					
+					#Expected time was skipped. Insert before current row.
+					fill_lists(timestamps, expected_time, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)
+					expected_time += pd.Timedelta(time_delta)
+					expected_time_hour_min = expected_time.replace(second=0, microsecond=0)
+
+				fill_lists(timestamps, row.timestamp, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)	
+
+			
+			else:#End of an old symbol and start of a new symbol
+				num_symbols += 1
+				#End of old symbol
+				last_time_slot = prev_row.timestamp
+				last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
+				if last_time_slot_hour_min < dataframe_end_dt_utc_hour_min:
+					last_time_slot += pd.Timedelta(time_delta)
+					last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
+					fill_lists(timestamps, last_time_slot, opens, prev_row.open, highs, prev_row.high, lows, prev_row.low, closes, prev_row.close, volumes, prev_row.volume, trade_counts, prev_row.trade_count, vwaps, prev_row.vwap, symbols, prev_row.symbol)	
+				while last_time_slot_hour_min < dataframe_end_dt_utc_hour_min:
+					last_time_slot += pd.Timedelta(time_delta)
+					last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
+					fill_lists(timestamps, last_time_slot, opens, prev_row.open, highs, prev_row.high, lows, prev_row.low, closes, prev_row.close, volumes, prev_row.volume, trade_counts, prev_row.trade_count, vwaps, prev_row.vwap, symbols, prev_row.symbol)	
+				
+				#Start of new symbol
+				expected_time = dataframe_start_dt_utc
+				expected_time_hour_min = expected_time.replace(second=0, microsecond=0)
+				row_timestamp_hour_min = row.timestamp.replace(second=0, microsecond=0)
+				while expected_time_hour_min < row_timestamp_hour_min:
+					fill_lists(timestamps, expected_time, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)
+					expected_time += pd.Timedelta(time_delta)	
+					expected_time_hour_min = expected_time.replace(second=0, microsecond=0)					
+				
+				fill_lists(timestamps, row.timestamp, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)
+		else:
+			#For first row
+			expected_time = dataframe_start_dt_utc
+			expected_time_hour_min = expected_time.replace(second=0, microsecond=0)
+			row_timestamp_hour_min = row.timestamp.replace(second=0, microsecond=0)
+			while expected_time_hour_min < row_timestamp_hour_min:
+				fill_lists(timestamps, expected_time, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)
+				expected_time += pd.Timedelta(time_delta)	
+				expected_time_hour_min = expected_time.replace(second=0, microsecond=0)
+
+			fill_lists(timestamps, row.timestamp, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)				
+			
+		prev_row = row
+
+	#End df iteration
+	if prev_row != None:
+		last_time_slot = prev_row.timestamp
+		last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
+		if last_time_slot_hour_min < dataframe_end_dt_utc_hour_min:
+			last_time_slot += pd.Timedelta(time_delta)
+			fill_lists(timestamps, last_time_slot, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)	
+			last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
+		while last_time_slot_hour_min < dataframe_end_dt_utc_hour_min:
+			last_time_slot += pd.Timedelta(time_delta)
+			fill_lists(timestamps, last_time_slot, opens, row.open, highs, row.high, lows, row.low, closes, row.close, volumes, row.volume, trade_counts, row.trade_count, vwaps, row.vwap, symbols, row.symbol)	
+			last_time_slot_hour_min = last_time_slot.replace(second=0, microsecond=0)
+
+
+	df = pd.DataFrame({
+    		'open': opens,
+    		'high': highs,
+    		'low': lows,
+    		'close': closes,
+    		'volume':volumes,
+    		'trade_count':trade_counts,
+    		'vwap':vwaps,
+    		'symbol':symbols
+
+	},index=timestamps)	
+	df.index.name = 'timestamp'		
+
+	return df
+
+
+
+"""
+The nested loop implementation of Backtrader.combine_buckets() kept as a reference.
+"""
+def legacy_combine_buckets(list_of_buckets, assets_ohlc, col_name):
+	combined_buckets = []
+	for i in range(0, len(list_of_buckets)):
+		for j in range(0, len(list_of_buckets[i])):
+			combined_buckets.append(list(list_of_buckets[i][j]))
+	combined_buckets.reverse()
+
+	for i in range(0, len(combined_buckets)):
+		for j in range(0, len(combined_buckets[i])):
+			if combined_buckets[i][j] == 0 or combined_buckets[i][j] == None:
+				k = i-1
+				while k >= 0:
+					if combined_buckets[k][j] != 0 and combined_buckets[k][j] != None:
+						combined_buckets[i][j] = combined_buckets[k][j]
+					k -= 1
+			if combined_buckets[i][j] == 0 or combined_buckets[i][j] == None:
+				k = i+1
+				while k < len(combined_buckets):
+					if combined_buckets[k][j] != 0 and combined_buckets[k][j] != None:
+						combined_buckets[i][j] = combined_buckets[k][j]
+					k += 1
+			if combined_buckets[i][j] == 0 or combined_buckets[i][j] == None:
+				combined_buckets[i][j] = assets_ohlc[j].get(col_name)
+	return combined_buckets
+
+
+
+"""
+The bucket scanning implementation of Backtrader.fill_time_slots() kept as a reference. It recounts the time slots filled for every row, and scans
+the buckets for the time slot each row goes in.
+"""
+def legacy_fill_time_slots(backtrader, next_time_slot, timelist, temp_closes, temp_opens, temp_highs, temp_lows, temp_volumes, temp_vwaps, config, assets, time_delta, time_frame, limit, curr_date):
+	df = backtrader.grab_df_and_fill_missing_stocks(config, assets, time_delta, time_frame, limit, curr_date)
+	df_indexed = df.reset_index()
+	curr_stock_index = len(assets)-1
+
+	symbols = list(df_indexed['symbol'])[::-1]
+	columns = [list(df_indexed[col_name])[::-1] for col_name in ['close', 'open', 'high', 'low', 'volume', 'vwap']]
+	temps = [temp_closes, temp_opens, temp_highs, temp_lows, temp_volumes, temp_vwaps]
+
+	for row_index in range(0, len(symbols)):
+		num_filled_time_slots = 0
+		for i in range(0, len(temp_closes)):
+			for j in range(0, len(temp_closes[i])):
+				num_filled_time_slots += 1
+		assert num_filled_time_slots == len(timelist)
+
+		if row_index != 0 and symbols[row_index - 1] != symbols[row_index]:
+			curr_stock_index -= 1
+
+		if next_time_slot[curr_stock_index] < limit:
+			if next_time_slot[curr_stock_index] + 1 <= num_filled_time_slots:
+				bucket_index = 0
+				time_slot_index = 0
+				time_slot_count = 0
+				for i in range(0, len(temp_closes)):
+					break_outter_loop = False
+					bucket_index = i
+					for j in range(0, len(temp_closes[i])):
+						time_slot_index = j
+						time_slot_count += 1
+						if next_time_slot[curr_stock_index] + 1 == time_slot_count:
+							break_outter_loop = True
+							break
+					if break_outter_loop:
+						break
+				for temp, column in zip(temps, columns):
+					temp[bucket_index][time_slot_index][curr_stock_index] = column[row_index]
+			else:
+				for temp, column in zip(temps, columns):
+					new_time_slot = [0] * len(assets)
+					new_time_slot[curr_stock_index] = column[row_index]
+					temp[-1].append(new_time_slot)
+				timelist.append(num_filled_time_slots)
+
+		next_time_slot[curr_stock_index] += 1
+
+	return next_time_slot, timelist, temp_closes, temp_opens, temp_highs, temp_lows, temp_volumes, temp_vwaps
+
+
+
+"""
+The paging loop of Backtrader.get_closes_opens_his_los_vols_vwaps() for limit > 3 kept as a reference. It requests windows of limit candlesticks
+until every security has limit - 1 of them.
+Returns:
+	([[[Float]]]): Closes, opens, highs, lows, volumes and vwaps, each a list of time slots running from the oldest to the most recent.
+"""
+def legacy_get_closes_opens_his_los_vols_vwaps(backtrader, config, assets, time_delta, time_frame, limit, curr_date):
+	timelist = []
+	temps = [[], [], [], [], [], []]
+	next_time_slot = [0] * len(assets)
+	all_stocks_reached_limit = False
+
+	while not all_stocks_reached_limit:
+		for temp in temps:
+			temp.append([])
+		next_time_slot, timelist = legacy_fill_time_slots(backtrader, next_time_slot, timelist, *temps, config, assets, time_delta, time_frame, limit, curr_date)[:2]
+		curr_date -= pd.Timedelta(time_delta)*(limit)
+		all_stocks_reached_limit = min(next_time_slot) >= limit - 1
+
+	return [legacy_combine_buckets(temp, backtrader.assets_ohlc, col_name) for temp, col_name in zip(temps, ['close', 'open', 'high', 'low', 'volume', 'vwap'])]
+
+
+
+"""
+The readlines() implementation of Data.get_rows_from_file() kept as a reference, which the candlesticks were read back with every minute before
+they were held in a BarBuffer. The header is skipped, which it took for a row once limit exceeded the rows of the file.
+"""
+def legacy_get_rows_from_file(filename, limit):
+	with open(filename, 'r') as f_object:
+		rows = f_object.readlines()[1:]
+	rows_arr = [row.strip().split(',') for row in rows[-limit:]]
+	return [row[0] for row in rows_arr], [[float(x) for x in row[1:]] for row in rows_arr]
+
+
+
+"""
+The per security dictionary implementation of the forming candlesticks kept as a reference: Strategy.get_growing_candlestick(), which grew the
+candlestick of one timeframe at a time, before CandleAggregator.update() grew them all at once.
+"""
+def legacy_get_growing_candlestick(timeframe, growing_candlestick, curr_date, _1min_close_price, _1min_open_price, _1min_hi_price, _1min_lo_price, _1min_vol):
+	close_prices = [[]]
+	open_prices = [[]]
+	hi_prices = [[]]
+	lo_prices = [[]]
+	vols = [[]]
+
+	for i in range(0, len(growing_candlestick)):
+		if curr_date.minute % timeframe == 1: #First minute of fresh candlestick
+			close = _1min_close_price[i]
+			opn = _1min_open_price[i]
+			hi = _1min_hi_price[i]
+			lo = _1min_lo_price[i]
+			vol = _1min_vol[i]
+		else:
+			close = _1min_close_price[i]
+			opn = growing_candlestick[i].get("open")
+			hi = max(_1min_hi_price[i], growing_candlestick[i].get("hi"))
+			lo = min(_1min_lo_price[i], growing_candlestick[i].get("lo"))
+			vol = _1min_vol[i] + growing_candlestick[i].get("vol")
+
+		growing_candlestick[i].update({"close":close})
+		growing_candlestick[i].update({"open":opn})
+		growing_candlestick[i].update({"hi":hi})
+		growing_candlestick[i].update({"lo":lo})
+		growing_candlestick[i].update({"vol":vol})
+		close_prices[0].append(close)
+		open_prices[0].append(opn)
+		hi_prices[0].append(hi)
+		lo_prices[0].append(lo)
+		vols[0].append(vol)
+
+	return barblock.from_fields([curr_date], close_prices, open_prices, hi_prices, lo_prices, vols), growing_candlestick
+
+
+
+"""
+Builds buckets of time slots as fill_time_slots() does, with roughly a third of the values missing.
+Parameters:
+	num_assets (Int): Number of securities.
+	rows_limit (Int): Number of time slots.
+Returns:
+	list_of_buckets ([[[Float]]]):
+	assets_ohlc ([{Float}]):
+"""
+def make_buckets(num_assets, rows_limit):
+	rng = np.random.default_rng(0)
+	values = 100 + rng.random((rows_limit, num_assets))
+	values[rng.random((rows_limit, num_assets)) < 0.33] = 0
+	bucket_size = 13
+	list_of_buckets = [values[i:i+bucket_size].tolist() for i in range(0, rows_limit, bucket_size)]
+	assets_ohlc = [{"close":100.0} for i in range(0, num_assets)]
+	return list_of_buckets, assets_ohlc
+
+
+
+"""
+Returns a Backtrader whose requests for bars are answered from a dataframe rather than the API, through a SessionReplay holding the dataframe.
+Parameters:
+	df (pandas.DataFrame): In the layout returned by get_bars().
+	assets ([String]): Sorted ticker symbols.
+	time_frame (String): Timeframe the requests are made for, eg "1Min".
+	start_date (pandas.Timestamp): First candlestick of df.
+	end_date (pandas.Timestamp): Last candlestick of df.
+Returns:
+	(Backtrader): Its fallback ohlcv is 100 for every security and field.
+"""
+def replaying(df, assets, time_frame, start_date, end_date):
+	source = types.SimpleNamespace(_get_df=lambda config, assets, time_frame, start_dt, end_dt: df, bar_cache=None)
+	session_replay = replay.SessionReplay(lookback_multiple=0)
+	session_replay.load(source, None, assets, '1 minutes', time_frame, 0, start_date, end_date)
+	backtrader = bt.Backtrader(replay=session_replay)
+	backtrader.assets_ohlc = [{col_name:100.0 for col_name in bt.OHLCV_COLUMNS} for i in range(0, len(assets))]
+	return backtrader
+
+
+
+"""
+Returns the best of several wall clock timings of a call, in seconds.
+"""
+def best_time(func, *args, repeat=3):
+	best = np.inf
+	for i in range(0, repeat):
+		start = time.perf_counter()
+		func(*args)
+		best = min(best, time.perf_counter() - start)
+	return best
+
+
+
+def bench_rearrange_rows_by_symbol(backtrader):
+	print("rearrange_rows_by_symbol")
+	for num_assets, num_rows in [(14, 13), (100, 50), (500, 20)]:
+		assets, df = make_df(num_assets, num_rows)
+		new = best_time(backtrader.rearrange_rows_by_symbol, df, assets)
+		legacy = best_time(legacy_rearrange_rows_by_symbol, df, assets, repeat=1)
+		print("  assets="+str(num_assets)+" rows="+str(len(df.index))+"  legacy "+str(round(legacy*1000, 2))+"ms  vectorized "+str(round(new*1000, 2))+"ms  speedup x"+str(round(legacy/new, 1)))
+
+
+
+def bench_fill_missing_dates(backtrader):
+	print("fill_missing_dates")
+	for num_assets, num_rows in [(14, 13), (100, 50), (500, 20)]:
+		assets, df = make_df(num_assets, num_rows)
+		df = backtrader.rearrange_rows_by_symbol(df, assets)
+		df = df.iloc[np.random.default_rng(0).random(len(df.index)) > 0.1]
+		start_date = pd.Timestamp('2022-11-03 13:30', tz='UTC')
+		end_date = start_date + pd.Timedelta('1minutes')*(num_rows - 1)
+		new = best_time(backtrader.fill_missing_dates, df, '1 minutes', start_date, end_date)
+		legacy = best_time(legacy_fill_missing_dates, df, '1 minutes', start_date, end_date, repeat=1)
+		print("  assets="+str(num_assets)+" rows="+str(len(df.index))+"  legacy "+str(round(legacy*1000, 2))+"ms  vectorized "+str(round(new*1000, 2))+"ms  speedup x"+str(round(legacy/new, 1)))
+
+
+
+def bench_combine_buckets(backtrader):
+	print("combine_buckets")
+	for num_assets, rows_limit in [(14, 13), (14, 200), (100, 500)]:
+		list_of_buckets, assets_ohlc = make_buckets(num_assets, rows_limit)
+		backtrader.assets_ohlc = assets_ohlc
+		new = best_time(backtrader.combine_buckets, list_of_buckets, "close")
+		legacy = best_time(legacy_combine_buckets, list_of_buckets, assets_ohlc, "close", repeat=1)
+		print("  assets="+str(num_assets)+" rows_limit="+str(rows_limit)+"  legacy "+str(round(legacy*1000, 2))+"ms  vectorized "+str(round(new*1000, 2))+"ms  speedup x"+str(round(legacy/new, 1)))
+
+
+
+"""
+Times the warm-up of limit candlesticks when roughly a quarter of the candlesticks are missing, so that more than one window has to be requested.
+"""
+def bench_get_closes_opens_his_los_vols_vwaps():
+	print("get_closes_opens_his_los_vols_vwaps")
+	for num_assets, limit in [(14, 13), (100, 51), (100, 201)]:
+		assets, df = make_df(num_assets, 4*limit)
+		df = df.iloc[np.random.default_rng(0).random(len(df.index)) > 0.25]
+		start_date = pd.Timestamp('2022-11-03 13:30', tz='UTC')
+		end_date = start_date + pd.Timedelta('1minutes')*(4*limit - 1)
+		backtrader = replaying(df, assets, '1Min', start_date, end_date)
+		new = best_time(backtrader.get_closes_opens_his_los_vols_vwaps, None, assets, '1 minutes', '1Min', limit, end_date)
+		legacy = best_time(legacy_get_closes_opens_his_los_vols_vwaps, backtrader, None, assets, '1 minutes', '1Min', limit, end_date, repeat=1)
+		print("  assets="+str(num_assets)+" limit="+str(limit)+"  legacy "+str(round(legacy*1000, 2))+"ms  vectorized "+str(round(new*1000, 2))+"ms  speedup x"+str(round(legacy/new, 1)))
+
+
+
+"""
+Times a session of 390 minutes of 1 minute candlesticks, each added to the data files and the last limit of them then read back from the files, as
+the legacy simulation did, against a Data instance keeping them in a BarBuffer.
+"""
+def bench_bar_buffer():
+	print("bar buffer")
+	for num_assets, limit in [(14, 13), (100, 13)]:
+		assets = ['S'+str(i).zfill(4) for i in range(0, num_assets)]
+		times = pd.Timestamp('2022-11-03 13:30', tz='UTC').value + pd.Timedelta('1minutes').value*np.arange(limit + 390, dtype=np.int64)
+		bars = barblock.BarBlock(times, 100 + np.random.default_rng(0).random((len(barblock.FIELDS), len(times), num_assets)))
+
+		def session(csv_sink):
+			with tempfile.TemporaryDirectory() as directory:
+				dt = data.Data(num_assets, csv_sink=csv_sink, async_writes=False, directory=directory)
+				dt.create_buffer('1min', assets, limit, barblock.BarBlock(times[:limit], bars.data[:, :limit]))
+				for i in range(limit, len(times)):
+					dt.add_bar('1min', barblock.BarBlock(times[i:i+1], bars.data[:, i:i+1]))
+					if csv_sink:
+						for filename in dt.data_files('1min'):
+							legacy_get_rows_from_file(filename, limit)
+					else:
+						dt.get_bars('1min')
+
+		new = best_time(session, False)
+		legacy = best_time(session, True, repeat=1)
+		print("  assets="+str(num_assets)+" limit="+str(limit)+"  legacy "+str(round(legacy*1000, 2))+"ms  ring buffer "+str(round(new*1000, 2))+"ms  speedup x"+str(round(legacy/new, 1)))
+
+
+
+"""
+Builds minutes of 1 minute candlesticks, one (field, security) array per minute, starting on the first minute of a 15 minute candlestick.
+Returns:
+	dates ([pandas.Timestamp]): Minute each candlestick is taken in on.
+	bars ([BarBlock]):
+"""
+def make_minutes(num_assets, num_minutes):
+	rng = np.random.default_rng(0)
+	dates = list(pd.date_range('2022-11-03 13:31', periods=num_minutes, freq='1min', tz='UTC'))
+	closes = 100 + np.cumsum(rng.normal(size=(num_minutes, num_assets)), axis=0)
+	opens = closes + rng.normal(size=closes.shape)
+	highs = np.maximum(opens, closes) + rng.random(closes.shape)
+	lows = np.minimum(opens, closes) - rng.random(closes.shape)
+	volumes = rng.integers(1, 1000, closes.shape).astype(float)
+	bars = [barblock.from_fields([dates[t]], closes[t:t+1], opens[t:t+1], highs[t:t+1], lows[t:t+1], volumes[t:t+1], closes[t:t+1]) for t in range(0, num_minutes)]
+	return dates, bars
+
+
+
+def bench_candle_aggregator():
+	print("forming candlesticks")
+	for num_assets in [14, 100, 500]:
+		dates, bars = make_minutes(num_assets, 390)
+
+		def legacy():
+			growing_candlesticks = [[{} for i in range(0, num_assets)] for interval in [5, 15]]
+			for curr_date, bar in zip(dates, bars):
+				for interval, growing_candlestick in zip([5, 15], growing_candlesticks):
+					legacy_get_growing_candlestick(interval, growing_candlestick, curr_date, bar.closes[-1], bar.opens[-1], bar.highs[-1], bar.lows[-1], bar.volumes[-1])
+
+		def aggregated():
+			aggregator = candles.CandleAggregator(num_assets, [5, 15])
+			for curr_date, bar in zip(dates, bars):
+				aggregator.update(curr_date, bar)
+
+		new = best_time(aggregated)
+		old = best_time(legacy, repeat=1)
+		print("  assets="+str(num_assets)+" minutes=390  legacy "+str(round(old*1000, 2))+"ms  vectorized "+str(round(new*1000, 2))+"ms  speedup x"+str(round(old/new, 1)))
+
+
+
+"""
+Updates a streaming indicator with one row of x at a time, as the simulation does, and returns the values it took.
+"""
+def stream(indicator, x):
+	values = np.empty(x.shape)
+	for t in range(0, len(x)):
+		values[t] = indicator.update(x[t])
+	return values
+
+
+
+"""
+The indicators of an ema crossover strategy which also watches the macd, kept as separate streaming indicators as a reference, as they were before
+they could be declared on an IndicatorGraph: the macd and the crossover each compute their own ema12 and ema26.
+Parameters:
+	closes (numpy.ndarray): One row per candlestick (oldest first) and one column per security.
+Returns:
+	({String:numpy.ndarray}): Values of the macd, its signal line and histogram, and of the crossover, after each candlestick.
+"""
+def legacy_macd_and_crossover(closes):
+	num_assets = closes.shape[1]
+	macd = indicators.MACD(num_assets)
+	ema12 = indicators.EMA(num_assets, 12)
+	ema26 = indicators.EMA(num_assets, 26)
+	crossover = indicators.Crossover()
+
+	values = {'macd':[], 'signal':[], 'histogram':[], 'crossover':[]}
+	for t in range(0, len(closes)):
+		values['macd'].append(macd.update(closes[t]))
+		values['signal'].append(macd.signal)
+		values['histogram'].append(macd.histogram)
+		values['crossover'].append(crossover.update(ema12.update(closes[t]), ema26.update(closes[t])))
+	return {name: np.array(value) for name, value in values.items()}
+
+
+
+"""
+The indicators of legacy_macd_and_crossover() declared on an IndicatorGraph, where they share their ema12 and ema26.
+"""
+def graph_macd_and_crossover(closes):
+	graph = indicators.IndicatorGraph(closes.shape[1])
+	macd, signal, histogram = graph.macd('close')
+	nodes = {'macd':macd, 'signal':signal, 'histogram':histogram, 'crossover':graph.crossover(graph.ema('close', 12), graph.ema('close', 26))}
+
+	values = {name: [] for name in nodes}
+	data = np.zeros((len(barblock.FIELDS),) + closes.shape)
+	data[barblock.FIELDS.index('close')] = closes
+	for t in range(0, len(closes)):
+		graph.evaluate(barblock.BarBlock(np.array([t], dtype=np.int64), data[:, t:t+1]))
+		for name, node in nodes.items():
+			values[name].append(node.value)
+	return {name: np.array(value) for name, value in values.items()}
+
+
+
+def bench_indicator_graph():
+	print("indicator graph")
+	rng = np.random.default_rng(0)
+	for num_assets, num_rows in [(14, 390), (100, 390), (500, 390)]:
+		closes = 100 + np.cumsum(rng.normal(size=(num_rows, num_assets)), axis=0)
+		new = best_time(graph_macd_and_crossover, closes)
+		legacy = best_time(legacy_macd_and_crossover, closes)
+		print("  assets="+str(num_assets)+" rows="+str(num_rows)+"  separate "+str(round(legacy*1000, 2))+"ms  graph "+str(round(new*1000, 2))+"ms")
+
+
+
+def bench_batch_indicators():
+	print("batch indicators")
+	rng = np.random.default_rng(0)
+	for num_assets, num_rows in [(14, 390), (100, 390*20), (500, 390*252)]:
+		closes = 100 + np.cumsum(rng.normal(size=(num_rows, num_assets)), axis=0)
+		for name, batch, streaming in [
+			("ema12", lambda x: indicators.batch_ema(x, 12), lambda x: stream(indicators.EMA(num_assets, 12), x)),
+			("rsi14", lambda x: indicators.batch_rsi(x, 14), lambda x: stream(indicators.RSI(num_assets, 14), x)),
+			("max30", lambda x: indicators.batch_rolling_max(x, 30), lambda x: stream(indicators.RollingMax(num_assets, 30), x))]:
+			new = best_time(batch, closes, repeat=1)
+			legacy = best_time(streaming, closes, repeat=1) if num_assets*num_rows <= 100*390*20 else np.nan
+			if not np.isnan(legacy) and not np.array_equal(batch(closes), streaming(closes), equal_nan=True):
+				print("  "+name+" differs from the streaming indicator")
+			print("  "+name+" assets="+str(num_assets)+" rows="+str(num_rows)+"  streaming "+str(round(legacy*1000, 2))+"ms  batch "+str(round(new*1000, 2))+"ms")
+
+
+
+"""
+Times a whole session in vectorized mode, from the dataframe to the profit and loss: 390 minutes plus the warm-up of 13 15 minute candlesticks,
+with some of the candlesticks missing, a 5 and 15 minute timeframe, and an ema crossover strategy.
+"""
+def bench_vectorized_session():
+	print("vectorized session")
+	for num_assets in [14, 100, 500]:
+		assets, df = make_df(num_assets, 390 + 15*13)
+		df = df.iloc[np.random.default_rng(0).random(len(df.index)) > 0.05]
+		minute = pd.Timedelta('1minutes').value
+		times = pd.Timestamp('2022-11-03 13:30', tz='UTC').value + minute*np.arange(390 + 15*13, dtype=np.int64)
+		in_session = np.arange(len(times)) >= 15*13
+
+		def session():
+			bars = vectorized.to_matrices(df, assets, times, np.full(num_assets, 100.0))
+			candles = [vectorized.forming_candles(bars, interval) for interval in [5, 15]]
+			positions = np.where(indicators.batch_ema(bars.closes, 12) > indicators.batch_ema(bars.closes, 26), 1.0, 0.0)
+			return vectorized.fill(bars, None, positions, in_session)
+
+		print("  assets="+str(num_assets)+" minutes="+str(len(times))+"  "+str(round(best_time(session)*1000, 2))+"ms")
+
+
+
+def main():
+	backtrader = bt.Backtrader()
+	bench_rearrange_rows_by_symbol(backtrader)
+	bench_fill_missing_dates(backtrader)
+	bench_combine_buckets(backtrader)
+	bench_get_closes_opens_his_los_vols_vwaps()
+	bench_bar_buffer()
+	bench_candle_aggregator()
+	bench_indicator_graph()
+	bench_batch_indicators()
+	bench_vectorized_session()
+
+if __name__== '__main__':
+	main()
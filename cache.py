@@ -0,0 +1,286 @@
+import os
+import os.path
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap']
+
+MINUTE = pd.Timedelta('1minutes').value
+
+
+
+"""
+First whole minute after a time. Bars of every timeframe are stamped on whole minutes, so a range ending at end_time and one starting at or before
+next_minute(end_time) leave no bar between them.
+Parameters:
+	end_time (Int): Epoch nanoseconds.
+Returns:
+	(Int): Epoch nanoseconds.
+"""
+def next_minute(end_time):
+	return (end_time//MINUTE + 1)*MINUTE
+
+
+
+class BarCache:
+
+
+
+	"""
+	Local on-disk cache of the dataframes returned by get_bars(). Each fetched range is stored as a segment (an .npz file holding one array per column)
+	named after the content it holds, ie the symbol set, timeframe, adjustment and start/end of the range. A range fetched next to or across
+	ranges already cached for the same series is merged with them into a single segment, so a series read minute by minute ends up in one segment.
+	The segment index (including when each segment was last used) is written to disk every save_every changes and by flush(), which should be
+	called once a batch of requests is done.
+	Parameters:
+		directory (String): Folder in which segments and the segment index are stored.
+		max_bytes (Int): Once the segments on disk exceed this size, the least recently used ones are evicted.
+		save_every (Int): Number of changes to the index after which it is written to disk without waiting for flush().
+	"""
+	def __init__(self, directory='data_files/bar_cache', max_bytes=512*1024*1024, save_every=100):
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self.save_every = save_every
+		self.index_file = os.path.join(directory, 'index.json')
+		#Changes to the index not yet written to disk
+		self.unsaved_changes = 0
+
+		os.makedirs(directory, exist_ok=True)
+		self.segments = self.load_index()
+
+
+
+	"""
+	Reads the segment index from disk.
+	Returns:
+		segments ([{}]): One dictionary per segment holding its file name, series key, start, end, size and time of last use.
+	"""
+	def load_index(self):
+		if not os.path.exists(self.index_file):
+			return []
+		try:
+			with open(self.index_file, 'r') as f_object:
+				segments = json.load(f_object)
+		except (IOError, ValueError):
+			print("Could not read "+str(self.index_file)+". Starting with an empty cache")
+			return []
+
+		#Drop entries whose segment file has gone missing
+		return [segment for segment in segments if os.path.exists(os.path.join(self.directory, segment['file']))]
+
+
+
+	"""
+	Writes the segment index to disk, keeping the segments other processes sharing the cache have added since it was read, and the latest use
+	of each segment either has recorded.
+	"""
+	def save_index(self):
+		on_disk = dict((segment['file'], segment) for segment in self.load_index())
+		for segment in self.segments:
+			if segment['file'] in on_disk:
+				segment['last_used'] = max(segment['last_used'], on_disk[segment['file']]['last_used'])
+		known = set(segment['file'] for segment in self.segments)
+		self.segments += [segment for filename, segment in on_disk.items() if filename not in known]
+
+		tmp_file = self.index_file + '.' + str(os.getpid()) + '.tmp'
+		with open(tmp_file, 'w') as f_object:
+			json.dump(self.segments, f_object)
+		os.replace(tmp_file, self.index_file)
+		self.unsaved_changes = 0
+
+
+
+	"""
+	Writes the segment index to disk if it has changed since it was last written.
+	"""
+	def flush(self):
+		if self.unsaved_changes > 0:
+			self.save_index()
+
+
+
+	def index_changed(self):
+		self.unsaved_changes += 1
+		if self.unsaved_changes >= self.save_every:
+			self.save_index()
+
+
+
+	"""
+	Identifies the series a request belongs to. Requests for the same symbols, timeframe and adjustment share a series and may serve each other's ranges.
+	Parameters:
+		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+		time_frame (TimeFrame):
+		adjustment (String): Adjustment passed to get_bars().
+	Returns:
+		(String): Hash of the series.
+	"""
+	def series_key(self, assets, time_frame, adjustment):
+		return hashlib.sha1(json.dumps([sorted(assets), str(time_frame), adjustment]).encode()).hexdigest()
+
+
+
+	"""
+	Returns the bars for the requested range if it is fully covered by cached segments of the same series, otherwise None.
+	Parameters:
+		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+		time_frame (TimeFrame):
+		start_dt (String): Isoformat start of the range.
+		end_dt (String): Isoformat end of the range.
+		adjustment (String): Adjustment passed to get_bars().
+	Returns:
+		df (pandas.DataFrame): Dataframe in the same layout get_bars() returns, or None on a cache miss.
+	"""
+	def get(self, assets, time_frame, start_dt, end_dt, adjustment):
+		series = self.series_key(assets, time_frame, adjustment)
+		start = pd.Timestamp(start_dt).value
+		end = pd.Timestamp(end_dt).value
+
+		overlapping = sorted([segment for segment in self.segments if segment['series'] == series and segment['start'] <= end and segment['end'] >= start], key=lambda segment: segment['start'])
+
+		#Walk the segments in order of their start and make sure they leave no gap within the requested range. Segments next to one another, eg one
+		#ending at 06:30 and the next starting at 06:31, leave none.
+		covered_until = None
+		needed = []
+		for segment in overlapping:
+			if covered_until is None:
+				if segment['start'] > start:
+					return None
+			elif segment['start'] > next_minute(covered_until):
+				return None
+			if covered_until is None or segment['end'] > covered_until:
+				needed.append(segment)
+				covered_until = segment['end']
+			if covered_until >= end:
+				break
+
+		if covered_until is None or covered_until < end:
+			return None
+
+		frames = []
+		for segment in needed:
+			segment['last_used'] = pd.Timestamp.now().value
+			self.index_changed()
+			try:
+				frames.append(self.read_segment(segment['file'], start, end))
+			except IOError:
+				#Evicted by another process sharing the cache
+				return None
+
+		if len(frames) == 1:
+			return frames[0]
+
+		df = pd.concat(frames)
+		df = df.reset_index().drop_duplicates(subset=['symbol', 'timestamp']).sort_values(['symbol', 'timestamp'], kind='stable').set_index('timestamp')
+		return df
+
+
+
+	"""
+	Stores the bars returned for a request, merged with the segments of the same series whose ranges overlap or are next to the request's, as one
+	segment, and evicts old segments if the cache has grown beyond max_bytes. Where the request and a merged segment both hold a bar, the request's
+	is kept.
+	Parameters:
+		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+		time_frame (TimeFrame):
+		start_dt (String): Isoformat start of the range.
+		end_dt (String): Isoformat end of the range.
+		adjustment (String): Adjustment passed to get_bars().
+		df (pandas.DataFrame): Dataframe returned by get_bars().
+	"""
+	def put(self, assets, time_frame, start_dt, end_dt, adjustment, df):
+		series = self.series_key(assets, time_frame, adjustment)
+		start = pd.Timestamp(start_dt).value
+		end = pd.Timestamp(end_dt).value
+
+		merged = [segment for segment in self.segments if segment['series'] == series and segment['start'] <= next_minute(end) and start <= next_minute(segment['end'])]
+		frames = []
+		for segment in merged:
+			try:
+				frames.append(self.read_segment(segment['file'], segment['start'], segment['end']))
+			except IOError:
+				#Evicted by another process sharing the cache. Every merged segment touches the request's range, so the others still make one range
+				continue
+			start = min(start, segment['start'])
+			end = max(end, segment['end'])
+		if len(frames) > 0:
+			if len(df.index) > 0:
+				frames.append(df[COLUMNS + ['symbol']])
+			df = pd.concat(frames)
+			df = df.reset_index().drop_duplicates(subset=['symbol', 'timestamp'], keep='last').sort_values(['symbol', 'timestamp'], kind='stable').set_index('timestamp')
+
+		filename = hashlib.sha1((series + str(start) + str(end)).encode()).hexdigest() + '.npz'
+		try:
+			nbytes = self.write_segment(filename, df)
+		except IOError:
+			print("Could not write "+str(filename)+" to bar cache")
+			return
+
+		for segment in merged:
+			path = os.path.join(self.directory, segment['file'])
+			if segment['file'] != filename and os.path.exists(path):
+				os.remove(path)
+		merged_files = set(segment['file'] for segment in merged)
+		self.segments = [segment for segment in self.segments if segment['file'] != filename and segment['file'] not in merged_files]
+		self.segments.append({'file':filename, 'series':series, 'start':start, 'end':end, 'nbytes':nbytes, 'last_used':pd.Timestamp.now().value})
+		self.evict()
+		self.index_changed()
+
+
+
+	"""
+	Removes least recently used segments till the cache fits within max_bytes.
+	"""
+	def evict(self):
+		total_bytes = sum(segment['nbytes'] for segment in self.segments)
+		if total_bytes <= self.max_bytes:
+			return
+
+		self.segments.sort(key=lambda segment: segment['last_used'])
+		while total_bytes > self.max_bytes and len(self.segments) > 1:
+			segment = self.segments.pop(0)
+			total_bytes -= segment['nbytes']
+			path = os.path.join(self.directory, segment['file'])
+			if os.path.exists(path):
+				os.remove(path)
+
+
+
+	def write_segment(self, filename, df):
+		df_indexed = df.reset_index()
+		arrays = {}
+		if len(df_indexed.index) > 0:
+			arrays['timestamp'] = pd.to_datetime(df_indexed['timestamp'], utc=True).to_numpy(dtype='datetime64[ns]').view(np.int64)
+			arrays['symbol'] = df_indexed['symbol'].to_numpy(dtype=str)
+			for col_name in COLUMNS:
+				arrays[col_name] = df_indexed[col_name].to_numpy(dtype=np.float64)
+		else:
+			arrays['timestamp'] = np.empty(0, dtype=np.int64)
+			arrays['symbol'] = np.empty(0, dtype=str)
+			for col_name in COLUMNS:
+				arrays[col_name] = np.empty(0, dtype=np.float64)
+
+		path = os.path.join(self.directory, filename)
+		tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+		with open(tmp_path, 'wb') as f_object:
+			np.savez(f_object, **arrays)
+		os.replace(tmp_path, path)
+
+		return os.path.getsize(path)
+
+
+
+	def read_segment(self, filename, start, end):
+		with np.load(os.path.join(self.directory, filename)) as segment:
+			timestamps = segment['timestamp']
+			in_range = (timestamps >= start) & (timestamps <= end)
+
+			df = pd.DataFrame({col_name: segment[col_name][in_range] for col_name in COLUMNS})
+			df['symbol'] = segment['symbol'][in_range]
+			df.index = pd.to_datetime(timestamps[in_range], utc=True)
+
+		df.index.name = 'timestamp'
+		return df
@@ -0,0 +1,93 @@
+import numpy as np
+import barblock
+import timeframes
+
+
+
+class CandleAggregator:
+
+
+
+	"""
+	Grows the candlesticks of any number of minute timeframes out of the 1 minute candlesticks, for all securities in play at once.
+	The forming candlesticks are held in a float64 array of shape (field, timeframe, security), laid out like a BarBlock, so a single update
+	with numpy.maximum, numpy.minimum and sums takes in a 1 minute candlestick for every timeframe and security.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		intervals ([Int]): Number of minutes spanned by the candlesticks of each timeframe, eg [5, 15].
+	"""
+	def __init__(self, num_assets, intervals):
+		self.intervals = list(intervals)
+		self.data = np.full((len(barblock.FIELDS), len(self.intervals), num_assets), np.nan)
+		#Sum of vwap times volume of the 1 minute candlesticks taken in so far, from which vwap is weighted
+		self.vwap_volume = np.zeros((len(self.intervals), num_assets))
+		#Whether the forming candlestick of each timeframe has been grown from its first minute
+		self.started = np.zeros(len(self.intervals), dtype=bool)
+
+
+
+	"""
+	Takes in the 1 minute candlestick of the current minute.
+	On the first minute of a candlestick, the candlestick starts afresh from the 1 minute candlestick. Otherwise, close becomes the most recent close,
+	open stays the first minute's open, high and low extend to take in the new high and low, volume is summed and vwap is weighted by volume.
+	Parameters:
+		curr_date (pandas.Timestamp): Current minute.
+		_1min_bar (BarBlock): Its last candlestick is the current 1 minute candlestick of all securities in play.
+	"""
+	def update(self, curr_date, _1min_bar):
+		bar = _1min_bar.data[:, -1]
+		first_minute = timeframes.minutes_since_epoch(curr_date) % np.array(self.intervals) == 1
+		#A candlestick which has not been grown from its first minute (eg at the start of the simulation), starts from the current minute
+		fresh = (first_minute | ~self.started)[:, np.newaxis]
+		self.started |= first_minute
+
+		closes, opens, highs, lows, volumes, vwaps = self.data
+		curr_close, curr_open, curr_hi, curr_lo, curr_vol, curr_vwap = bar
+
+		curr_vwap_volume = np.nan_to_num(curr_vwap * curr_vol)
+		self.vwap_volume = np.where(fresh, curr_vwap_volume, self.vwap_volume + curr_vwap_volume)
+		volume = np.where(fresh, curr_vol, volumes + curr_vol)
+
+		self.data[0] = curr_close
+		self.data[1] = np.where(fresh, curr_open, opens)
+		self.data[2] = np.where(fresh, curr_hi, np.maximum(curr_hi, highs))
+		self.data[3] = np.where(fresh, curr_lo, np.minimum(curr_lo, lows))
+		self.data[4] = volume
+		#Candlesticks without any volume keep the vwap of their last minute
+		self.data[5] = np.divide(self.vwap_volume, volume, out=np.broadcast_to(curr_vwap, volume.shape).copy(), where=volume > 0)
+
+
+
+	"""
+	Drops the forming candlesticks, eg at the start of a new trading session, so none is grown across the overnight gap.
+	"""
+	def reset(self):
+		self.data[:] = np.nan
+		self.vwap_volume[:] = 0
+		self.started[:] = False
+
+
+
+	"""
+	Determines whether the forming candlestick of a timeframe has been grown from its first minute.
+	Parameters:
+		interval (Int): Number of minutes spanned by the candlesticks of the timeframe.
+	Returns:
+		(Boolean)
+	"""
+	def is_started(self, interval):
+		return bool(self.started[self.intervals.index(interval)])
+
+
+
+	"""
+	Returns the forming candlestick of a timeframe as of the current minute.
+	Parameters:
+		interval (Int): Number of minutes spanned by the candlesticks of the timeframe.
+		curr_date (pandas.Timestamp): Current minute.
+	Returns:
+		(BarBlock): A single candlestick holding the ohlcv of all the securities in play.
+	"""
+	def bar(self, interval, curr_date):
+		i = self.intervals.index(interval)
+		return barblock.BarBlock(np.array([curr_date.value], dtype=np.int64), self.data[:, i:i+1].copy())
@@ -0,0 +1,270 @@
+import os
+import os.path
+import json
+import pickle
+import hashlib
+import barblock
+import filewriter
+
+
+PLOT_SERIES = ['time_list', 'price_list', 'ema12_list', 'ohlc']
+
+
+
+class Checkpointer:
+
+
+
+	"""
+	Periodically snapshots the state of a simulation run, so that a run which dies midway can be resumed from its latest snapshot rather than
+	from trigger_time. A snapshot holds the fallback ohlcv in Backtrader, the state of Strategy and Indicators, the bar buffers of Data, and the tail
+	of each data file so the files can be cut back to where they stood at the time of the snapshot. The plot series grow for as long as the run
+	goes on, so rather than being pickled whole into every snapshot, only the points added since the previous snapshot are appended to a journal
+	kept next to the snapshot file.
+	Parameters:
+		directory (String): Folder in which snapshots are stored, one file per run.
+		every (Int): Number of simulated minutes between snapshots.
+	"""
+	def __init__(self, directory='data_files/checkpoints', every=30):
+		self.directory = directory
+		self.every = every
+		self.minutes_since_save = 0
+		#Number of points of each plot series already in the plot journal of the run. None until the journal is started (or restored).
+		self.plot_lengths = None
+
+		os.makedirs(directory, exist_ok=True)
+
+
+
+	"""
+	Name of the snapshot file of a run. A run is identified by its securities, start, end and rows_limit.
+	Parameters:
+		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+		start_trading_day (pandas.Timestamp):
+		end_trading_day (pandas.Timestamp):
+		limit (Int): Number of candlesticks kept.
+	Returns:
+		(String)
+	"""
+	def checkpoint_file(self, assets, start_trading_day, end_trading_day, limit):
+		key = hashlib.sha1(json.dumps([list(assets), start_trading_day.isoformat(), end_trading_day.isoformat(), limit]).encode()).hexdigest()
+		return os.path.join(self.directory, key + '.ckpt')
+
+
+
+	"""
+	Determines whether a snapshot should be taken after the current minute.
+	Returns:
+		(Boolean)
+	"""
+	def is_due(self):
+		self.minutes_since_save += 1
+		return self.minutes_since_save >= self.every
+
+
+
+	"""
+	Snapshots the state of the run as of the end of curr_date.
+	Parameters:
+		filename (String): Snapshot file of the run.
+		backtrader (Backtrader): Instance of backtrader class.
+		strategy (Strategy): Instance of strategy class.
+		curr_date (pandas.Timestamp): Last minute executed.
+		kwargs
+	"""
+	def save(self, filename, backtrader, strategy, curr_date, kwargs):
+		dt = kwargs['dt']
+		#Rows still queued for the background writer must reach the files before their tails are read
+		dt.flush()
+
+		files = {}
+		for name in dt.buffers:
+			paths = dt.data_files(name) if dt.csv_sink else []
+			if dt.bar_file_sink:
+				paths.append(dt.bar_file(name))
+			for path in paths:
+				files[path] = self.read_tail(path, dt.bar_files.get(name) if path.endswith('.bars') else None)
+
+		tmp_file = filename + '.tmp'
+		try:
+			plot_journal_offset = self.append_plot_journal(filename, kwargs['plt'])
+
+			state = {
+				'curr_date':curr_date,
+				'assets_ohlc':backtrader.assets_ohlc,
+				'strategy':{key: value for key, value in vars(strategy).items() if key != 'bars' and not isinstance(value, barblock.BarBlock)},
+				'indicators':vars(kwargs['ind']),
+				'plot_lengths':self.plot_lengths,
+				'plot_journal_offset':plot_journal_offset,
+				'buffers':dt.buffers,
+				'files':files
+			}
+
+			with open(tmp_file, 'wb') as f_object:
+				pickle.dump(state, f_object, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(tmp_file, filename)
+		except IOError:
+			print("Could not write checkpoint "+str(filename))
+
+		self.minutes_since_save = 0
+
+
+
+	"""
+	Appends the points added to the plot series since the previous snapshot to the plot journal of a run, starting the journal afresh on the first
+	snapshot of a run which was not resumed.
+	Parameters:
+		filename (String): Snapshot file of the run.
+		plt (Plot): Instance of Plot class.
+	Returns:
+		(Int): Size of the journal once the points are appended, ie the part of it the snapshot is made of.
+	"""
+	def append_plot_journal(self, filename, plt):
+		mode = 'ab'
+		if self.plot_lengths is None:
+			mode = 'wb'
+			self.plot_lengths = {key: [[0 for series in asset_series] for asset_series in getattr(plt, key)] for key in PLOT_SERIES}
+
+		points = {}
+		for key in PLOT_SERIES:
+			points[key] = [[series[self.plot_lengths[key][i][j]:] for j, series in enumerate(asset_series)] for i, asset_series in enumerate(getattr(plt, key))]
+
+		with open(filename + '.plot', mode) as f_object:
+			pickle.dump(points, f_object, protocol=pickle.HIGHEST_PROTOCOL)
+			offset = f_object.tell()
+
+		self.plot_lengths = {key: [[len(series) for series in asset_series] for asset_series in getattr(plt, key)] for key in PLOT_SERIES}
+		return offset
+
+
+
+	"""
+	Rebuilds the plot series of a run from its plot journal, up to the size the journal had when the snapshot was taken. Anything appended after
+	that (by a snapshot which was never completed) is cut off.
+	Parameters:
+		filename (String): Snapshot file of the run.
+		offset (Int): Size of the journal when the snapshot was taken.
+		plt (Plot): Instance of Plot class. Its plot series are replaced.
+	"""
+	def restore_plot_journal(self, filename, offset, plt):
+		plot = {key: [[[] for series in asset_series] for asset_series in getattr(plt, key)] for key in PLOT_SERIES}
+
+		with open(filename + '.plot', 'r+b') as f_object:
+			f_object.truncate(offset)
+			while f_object.tell() < offset:
+				points = pickle.load(f_object)
+				for key in PLOT_SERIES:
+					for i, asset_points in enumerate(points[key]):
+						for j, series_points in enumerate(asset_points):
+							plot[key][i][j].extend(series_points)
+
+		for key, value in plot.items():
+			setattr(plt, key, value)
+
+
+
+	"""
+	Reads the last row (or record, for bar files) of a file along with the offset at which it starts.
+	Parameters:
+		filename (String): Name of file.
+		bar_file (BarFile): Open bar file if filename is one, else None.
+	Returns:
+		(Int, bytes): None if the file does not exist.
+	"""
+	def read_tail(self, filename, bar_file):
+		if not os.path.exists(filename):
+			return None
+
+		with open(filename, 'rb') as f_object:
+			if bar_file is not None:
+				end = f_object.seek(0, os.SEEK_END)
+				offset = max(bar_file.header_len, end - bar_file.dtype.itemsize)
+			else:
+				offset = filewriter.find_last_row_offset(f_object)
+			f_object.seek(offset)
+			return offset, f_object.read()
+
+
+
+	"""
+	Returns the last minute executed before the snapshot of a run was taken, without restoring anything.
+	Parameters:
+		filename (String): Snapshot file of the run.
+	Returns:
+		curr_date (pandas.Timestamp): None if there is no usable snapshot.
+	"""
+	def saved_date(self, filename):
+		if not os.path.exists(filename):
+			return None
+		try:
+			with open(filename, 'rb') as f_object:
+				return pickle.load(f_object)['curr_date']
+		except (IOError, pickle.UnpicklingError, EOFError):
+			return None
+
+
+
+	"""
+	Restores the state of a run from its snapshot, cutting the data files back to where they stood when the snapshot was taken.
+	Parameters:
+		filename (String): Snapshot file of the run.
+		backtrader (Backtrader): Instance of backtrader class.
+		strategy (Strategy): Instance of strategy class.
+		kwargs
+	Returns:
+		curr_date (pandas.Timestamp): Last minute executed before the snapshot, or None if there is no usable snapshot.
+	"""
+	def restore(self, filename, backtrader, strategy, kwargs):
+		if not os.path.exists(filename):
+			return None
+		try:
+			with open(filename, 'rb') as f_object:
+				state = pickle.load(f_object)
+			self.restore_plot_journal(filename, state['plot_journal_offset'], kwargs['plt'])
+		except (IOError, pickle.UnpicklingError, EOFError, KeyError):
+			print("Could not read checkpoint "+str(filename)+". Starting from trigger_time")
+			return None
+		self.plot_lengths = state['plot_lengths']
+
+		for path, tail in state['files'].items():
+			if tail is None or not os.path.exists(path):
+				continue
+			offset, data = tail
+			with open(path, 'r+b') as f_object:
+				f_object.truncate(offset)
+				f_object.seek(offset)
+				f_object.write(data)
+
+		backtrader.assets_ohlc = state['assets_ohlc']
+		vars(strategy).update(state['strategy'])
+		vars(kwargs['ind']).update(state['indicators'])
+
+		dt = kwargs['dt']
+		dt.buffers = state['buffers']
+		dt.last_row_offsets = {}
+		dt.tail_cache = {}
+		dt.bar_files = {}
+		if dt.bar_file_sink:
+			for name in dt.buffers:
+				dt.bar_files[name] = dt.open_bar_file(name)
+
+		#The strategy reads its bars straight from the buffers
+		for name in dt.buffers:
+			strategy.bars[name] = dt.get_bars(name)
+
+		self.minutes_since_save = 0
+
+		return state['curr_date']
+
+
+
+	"""
+	Deletes the snapshot of a run once it has completed.
+	Parameters:
+		filename (String): Snapshot file of the run.
+	"""
+	def discard(self, filename):
+		for path in [filename, filename + '.plot']:
+			if os.path.exists(path):
+				os.remove(path)
+		self.plot_lengths = None
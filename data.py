@@ -1,14 +1,275 @@
 from csv import writer
 import os
 import os.path
+import numpy as np
+import barblock
+import barfile
+import filewriter
+
+
+
+class BarBuffer:
+
+
+
+	"""
+	Fixed size ring buffer holding the last capacity candlesticks of a timeframe for all securities in play.
+	Each candlestick is written twice, at its slot and at its slot plus capacity, so the candlesticks currently held always sit in one contiguous
+	window of storage and can be handed out as a BarBlock view without copying.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		capacity (Int): Number of candlesticks kept, ie rows_limit.
+	"""
+	def __init__(self, num_assets, capacity):
+		self.capacity = capacity
+		self.times = np.zeros(2*capacity, dtype=np.int64)
+		self.data = np.full((len(barblock.FIELDS), 2*capacity, num_assets), np.nan)
+		self.start = 0
+		self.count = 0
+
+
+
+	def __len__(self):
+		return self.count
+
+
+
+	def write(self, slot, bars):
+		bars = bars.tail(1)
+		for pos in (slot, slot + self.capacity):
+			self.times[pos] = bars.times[0]
+			self.data[:, pos] = bars.data[:, 0]
+
+
+
+	"""
+	Adds the last candlestick of bars, pushing out the oldest one once the buffer is full.
+	Parameters:
+		bars (BarBlock):
+	"""
+	def append(self, bars):
+		if self.count < self.capacity:
+			slot = (self.start + self.count) % self.capacity
+			self.count += 1
+		else:
+			slot = self.start
+			self.start = (self.start + 1) % self.capacity
+		self.write(slot, bars)
+
+
+
+	"""
+	Adds each candlestick of bars, oldest first.
+	Parameters:
+		bars (BarBlock):
+	"""
+	def extend(self, bars):
+		for i in range(0, len(bars)):
+			self.append(barblock.BarBlock(bars.times[i:i+1], bars.data[:, i:i+1]))
+
+
+
+	"""
+	Overwrites the newest candlestick with the last candlestick of bars. Used while a candlestick is still forming.
+	Parameters:
+		bars (BarBlock):
+	"""
+	def replace_last(self, bars):
+		if self.count == 0:
+			self.append(bars)
+			return
+		self.write((self.start + self.count - 1) % self.capacity, bars)
+
+
+
+	"""
+	Returns the candlesticks held, oldest first. The block is a view into the buffer, so it reflects later appends and replacements.
+	Returns:
+		(BarBlock)
+	"""
+	def view(self):
+		return barblock.BarBlock(self.times[self.start:self.start+self.count], self.data[:, self.start:self.start+self.count])
+
 
 
 class Data:
 	
 
 
-	def __init__(self, num_assets):
-		pass
+	"""
+	Keeps the last rows_limit candlesticks of each timeframe in an in memory BarBuffer, keyed by the timeframe's name (eg "1min").
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		csv_sink (Boolean): If True, every candlestick is also persisted to the per field .cvs files in directory.
+		bar_file_sink (Boolean): If True, every candlestick is also persisted to a binary bar file (see barfile.py) per timeframe in directory.
+		async_writes (Boolean): If True, the .cvs files are written by a background thread (see filewriter.py) rather than by the simulation itself.
+		directory (String): Folder in which the files are written.
+	"""
+	def __init__(self, num_assets, csv_sink=True, bar_file_sink=False, async_writes=True, directory='data_files'):
+		self.num_assets = num_assets
+		self.directory = directory
+		self.csv_sink = csv_sink
+		self.bar_file_sink = bar_file_sink
+		self.buffers = {}
+		self.bar_files = {}
+		#Byte offset at which the last row of each data file starts
+		self.last_row_offsets = {}
+		#Rows last read from the tail of each data file, see get_rows_from_file()
+		self.tail_cache = {}
+		self.writer = filewriter.BackgroundWriter() if async_writes else None
+
+
+
+	"""
+	Blocks until every row handed to the background writer has been written to disk.
+	"""
+	def flush(self):
+		if self.writer is not None:
+			self.writer.flush()
+
+
+
+	"""
+	Writes out any rows still queued and closes the data files. To be called once the simulation is over.
+	"""
+	def close(self):
+		if self.writer is not None:
+			self.writer.close()
+			self.writer = None
+
+
+
+	"""
+	Names of the open, high, low, close and volume files of a timeframe.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min".
+	Returns:
+		([String])
+	"""
+	def data_files(self, name):
+		return [os.path.join(self.directory, '_'+name+'_'+field+'.cvs') for field in ['open', 'high', 'low', 'close', 'volume']]
+
+
+
+	"""
+	Name of the binary bar file of a timeframe.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min".
+	Returns:
+		(String)
+	"""
+	def bar_file(self, name):
+		return os.path.join(self.directory, '_'+name+'.bars')
+
+
+
+	"""
+	Sets up the buffer of a timeframe holding the candlesticks supplied, and re-creates its files if csv_sink is on.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min".
+		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+		limit (Int): Number of candlesticks kept.
+		bars (BarBlock): Candlesticks of the warm-up period.
+	"""
+	def create_buffer(self, name, assets, limit, bars):
+		self.buffers[name] = BarBuffer(len(assets), limit)
+		self.buffers[name].extend(bars)
+
+		if self.csv_sink:
+			self.create_data_files(assets, limit, bars, *self.data_files(name))
+
+		if self.bar_file_sink:
+			self.bar_files[name] = barfile.create(self.bar_file(name), assets, name)
+			self.bar_files[name].append(bars.tail(limit))
+
+
+
+	"""
+	Carries the buffer of a timeframe over into a new trading session: the candlesticks of bars newer than the newest one held (eg those formed
+	overnight) are added to it, and to the data files, one at a time.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min".
+		bars (BarBlock): Candlesticks leading up to the start of the new session.
+	"""
+	def carry_over_buffer(self, name, bars):
+		newest = self.buffers[name].view().times[-1]
+		for i in range(0, len(bars)):
+			if bars.times[i] > newest:
+				self.add_bar(name, barblock.BarBlock(bars.times[i:i+1], bars.data[:, i:i+1]))
+
+
+
+	"""
+	Adds the last candlestick of bars to the buffer of a timeframe.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min".
+		bars (BarBlock):
+	"""
+	def add_bar(self, name, bars):
+		self.buffers[name].append(bars)
+
+		if self.csv_sink:
+			self.add_row_to_data_files(bars, *self.data_files(name))
+
+		if self.bar_file_sink:
+			self.bar_files[name].append(bars.tail(1))
+
+
+
+	"""
+	Replaces the newest candlestick in the buffer of a timeframe with the last candlestick of bars.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min".
+		bars (BarBlock):
+	"""
+	def replace_last_bar(self, name, bars):
+		self.buffers[name].replace_last(bars)
+
+		if self.csv_sink:
+			self.replace_last_row_in_data_files(bars, *self.data_files(name))
+
+		if self.bar_file_sink:
+			self.bar_files[name].replace_last(bars)
+
+
+
+	"""
+	Returns the last rows_limit candlesticks of a timeframe.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min".
+	Returns:
+		(BarBlock): A view into the buffer.
+	"""
+	def get_bars(self, name):
+		return self.buffers[name].view()
+
+
+
+	"""
+	Retrieves the last n candlesticks of a timeframe from its binary bar file, where n is represented by limit. Unlike get_rows_from_files(),
+	nothing is parsed: the candlesticks returned are slices of the memory mapped file.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min".
+		limit (Int): Number of candlesticks.
+	Returns:
+		(BarBlock)
+	"""
+	def get_rows_from_bar_file(self, name, limit):
+		if name not in self.bar_files:
+			self.bar_files[name] = barfile.BarFile(self.bar_file(name), 'r')
+		return self.bar_files[name].tail(limit)
+
+
+
+	"""
+	Opens the existing bar file of a timeframe for writing, eg when resuming a run.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min".
+	Returns:
+		(BarFile)
+	"""
+	def open_bar_file(self, name):
+		return barfile.BarFile(self.bar_file(name))
 
 
 
@@ -37,6 +298,14 @@ class Data:
 		volume_file (String): Holds volume prices for Each security in play for each timeslot at a specified timeframe, throughout the duration of simulation.
 	"""	
 	def delete_files(self, open_file, high_file, low_file, close_file, volume_file):
+		for filename in [open_file, high_file, low_file, close_file, volume_file]:
+			self.last_row_offsets.pop(filename, None)
+			self.tail_cache.pop(filename, None)
+			if self.writer is not None:
+				self.writer.delete_file(filename)
+		if self.writer is not None:
+			return
+
 		if os.path.exists(open_file):
 			os.remove(open_file)
 		if os.path.exists(high_file):
@@ -67,6 +336,17 @@ class Data:
 			fields.append(assets[i])
 
 
+		rows = []
+		for i in range(0, limit):
+			list_data=[times[i]]
+			for j in range(0, len(datas[i])):
+				list_data.append(datas[i][j])
+			rows.append(list_data)
+
+		if self.writer is not None:
+			self.writer.append_rows(filename, rows, fields)
+			return
+
 		file_created = False
 		trial = 0
 		while((not file_created) and trial < 3):		
@@ -77,22 +357,16 @@ class Data:
 					if not file_exists:
 						writer_object.writerow(fields) 			
 
-				for i in range(0, limit):
-
-					list_data=[times[i]]
-					for j in range(0, len(datas[i])):
-						list_data.append(datas[i][j])
-	
-					with open(filename, 'a', newline='') as f_object:  #For the CSV file, create a file object 
-						writer_object = writer(f_object) #Pass the CSV  file object to the writer() function
-						writer_object.writerow(list_data) #Result - a writer object # Pass the data in the list as an argument into the writerow() function
-						f_object.close() #Close the file object	
+					for i in range(0, len(rows)):
+						self.last_row_offsets[filename] = f_object.tell()
+						writer_object.writerow(rows[i]) #Pass the data in the list as an argument into the writerow() function
 
 				file_created = True
 
 			except:# IOError:
 				print("Could not create "+str(filename))
-				file_created = False			
+				file_created = False
+				trial += 1
 
 
 
@@ -103,18 +377,21 @@ class Data:
 		datas ([[Float]]): List of either opens, highs, lows, closes or volumes for all securites in play and all alloted time slots.	
 	"""
 	def add_row_to_data_file(self, filename, times, datas):
-		file_exists = os.path.isfile(filename)
-
 		list_data=[times[-1]]
 		for j in range(0, len(datas[-1])):
 			list_data.append(datas[-1][j])
 
+		if self.writer is not None:
+			self.writer.append_rows(filename, [list_data])
+			return
+
 		row_added = False
 		trial = 0
 		while((not row_added) and trial < 3):		
 			try:
 
 				with open(filename, 'a', newline='') as f_object:  #For the CSV file, create a file object 
+					self.last_row_offsets[filename] = f_object.tell()
 					writer_object = writer(f_object) # Pass the CSV  file object to the writer() function
 					writer_object.writerow(list_data)      # Result - a writer object # Pass the data in the list as an argument into the writerow() function
 					f_object.close() # Close the file object
@@ -124,54 +401,161 @@ class Data:
 			except:# IOError:
 				print("Could not add row to "+str(filename))
 				row_added = False
+				trial += 1
 
 
 
 	"""
-	Deletes a row from specified file name.
+	Finds where the last row of a file starts by reading backwards from the end of the file in blocks, so only the last row is read however long the file is.
+	Parameters:
+		filename (String): Name of the file.
+	Returns:
+		(Int): Byte offset of the start of the last row.
+	"""
+	def find_last_row_offset(self, filename):
+		with open(filename, 'rb') as f_object:
+			return filewriter.find_last_row_offset(f_object)
+
+
+
+	"""
+	Deletes the last row from specified file name, by truncating the file at the start of that row.
 	Parameters:
 		filename (String): Name of the file.
 	"""
 	def delete_last_row_from_data_file(self, filename):
+		if self.writer is not None:
+			self.writer.delete_last_row(filename)
+			return
 
 		row_deleted = False
 		trial = 0
 		while((not row_deleted) and trial < 3):		
 			try:
 
-				f = open(filename, "r+")
-				lines = f.readlines()
-				lines.pop()
-				f = open(filename, "w+")
-				f.writelines(lines)	
+				offset = self.last_row_offsets.pop(filename, None)
+				if offset is None:
+					offset = self.find_last_row_offset(filename)
+
+				with open(filename, 'r+b') as f_object:
+					f_object.truncate(offset)
 
 				row_deleted = True
 
 			except:# IOError:
 				print("Could not delete frow from "+str(filename))
 				row_deleted = False
+				trial += 1
 
 
 
+	"""
+	Replaces the last row of a file with the row representing the last time slot of datas. Only the last row is touched, so the cost
+	does not grow with the length of the file.
+	Parameters:
+		filename ("String"): Name of file.
+		times ([pandas.Timestamp]): List of the time slots as dictated by limit.
+		datas ([[Float]]): List of either opens, highs, lows, closes or volumes for all securites in play and all alloted time slots.	
+	"""
+	def replace_last_row_in_data_file(self, filename, times, datas):
 
-	def create_data_files(self, assets, limit, times, opens, highs, lows, closes, volumes, open_file, high_file, low_file, close_file, volume_file):
+		list_data=[times[-1]]
+		for j in range(0, len(datas[-1])):
+			list_data.append(datas[-1][j])
+
+		if self.writer is not None:
+			self.writer.replace_last_row(filename, list_data)
+			return
+
+		row_replaced = False
+		trial = 0
+		while((not row_replaced) and trial < 3):		
+			try:
+
+				offset = self.last_row_offsets.get(filename)
+				if offset is None:
+					offset = self.find_last_row_offset(filename)
+
+				with open(filename, 'r+', newline='') as f_object:
+					f_object.seek(offset)
+					f_object.truncate()
+					writer_object = writer(f_object)
+					writer_object.writerow(list_data)
+
+				self.last_row_offsets[filename] = offset
+				row_replaced = True
+
+			except:# IOError:
+				print("Could not replace last row of "+str(filename))
+				row_replaced = False
+				trial += 1
+
+
+
+	"""
+	Re-creates the open, high, low, close and volume files of a timeframe, holding the candlesticks supplied.
+	Parameters:
+		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+		limit (Int): Number of candlesticks specified.
+		bars (BarBlock): Candlesticks to be written.
+		open_file (String):
+		high_file (String):
+		low_file (String):
+		close_file (String):
+		volume_file (String):
+	"""
+	def create_data_files(self, assets, limit, bars, open_file, high_file, low_file, close_file, volume_file):
 		#Delete files 
 		self.delete_files(open_file, high_file, low_file, close_file, volume_file)
 		#Re-create the files
-		self.create_data_file(open_file, assets, times, opens, limit)
-		self.create_data_file(high_file, assets, times, highs, limit)
-		self.create_data_file(low_file, assets, times, lows, limit)
-		self.create_data_file(close_file, assets, times, closes, limit)
-		self.create_data_file(volume_file, assets, times, volumes, limit)
+		times = bars.timelist
+		self.create_data_file(open_file, assets, times, bars.opens, limit)
+		self.create_data_file(high_file, assets, times, bars.highs, limit)
+		self.create_data_file(low_file, assets, times, bars.lows, limit)
+		self.create_data_file(close_file, assets, times, bars.closes, limit)
+		self.create_data_file(volume_file, assets, times, bars.volumes, limit)
 
-			
 
-	def add_row_to_data_files(self, times, opens, highs, lows, closes, volumes, open_file, high_file, low_file, close_file, volume_file):
-		self.add_row_to_data_file(open_file, times, opens)
-		self.add_row_to_data_file(high_file, times, highs)
-		self.add_row_to_data_file(low_file, times, lows)
-		self.add_row_to_data_file(close_file, times, closes)
-		self.add_row_to_data_file(volume_file, times, volumes)		
+
+	"""
+	Adds the last candlestick of bars to the open, high, low, close and volume files of a timeframe.
+	Parameters:
+		bars (BarBlock):
+		open_file (String):
+		high_file (String):
+		low_file (String):
+		close_file (String):
+		volume_file (String):
+	"""
+	def add_row_to_data_files(self, bars, open_file, high_file, low_file, close_file, volume_file):
+		bars = bars.tail(1)
+		times = bars.timelist
+		self.add_row_to_data_file(open_file, times, bars.opens)
+		self.add_row_to_data_file(high_file, times, bars.highs)
+		self.add_row_to_data_file(low_file, times, bars.lows)
+		self.add_row_to_data_file(close_file, times, bars.closes)
+		self.add_row_to_data_file(volume_file, times, bars.volumes)		
+
+
+
+	"""
+	Replaces the last row of the open, high, low, close and volume files of a timeframe with the last candlestick of bars.
+	Parameters:
+		bars (BarBlock):
+		open_file (String):
+		high_file (String):
+		low_file (String):
+		close_file (String):
+		volume_file (String):
+	"""
+	def replace_last_row_in_data_files(self, bars, open_file, high_file, low_file, close_file, volume_file):
+		bars = bars.tail(1)
+		times = bars.timelist
+		self.replace_last_row_in_data_file(open_file, times, bars.opens)
+		self.replace_last_row_in_data_file(high_file, times, bars.highs)
+		self.replace_last_row_in_data_file(low_file, times, bars.lows)
+		self.replace_last_row_in_data_file(close_file, times, bars.closes)
+		self.replace_last_row_in_data_file(volume_file, times, bars.volumes)
 
 
 
@@ -184,62 +568,120 @@ class Data:
 
 
 
+	"""
+	Splits a block of a data file into rows, skipping the header and any incomplete row at the end of the block.
+	Parameters:
+		block (bytes): Part of the file, starting at the beginning of a row.
+		block_start (Int): Byte offset of the block within the file.
+	Returns:
+		offsets ([Int]): Byte offset of each row.
+		time_arr ([String]): Time of each row.
+		rows_arr ([[Float]]): Prices or volumes of each row.
+	"""
+	def parse_rows(self, block, block_start):
+		offsets = []
+		time_arr = []
+		rows_arr = []
+
+		offset = block_start
+		for line in block.split(b'\n')[:-1]:
+			if offset > 0 or not line.startswith(b'timeframe'):
+				row = line.decode().strip().split(',')
+				offsets.append(offset)
+				time_arr.append(row[0])
+				rows_arr.append([float(x) for x in row[1:]])
+			offset += len(line) + 1
+
+		return offsets, time_arr, rows_arr
+
+
+
 	"""
 	Retrieves last n rows from file where n is represented by limit.  Each row represents a timeslot for all securities in play, for the timeframe
 	specified in the filename.
+	Rather than reading the whole file, the file is read backwards from its end in blocks until it holds limit rows. The rows parsed are cached, and as
+	rows are only ever appended to a data file or have its last row replaced, the next call only parses the rows from the last cached one onwards.
 	Parameters:
 		filename ("String"): Name of file.
-		time_rows ([pandas.TimeStamp]):
-		data_rows ([[Float]]): List of lists. Each nested list being a row obtained from the file specified, holding either opens, highs, lows, closes, volumes
-		                       of all securities in question for a given minute.
+		limit (Int): Number of rows.
+	Returns:
+		time_arr ([String]): Time of each row. None if the file could not be read.
+		rows_arr ([[Float]]): List of lists. Each nested list being a row obtained from the file specified, holding either opens, highs, lows, closes, volumes
+		                       of all securities in question for a given minute. None if the file could not be read.
 	"""
-	def get_rows_from_file(self, filename, time_rows, data_rows, limit):
+	def get_rows_from_file(self, filename, limit):
+		#Rows still queued for the background writer must reach the file first
+		self.flush()
 
 		row_read = False
 		trial = 0
 		while((not row_read) and trial < 3):		
 			try:
 
-				#Open the file and get all the lines in a list
-				with open(filename, 'r') as f_object:
-
-					#Read all lines
-					rows = f_object.readlines()
-    
-				#Remove the line feed code with strip ()
-				#Convert strings to arrays separated by commas with split ()
-				#Convert each element of the array from a string to a float type with map ()
-				#rows_arr = [list(map(float, row.strip().split(','))) for row in rows[-limit:]]
-				rows_arr = [list(row.strip().split(',')) for row in rows[-limit:]]
-
-				time_arr = []
-
-				for i in range(0, len(rows_arr)):
-					time_arr.append(rows_arr[i][0])
-					#Now remove time from array 
-					del rows_arr[i][0]
-
-				for i in range(0, len(rows_arr)):
-					#Convert the timeless array to float
-					rows_arr[i] = [float(x) for x in rows_arr[i]]
-
-				return time_arr, rows_arr
+				cache = self.tail_cache.get(filename)
+
+				with open(filename, 'rb') as f_object:
+					end = f_object.seek(0, os.SEEK_END)
+
+					if cache is not None and cache['limit'] >= limit and len(cache['offsets']) > 0 and cache['offsets'][-1] <= end:
+						#Re-parse the last cached row, since it may have been replaced, along with any rows appended after it
+						block_start = cache['offsets'][-1]
+						f_object.seek(block_start)
+						offsets, time_arr, rows_arr = self.parse_rows(f_object.read(end - block_start), block_start)
+						offsets = cache['offsets'][:-1] + offsets
+						time_arr = cache['time_arr'][:-1] + time_arr
+						rows_arr = cache['rows_arr'][:-1] + rows_arr
+					else:
+						block = b''
+						block_start = end
+						#One line feed more than limit, as the first line of the block may be incomplete
+						while block_start > 0 and block.count(b'\n') <= limit:
+							step = min(4096, block_start)
+							block_start -= step
+							f_object.seek(block_start)
+							block = f_object.read(step) + block
+						if block_start > 0:
+							first_row = block.index(b'\n') + 1
+							block = block[first_row:]
+							block_start += first_row
+						offsets, time_arr, rows_arr = self.parse_rows(block, block_start)
+
+				cache_limit = limit if cache is None else max(limit, cache['limit'])
+				self.tail_cache[filename] = {'limit':cache_limit, 'offsets':offsets[-cache_limit:], 'time_arr':time_arr[-cache_limit:], 'rows_arr':rows_arr[-cache_limit:]}
+
+				return time_arr[-limit:], rows_arr[-limit:]
 
 			except:# IOError:
 				print("Could not get row frow from "+str(filename))
+				self.tail_cache.pop(filename, None)
 				row_read = False
+				trial += 1
 
-		return time_rows, data_rows #In case all trials fail	
-
+		return None, None #In case all trials fail	
 
 
-	def get_rows_from_files(self, open_file, high_file, low_file, close_file, volume_file, time_rows, open_rows, high_rows, low_rows, close_rows, volume_rows, limit):
-		time_arr, open_arr = self.get_rows_from_file(open_file, time_rows, open_rows, limit)
-		time_arr, high_arr = self.get_rows_from_file(high_file, time_rows, high_rows, limit)
-		time_arr, low_arr = self.get_rows_from_file(low_file, time_rows, low_rows, limit)
-		time_arr, close_arr = self.get_rows_from_file(close_file, time_rows, close_rows, limit)
-		time_arr, volume_arr = self.get_rows_from_file(volume_file, time_rows, volume_rows, limit)
 
-		return time_arr, open_arr, high_arr, low_arr, close_arr, volume_arr
+	"""
+	Retrieves the last n candlesticks of a timeframe from its open, high, low, close and volume files, where n is represented by limit.
+	Parameters:
+		open_file (String):
+		high_file (String):
+		low_file (String):
+		close_file (String):
+		volume_file (String):
+		bars (BarBlock): Returned instead, should any of the files fail to be read.
+		limit (Int): Number of candlesticks.
+	Returns:
+		(BarBlock)
+	"""
+	def get_rows_from_files(self, open_file, high_file, low_file, close_file, volume_file, bars, limit):
+		time_arr, open_arr = self.get_rows_from_file(open_file, limit)
+		time_arr, high_arr = self.get_rows_from_file(high_file, limit)
+		time_arr, low_arr = self.get_rows_from_file(low_file, limit)
+		time_arr, close_arr = self.get_rows_from_file(close_file, limit)
+		time_arr, volume_arr = self.get_rows_from_file(volume_file, limit)
 
+		if open_arr is None or high_arr is None or low_arr is None or close_arr is None or volume_arr is None:
+			return bars
 
+		return barblock.from_fields(time_arr, close_arr, open_arr, high_arr, low_arr, volume_arr)
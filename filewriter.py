@@ -0,0 +1,301 @@
+import os
+import io
+import time
+import queue
+import threading
+from csv import writer
+
+
+
+"""
+Finds where the last row of a file starts by reading backwards from the end of the file in blocks, so only the last row is read however long the file is.
+Parameters:
+	f_object (file): File opened in binary mode.
+Returns:
+	(Int): Byte offset of the start of the last row.
+"""
+def find_last_row_offset(f_object):
+	pos = f_object.seek(0, os.SEEK_END)
+	block = b''
+	while pos > 0:
+		step = min(4096, pos)
+		pos -= step
+		f_object.seek(pos)
+		block = f_object.read(step) + block
+		#Skip the line feed ending the last row itself
+		newline = block.rfind(b'\n', 0, len(block) - 1)
+		if newline >= 0:
+			return pos + newline + 1
+	return 0
+
+
+
+"""
+Formats rows the way csv.writer writes them to a file.
+Parameters:
+	rows ([[]]): Rows to be formatted.
+Returns:
+	(bytes)
+"""
+def to_csv(rows):
+	text = io.StringIO()
+	writer_object = writer(text)
+	writer_object.writerows(rows)
+	return text.getvalue().encode()
+
+
+
+class BackgroundWriter:
+
+
+
+	"""
+	Takes the writing of data files off the simulation's critical path. Calls only queue the operation; a background thread applies them in batches,
+	keeping each file open between batches and flushing to disk once flush_bytes have been written or flush_interval seconds have passed.
+	Each operation is attempted up to max_trials times before it is dropped. A failed attempt is rolled back before the next one, so a retried
+	append never writes its rows twice, and so is an operation which is dropped.
+	Parameters:
+		flush_bytes (Int): Number of bytes written after which files are flushed.
+		flush_interval (Float): Number of seconds after which files are flushed.
+		max_trials (Int): Number of attempts made at each operation.
+		flush_timeout (Float): Number of seconds flush() waits for the background thread before giving up.
+	"""
+	def __init__(self, flush_bytes=64*1024, flush_interval=1.0, max_trials=3, flush_timeout=60.0):
+		self.flush_bytes = flush_bytes
+		self.flush_interval = flush_interval
+		self.max_trials = max_trials
+		self.flush_timeout = flush_timeout
+
+		self.queue = queue.Queue()
+		self.files = {}
+		#Byte offset at which the last row of each file starts
+		self.last_row_offsets = {}
+		self.unflushed_bytes = 0
+		self.last_flush = time.monotonic()
+
+		self.thread = threading.Thread(target=self.work, daemon=True)
+		self.thread.start()
+
+
+
+	"""
+	Appends rows to a file, creating it if it does not exist.
+	Parameters:
+		filename (String): Name of file.
+		rows ([[]]): Rows to be appended.
+		header ([]): Row written ahead of rows if the file is empty or does not exist yet.
+	"""
+	def append_rows(self, filename, rows, header=None):
+		self.queue.put(('append', filename, (rows, header)))
+
+
+
+	"""
+	Replaces the last row of a file.
+	Parameters:
+		filename (String): Name of file.
+		row ([]): Row replacing the last one.
+	"""
+	def replace_last_row(self, filename, row):
+		self.queue.put(('replace', filename, row))
+
+
+
+	"""
+	Deletes the last row of a file.
+	Parameters:
+		filename (String): Name of file.
+	"""
+	def delete_last_row(self, filename):
+		self.queue.put(('delete_last', filename, None))
+
+
+
+	"""
+	Deletes a file.
+	Parameters:
+		filename (String): Name of file.
+	"""
+	def delete_file(self, filename):
+		self.queue.put(('delete', filename, None))
+
+
+
+	"""
+	Blocks until every operation queued so far has been applied and written to disk.
+	Raises RuntimeError if the background thread has died or does not get there within flush_timeout seconds.
+	"""
+	def flush(self):
+		done = threading.Event()
+		self.queue.put(('flush', None, done))
+		start = time.monotonic()
+		while not done.wait(min(1.0, self.flush_timeout)):
+			if not self.thread.is_alive():
+				raise RuntimeError("The background writer has stopped, so the data files could not be flushed")
+			if time.monotonic() - start >= self.flush_timeout:
+				raise RuntimeError("Timed out flushing the data files")
+
+
+
+	"""
+	Flushes, then stops the background thread and closes all files.
+	"""
+	def close(self):
+		if not self.thread.is_alive():
+			return
+		self.flush()
+		self.queue.put(('stop', None, None))
+		self.thread.join()
+
+
+
+	def work(self):
+		running = True
+		while running:
+			try:
+				operations = [self.queue.get(timeout=self.flush_interval)]
+			except queue.Empty:
+				operations = []
+
+			#Take everything queued up in the meantime, and apply it as a single batch
+			while True:
+				try:
+					operations.append(self.queue.get_nowait())
+				except queue.Empty:
+					break
+
+			for operation, filename, arg in operations:
+				if operation == 'flush':
+					try:
+						self.flush_files()
+					finally:
+						#Whatever happened, flush() must not wait forever
+						arg.set()
+				elif operation == 'stop':
+					running = False
+				else:
+					self.apply(operation, filename, arg)
+
+			if self.unflushed_bytes >= self.flush_bytes or time.monotonic() - self.last_flush >= self.flush_interval:
+				self.flush_files()
+
+		for f_object in self.files.values():
+			f_object.close()
+		self.files = {}
+
+
+
+	def apply(self, operation, filename, arg):
+		trial = 0
+		#Where the part of the file an append or replace rewrites starts, and what it held before, which a failed attempt is rolled back to
+		start = None
+		tail = b''
+		while trial < self.max_trials:
+			try:
+				if operation == 'append':
+					rows, header = arg
+					if start is None:
+						start = self.open_file(filename).seek(0, os.SEEK_END)
+					else:
+						self.roll_back(filename, start, tail)
+					if header is not None and start == 0:
+						rows = [header] + rows
+					self.write_rows(filename, rows)
+				elif operation == 'replace':
+					if start is None:
+						start = self.last_row_offset(filename)
+						f_object = self.open_file(filename)
+						f_object.seek(start)
+						tail = f_object.read()
+					self.open_file(filename).truncate(start)
+					self.write_rows(filename, [arg])
+				elif operation == 'delete_last':
+					self.truncate_last_row(filename)
+					self.last_row_offsets.pop(filename, None)
+				elif operation == 'delete':
+					self.close_file(filename)
+					if os.path.exists(filename):
+						os.remove(filename)
+				return
+
+			except Exception:
+				trial += 1
+				self.close_file(filename)
+
+		print("Could not "+operation+" rows of "+str(filename))
+		#Leave the file as it was rather than with part of the rows written
+		if start is not None:
+			try:
+				self.roll_back(filename, start, tail)
+			except Exception:
+				self.close_file(filename)
+
+
+
+	def roll_back(self, filename, start, tail):
+		f_object = self.open_file(filename)
+		f_object.truncate(start)
+		f_object.write(tail)
+		if len(tail) > 0:
+			self.last_row_offsets[filename] = start
+		else:
+			self.last_row_offsets.pop(filename, None)
+
+
+
+	def open_file(self, filename):
+		if filename not in self.files:
+			#Writes always go to the end of the file in append mode, which is where they are wanted, even after a truncate
+			self.files[filename] = open(filename, 'a+b')
+		return self.files[filename]
+
+
+
+	def close_file(self, filename):
+		f_object = self.files.pop(filename, None)
+		self.last_row_offsets.pop(filename, None)
+		if f_object is not None:
+			try:
+				f_object.close()
+			except Exception:
+				pass
+
+
+
+	def write_rows(self, filename, rows):
+		if len(rows) == 0:
+			return
+		f_object = self.open_file(filename)
+		data = to_csv(rows[:-1])
+		last_row = to_csv(rows[-1:])
+		offset = f_object.seek(0, os.SEEK_END)
+		f_object.write(data + last_row)
+		self.last_row_offsets[filename] = offset + len(data)
+		self.unflushed_bytes += len(data) + len(last_row)
+
+
+
+	def last_row_offset(self, filename):
+		f_object = self.open_file(filename)
+		f_object.flush()
+		offset = self.last_row_offsets.pop(filename, None)
+		if offset is None:
+			offset = find_last_row_offset(f_object)
+		return offset
+
+
+
+	def truncate_last_row(self, filename):
+		self.open_file(filename).truncate(self.last_row_offset(filename))
+
+
+
+	def flush_files(self):
+		for filename in list(self.files.keys()):
+			try:
+				self.files[filename].flush()
+			except Exception:
+				print("Could not flush "+str(filename))
+				self.close_file(filename)
+		self.unflushed_bytes = 0
+		self.last_flush = time.monotonic()
@@ -3,15 +3,22 @@ Author: Ngusum Akofu
 Date Created: Nov 17, 2021
 """
 
+import collections
 import numpy as np
 
 class Indicators:
-	
-	def __init__(self, num_assets):
 
-		self._1min_ema12 = []
-		self._5min_ema12 = []
-		self._15min_ema12 = []
+	def __init__(self, num_assets, ema_period=12):
+
+		self.num_assets = num_assets
+		self.ema_period = ema_period
+
+		#ema12 of each timeframe, keyed by the timeframe's name, eg "5min". Taken over ema_period closes, 12 unless a parameter sweep says otherwise
+		self.ema12 = {}
+		self.ema12_streams = {}
+
+		#Graph of the streaming indicators of each timeframe, keyed by the timeframe's name
+		self.graphs = {}
 
 
 	def last_n_rows(self, flattened_df, n):
@@ -20,17 +27,17 @@ class Indicators:
 	def compute_sma(self, arr):
 		return np.mean(arr, axis=0)
 
-	
+
 
 	def compute_ema(self, price, prev_ema, N):
 		k = 2/(N+1)
 		return np.add(np.multiply(np.subtract(price, prev_ema), k), prev_ema)
 
 
-	
+
 	def compute_exponential_moving_averages(self, close_price, sma12, _ema12):
 
-		prev_ema12 = _ema12	
+		prev_ema12 = _ema12
 
 		if len(_ema12) == 0:#At first 1 min, 5min, or 15min
 
@@ -42,16 +49,935 @@ class Indicators:
 
 
 
-	
-	def generate_indicators(self, close_prices, ema12):
-	
-		close_price = close_prices[-1]
-		close_price12 = close_prices[-12:] #kwargs['bt'].last_n_rows(close_prices, 12)
-		sma12 = self.compute_sma(close_price12)
+	"""
+	Returns the graph of the streaming indicators of a timeframe, creating it if need be. Indicators declared on the graph are updated with every
+	mature candlestick of the timeframe, eg:
+		graph = ind.graph('5min')
+		ind.add('5min', 'macd', graph.macd('close')[0])
+	Parameters:
+		timeframe_name (String): eg "5min".
+	Returns:
+		(IndicatorGraph)
+	"""
+	def graph(self, timeframe_name):
+		if timeframe_name not in self.graphs:
+			self.graphs[timeframe_name] = IndicatorGraph(self.num_assets)
+		return self.graphs[timeframe_name]
 
-		ema12 = self.compute_exponential_moving_averages(close_price, sma12, ema12)
 
-		return ema12
+
+	"""
+	Adds a streaming indicator to be updated with every mature candlestick of a timeframe, under a name its value can be read by.
+	Parameters:
+		timeframe_name (String): eg "5min".
+		name (String): Name the indicator is kept under, eg "rsi14".
+		indicator: Node of the timeframe's graph, or instance of one of the streaming indicator classes below (SMA, EMA, RSI, ...).
+	Returns:
+		(Node)
+	"""
+	def add(self, timeframe_name, name, indicator):
+		graph = self.graph(timeframe_name)
+		if not isinstance(indicator, Node):
+			indicator = graph.node(('added', name), [], indicator)
+		graph.names[name] = indicator
+		return indicator
+
+
+
+	"""
+	Returns the latest value of a streaming indicator.
+	Parameters:
+		timeframe_name (String): eg "5min".
+		name (String): Name the indicator was added under.
+	Returns:
+		(numpy.ndarray): One value per security in play, nan until the indicator has taken in enough candlesticks.
+	"""
+	def value(self, timeframe_name, name):
+		return self.graphs[timeframe_name].names[name].value
+
+
+
+	"""
+	Updates the indicators of a timeframe with its newest mature candlestick. Each update costs the same however long the indicators' windows are.
+	The first time round, the ema12 is started off from the candlesticks already held, ie from the sma12 of the last 12 closes.
+	Parameters:
+		timeframe_name (String): eg "5min".
+		bars (BarBlock): Candlesticks of the timeframe. The last one is the candlestick just matured.
+	"""
+	def generate_indicators(self, timeframe_name, bars):
+
+		if timeframe_name not in self.ema12_streams:
+			self.ema12_streams[timeframe_name] = EMA(self.num_assets, self.ema_period)
+			self.ema12_streams[timeframe_name].prime(bars.closes)
+		else:
+			self.ema12_streams[timeframe_name].update_bar(bars)
+		self.ema12[timeframe_name] = self.ema12_streams[timeframe_name].value
+
+		if timeframe_name in self.graphs:
+			self.graphs[timeframe_name].evaluate(bars)
+
+
+
+class RunningSum:
+
+
+
+	"""
+	Sum of the last period values of a series, for all securities in play. The series is cut into blocks of period values. The last period values are
+	the tail of the previous block plus the head of the current one, so the sum is the sum of that tail, taken from the suffix sums worked out once
+	the previous block was complete, plus the running sum of the current block. An update costs the same however long the period (a block's suffix
+	sums are worked out once every period updates), nothing is ever subtracted, so precision does not wear away however long the series, and a nan
+	only makes the sums of the windows it is in nan.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		period (Int): Number of values summed.
+	"""
+	def __init__(self, num_assets, period):
+		self.period = period
+		self.block = np.zeros((period, num_assets))
+		#Sums of the values of the previous block from each position to its end, plus a row of zeros for the empty tail
+		self.suffix_sums = np.zeros((period + 1, num_assets))
+		self.prefix_sum = np.zeros(num_assets)
+		self.count = 0
+
+
+
+	"""
+	Takes in the next value of the series.
+	Returns:
+		(numpy.ndarray): Sum of the last period values, nan until period values have been taken in, or while a nan is among them.
+	"""
+	def update(self, x):
+		position = self.count % self.period
+		self.count += 1
+		self.block[position] = x
+		self.prefix_sum = self.block[0].copy() if position == 0 else self.prefix_sum + x
+
+		if self.count < self.period:
+			total = np.full(self.block.shape[1], np.nan)
+		else:
+			total = self.suffix_sums[position + 1] + self.prefix_sum
+
+		if position == self.period - 1:
+			#The block is complete, and its tails are summed for the windows ending in the next block
+			self.suffix_sums[:self.period] = np.cumsum(self.block[::-1], axis=0)[::-1]
+		return total
+
+
+
+class SMA:
+
+
+
+	"""
+	Simple moving average of a field.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		period (Int): Number of candlesticks averaged.
+		field (String): "close", "open", "high", "low", "volume", or "vwap"
+	"""
+	def __init__(self, num_assets, period, field='close'):
+		self.period = period
+		self.field = field
+		self.sum = RunningSum(num_assets, period)
+		self.value = np.full(num_assets, np.nan)
+
+
+
+	def update(self, x):
+		self.value = self.sum.update(x) / self.period
+		return self.value
+
+
+
+	def update_bar(self, bars):
+		return self.update(bars.field(self.field)[-1])
+
+
+
+class EMA:
+
+
+
+	"""
+	Exponential moving average of a field. The first value is the sma of the first period values, after which each value is
+	(x - previous ema) * 2/(period + 1) + previous ema. A nan value is skipped, leaving the ema of its security as it was.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		period (Int):
+		field (String): "close", "open", "high", "low", "volume", or "vwap"
+	"""
+	def __init__(self, num_assets, period, field='close'):
+		self.period = period
+		self.field = field
+		self.k = 2/(period+1)
+		self.seed = np.zeros(num_assets)
+		#Number of values taken in by each security, nan aside
+		self.count = np.zeros(num_assets, dtype=np.int64)
+		self.value = np.full(num_assets, np.nan)
+
+
+
+	def update(self, x):
+		valid = ~np.isnan(x)
+		self.count = self.count + valid
+		self.seed = np.where(valid & (self.count < self.period), self.seed + x, self.seed)
+		started = np.where(valid & (self.count == self.period), (self.seed + x) / self.period, self.value)
+		self.value = np.where(valid & (self.count > self.period), np.add(np.multiply(np.subtract(x, self.value), self.k), self.value), started)
+		return self.value
+
+
+
+	def update_bar(self, bars):
+		return self.update(bars.field(self.field)[-1])
+
+
+
+	"""
+	Starts the ema off from values already held, the way Indicators.compute_exponential_moving_averages() always has: the sma of the last period
+	values is taken as the previous ema, and the last value is applied to it.
+	Parameters:
+		history (numpy.ndarray): Values, one row per candlestick, oldest first.
+	"""
+	def prime(self, history):
+		self.value = np.mean(history[-self.period:], axis=0)
+		#Securities with a nan among the values start off afresh instead, from the values to come
+		self.count = np.where(np.isnan(self.value), 0, self.period)
+		self.seed = np.zeros(self.value.shape)
+		return self.update(history[-1])
+
+
+
+class RSI:
+
+
+
+	"""
+	Relative strength index of a field, with Wilder's smoothing. The average gain and loss start off as the means of the first period changes, after
+	which each is (previous average * (period - 1) + change) / period. A nan value is skipped: the next change is taken from the last value before it.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		period (Int):
+		field (String): "close", "open", "high", "low", "volume", or "vwap"
+	"""
+	def __init__(self, num_assets, period=14, field='close'):
+		self.period = period
+		self.field = field
+		self.prev = None
+		#Number of changes taken in by each security, nan aside
+		self.count = np.zeros(num_assets, dtype=np.int64)
+		self.avg_gain = np.zeros(num_assets)
+		self.avg_loss = np.zeros(num_assets)
+		self.value = np.full(num_assets, np.nan)
+
+
+
+	def update(self, x):
+		if self.prev is None:
+			self.prev = x
+			return self.value
+
+		change = x - self.prev
+		self.prev = np.where(np.isnan(x), self.prev, x)
+		gain = np.maximum(change, 0.0)
+		loss = np.maximum(-change, 0.0)
+
+		valid = ~np.isnan(change)
+		self.count = self.count + valid
+		self.avg_gain = wilder_step(self.avg_gain, gain, self.count, self.period, valid)
+		self.avg_loss = wilder_step(self.avg_loss, loss, self.count, self.period, valid)
+
+		self.value = np.where(valid & (self.count >= self.period), rsi_from_averages(self.avg_gain, self.avg_loss), self.value)
+		return self.value
+
+
+
+	def update_bar(self, bars):
+		return self.update(bars.field(self.field)[-1])
+
+
+
+"""
+One step of Wilder's smoothing, for all securities in play: the values are summed until period of them have been taken in, when the sum becomes
+their mean, after which each value is (previous average * (period - 1) + x) / period. Securities whose x is nan are left as they were.
+Parameters:
+	average (numpy.ndarray): Sum of the values so far until period of them have been taken in, the average after.
+	x (numpy.ndarray): Next value.
+	count (numpy.ndarray): Number of values taken in by each security, x included.
+	period (Int):
+	valid (numpy.ndarray): False where x is nan.
+Returns:
+	(numpy.ndarray): The sum or average, x taken in.
+"""
+def wilder_step(average, x, count, period, valid):
+	summed = average + x
+	smoothed = np.where(count < period, summed, np.where(count == period, summed / period, (average * (period - 1) + x) / period))
+	return np.where(valid, smoothed, average)
+
+
+
+"""
+Converts average gains and losses to rsi: 100 where there are no losses, 50 where there are neither gains nor losses.
+"""
+def rsi_from_averages(avg_gain, avg_loss):
+	rs = np.divide(avg_gain, avg_loss, out=np.zeros_like(avg_gain), where=avg_loss > 0)
+	rsi = 100 - 100 / (1 + rs)
+	return np.where(avg_loss > 0, rsi, np.where(avg_gain > 0, 100.0, 50.0))
+
+
+
+class MACD:
+
+
+
+	"""
+	Moving average convergence divergence of a field: the fast ema less the slow ema, its signal line (an ema of the macd) and the histogram
+	(macd less signal).
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		fast (Int): Period of the fast ema.
+		slow (Int): Period of the slow ema.
+		signal (Int): Period of the signal line.
+		field (String): "close", "open", "high", "low", "volume", or "vwap"
+	"""
+	def __init__(self, num_assets, fast=12, slow=26, signal=9, field='close'):
+		self.field = field
+		self.fast = EMA(num_assets, fast)
+		self.slow = EMA(num_assets, slow)
+		self.signal_ema = EMA(num_assets, signal)
+		self.value = np.full(num_assets, np.nan)
+		self.signal = np.full(num_assets, np.nan)
+		self.histogram = np.full(num_assets, np.nan)
+
+
+
+	def update(self, x):
+		#nan until the slow ema has started, which the signal line skips
+		self.value = self.fast.update(x) - self.slow.update(x)
+		self.signal = self.signal_ema.update(self.value)
+		self.histogram = self.value - self.signal
+		return self.value
+
+
+
+	def update_bar(self, bars):
+		return self.update(bars.field(self.field)[-1])
+
+
+
+class ATR:
+
+
+
+	"""
+	Average true range, with Wilder's smoothing. The first value is the mean of the first period true ranges, after which each value is
+	(previous atr * (period - 1) + true range) / period. A nan true range is skipped, and the next one is taken from the last close before it.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		period (Int):
+	"""
+	def __init__(self, num_assets, period=14):
+		self.period = period
+		self.prev_close = None
+		#Number of true ranges taken in by each security, nan aside
+		self.count = np.zeros(num_assets, dtype=np.int64)
+		#Sum of the true ranges until period of them have been taken in, the atr after
+		self.average = np.zeros(num_assets)
+		self.value = np.full(num_assets, np.nan)
+
+
+
+	def update(self, high, low, close):
+		true_range = true_range_of(high, low, self.prev_close)
+		self.prev_close = close if self.prev_close is None else np.where(np.isnan(close), self.prev_close, close)
+
+		valid = ~np.isnan(true_range)
+		self.count = self.count + valid
+		self.average = wilder_step(self.average, true_range, self.count, self.period, valid)
+		self.value = np.where(self.count >= self.period, self.average, np.nan)
+		return self.value
+
+
+
+	def update_bar(self, bars):
+		return self.update(bars.highs[-1], bars.lows[-1], bars.closes[-1])
+
+
+
+"""
+True range of a candlestick: the largest of its high less its low, and the distances from the previous close to its high and to its low.
+With no previous close (the first candlestick), its high less its low.
+"""
+def true_range_of(high, low, prev_close):
+	if prev_close is None:
+		return high - low
+	return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+
+class BollingerBands:
+
+
+
+	"""
+	Bollinger bands of a field: the sma, and the sma plus and minus num_std population standard deviations over the same period.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		period (Int):
+		num_std (Float):
+		field (String): "close", "open", "high", "low", "volume", or "vwap"
+	"""
+	def __init__(self, num_assets, period=20, num_std=2, field='close'):
+		self.period = period
+		self.num_std = num_std
+		self.field = field
+		self.sum = RunningSum(num_assets, period)
+		self.sum_of_squares = RunningSum(num_assets, period)
+		self.value = np.full(num_assets, np.nan)
+		self.upper = np.full(num_assets, np.nan)
+		self.lower = np.full(num_assets, np.nan)
+
+
+
+	def update(self, x):
+		self.value, self.upper, self.lower = bollinger_from_sums(self.sum.update(x), self.sum_of_squares.update(x * x), self.period, self.num_std)
+		return self.value
+
+
+
+	def update_bar(self, bars):
+		return self.update(bars.field(self.field)[-1])
+
+
+
+"""
+Converts the sum and the sum of squares of period values to the sma and the upper and lower bands.
+"""
+def bollinger_from_sums(total, total_of_squares, period, num_std):
+	mean = total / period
+	std = np.sqrt(np.maximum(total_of_squares / period - mean * mean, 0.0))
+	return mean, mean + num_std * std, mean - num_std * std
+
+
+
+class RollingVWAP:
+
+
+
+	"""
+	Volume weighted average price over the last period candlesticks, weighting the price field of each candlestick by its volume.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		period (Int):
+		field (String): Price field weighted, "vwap" by default.
+	"""
+	def __init__(self, num_assets, period, field='vwap'):
+		self.field = field
+		self.price_volume = RunningSum(num_assets, period)
+		self.volume = RunningSum(num_assets, period)
+		self.value = np.full(num_assets, np.nan)
+
+
+
+	def update(self, price, volume):
+		self.value = vwap_from_sums(self.price_volume.update(price * volume), self.volume.update(volume))
+		return self.value
+
+
+
+	def update_bar(self, bars):
+		return self.update(bars.field(self.field)[-1], bars.volumes[-1])
+
+
+
+"""
+Converts the sums of price times volume and of volume to vwap. nan where there was no volume.
+"""
+def vwap_from_sums(total_price_volume, total_volume):
+	return np.divide(total_price_volume, total_volume, out=np.full_like(total_volume, np.nan), where=total_volume > 0)
+
+
+
+class RollingExtreme:
+
+
+
+	"""
+	Highest (or lowest) value of a field over the last period candlesticks, nan values aside (nan if they all are). Each security keeps a monotonic
+	deque of (index, value) pairs, from which values that can no longer be the extreme are dropped as new ones come in, so an update costs O(1) per
+	security on average whatever the period.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		period (Int):
+		field (String): "close", "open", "high", "low", "volume", or "vwap"
+		highest (Boolean): True for the rolling max, False for the rolling min.
+	"""
+	def __init__(self, num_assets, period, field='close', highest=True):
+		self.period = period
+		self.field = field
+		self.highest = highest
+		self.count = 0
+		self.deques = [collections.deque() for i in range(0, num_assets)]
+		self.value = np.full(num_assets, np.nan)
+
+
+
+	def update(self, x):
+		index = self.count
+		self.count += 1
+		value = np.full(len(self.deques), np.nan)
+
+		for i in range(0, len(self.deques)):
+			window = self.deques[i]
+			xi = x[i]
+			if not np.isnan(xi):
+				if self.highest:
+					while window and window[-1][1] <= xi:
+						window.pop()
+				else:
+					while window and window[-1][1] >= xi:
+						window.pop()
+				window.append((index, xi))
+			if window and window[0][0] <= index - self.period:
+				window.popleft()
+			if window:
+				value[i] = window[0][1]
+
+		if self.count >= self.period:
+			self.value = value
+		return self.value
+
+
+
+	def update_bar(self, bars):
+		return self.update(bars.field(self.field)[-1])
+
 
 
+class RollingMax(RollingExtreme):
 
+
+
+	def __init__(self, num_assets, period, field='high'):
+		RollingExtreme.__init__(self, num_assets, period, field, True)
+
+
+
+class RollingMin(RollingExtreme):
+
+
+
+	def __init__(self, num_assets, period, field='low'):
+		RollingExtreme.__init__(self, num_assets, period, field, False)
+
+
+
+class IndicatorGraph:
+
+
+
+	"""
+	Streaming indicators of a timeframe, declared as a graph of nodes. Each node is an operation (an indicator, a field of the candlesticks, a difference,
+	a crossover) over the values of the nodes it takes as inputs. Nodes are shared: declaring the same operation over the same inputs twice, eg the
+	ema12 of the closes needed by both a macd and an ema crossover, returns the node already declared, so it is only ever computed once.
+	As a node can only be declared over nodes which already exist, the nodes are evaluated in the order they were declared, which is a topological
+	order: every node is evaluated after its inputs. A node is not updated until all of its inputs have a value, eg the signal line of a macd only
+	starts once the macd itself has one. The values of all nodes are computed once per candlestick and cached until the next one.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+	"""
+	def __init__(self, num_assets):
+		self.num_assets = num_assets
+		#Nodes keyed by operation and inputs, in the order they were declared
+		self.nodes = {}
+		#Nodes added to Indicators, keyed by the name they were added under
+		self.names = {}
+		#Time of the candlestick the cached values were computed from
+		self.last_time = None
+
+
+
+	"""
+	Returns the node of an operation over inputs, declaring it if it has not been already.
+	Parameters:
+		key (tuple): Identifies the operation and its parameters, eg ('EMA', 12).
+		inputs ([Node]): Nodes whose values the operation takes in. None take the candlesticks themselves.
+		operation: Object with an update(*values) method, or an update_bar(bars) method if inputs is empty.
+	Returns:
+		(Node)
+	"""
+	def node(self, key, inputs, operation):
+		key = key + tuple(node.key for node in inputs)
+		if key not in self.nodes:
+			self.nodes[key] = Node(self.num_assets, key, inputs, operation)
+		return self.nodes[key]
+
+
+
+	"""
+	Updates every node with the newest mature candlestick, unless it has already been taken in.
+	Parameters:
+		bars (BarBlock): Candlesticks of the timeframe. The last one is the candlestick just matured.
+	"""
+	def evaluate(self, bars):
+		if self.last_time == bars.times[-1]:
+			return
+		self.last_time = bars.times[-1]
+
+		for node in self.nodes.values():
+			node.evaluate(bars)
+
+
+
+	"""
+	Returns a source node, ie the node of a field itself if given the name of a field.
+	"""
+	def source(self, source):
+		return self.field(source) if isinstance(source, str) else source
+
+
+
+	"""
+	Parameters:
+		name (String): "close", "open", "high", "low", "volume", or "vwap"
+	"""
+	def field(self, name):
+		return self.node(('field', name), [], Field(name))
+
+
+
+	def sma(self, source, period):
+		return self.node(('SMA', period), [self.source(source)], SMA(self.num_assets, period))
+
+
+
+	def ema(self, source, period):
+		return self.node(('EMA', period), [self.source(source)], EMA(self.num_assets, period))
+
+
+
+	def rsi(self, source, period=14):
+		return self.node(('RSI', period), [self.source(source)], RSI(self.num_assets, period))
+
+
+
+	def rolling_max(self, source, period):
+		return self.node(('RollingMax', period), [self.source(source)], RollingMax(self.num_assets, period))
+
+
+
+	def rolling_min(self, source, period):
+		return self.node(('RollingMin', period), [self.source(source)], RollingMin(self.num_assets, period))
+
+
+
+	def atr(self, period=14):
+		return self.node(('ATR', period), [self.field('high'), self.field('low'), self.field('close')], ATR(self.num_assets, period))
+
+
+
+	def rolling_vwap(self, period, price='vwap'):
+		return self.node(('RollingVWAP', period), [self.source(price), self.field('volume')], RollingVWAP(self.num_assets, period))
+
+
+
+	"""
+	Returns:
+		sma, upper, lower (Node): The sma and the bands.
+	"""
+	def bollinger_bands(self, source, period=20, num_std=2):
+		bands = self.node(('BollingerBands', period, num_std), [self.source(source)], BollingerBands(self.num_assets, period, num_std))
+		return bands, self.node(('upper',), [bands], Attribute(bands, 'upper')), self.node(('lower',), [bands], Attribute(bands, 'lower'))
+
+
+
+	"""
+	Builds the macd out of the ema nodes of the source, so emas the strategy also uses elsewhere are shared.
+	Returns:
+		macd, signal, histogram (Node):
+	"""
+	def macd(self, source, fast=12, slow=26, signal=9):
+		macd = self.difference(self.ema(source, fast), self.ema(source, slow))
+		signal_line = self.ema(macd, signal)
+		return macd, signal_line, self.difference(macd, signal_line)
+
+
+
+	def difference(self, a, b):
+		return self.node(('difference',), [self.source(a), self.source(b)], Difference())
+
+
+
+	"""
+	Returns:
+		(Node): 1 where a has just crossed above b, -1 where it has just crossed below b, else 0.
+	"""
+	def crossover(self, a, b):
+		return self.node(('crossover',), [self.source(a), self.source(b)], Crossover())
+
+
+
+class Node:
+
+
+
+	"""
+	A node of an IndicatorGraph. Its value is nan until it has been evaluated.
+	Parameters:
+		num_assets (Int): Number of securities in play.
+		key (tuple): Identifies the operation, its parameters and its inputs.
+		inputs ([Node]): Nodes whose values the operation takes in.
+		operation: Object with an update(*values) method, or an update_bar(bars) method if inputs is empty.
+	"""
+	def __init__(self, num_assets, key, inputs, operation):
+		self.key = key
+		self.inputs = inputs
+		self.operation = operation
+		self.value = np.full(num_assets, np.nan)
+		#Whether the node has a value, ie is not all nan
+		self.ready = False
+
+
+
+	def evaluate(self, bars):
+		if len(self.inputs) == 0:
+			self.value = self.operation.update_bar(bars)
+		elif all(node.ready for node in self.inputs):
+			self.value = self.operation.update(*[node.value for node in self.inputs])
+		else:
+			return
+		self.ready = not np.isnan(self.value).all()
+
+
+
+class Field:
+
+
+
+	def __init__(self, name):
+		self.name = name
+
+
+
+	def update_bar(self, bars):
+		return bars.field(self.name)[-1]
+
+
+
+class Difference:
+
+
+
+	def update(self, a, b):
+		return a - b
+
+
+
+class Crossover:
+
+
+
+	def __init__(self):
+		self.prev = None
+
+
+
+	def update(self, a, b):
+		diff = a - b
+		crossed = np.zeros(len(diff))
+		if self.prev is not None:
+			crossed[(self.prev <= 0) & (diff > 0)] = 1
+			crossed[(self.prev >= 0) & (diff < 0)] = -1
+		self.prev = diff
+		return crossed
+
+
+
+class Attribute:
+
+
+
+	"""
+	Reads another attribute of the operation of a node, eg the upper band of BollingerBands.
+	Parameters:
+		node (Node):
+		name (String): Name of the attribute.
+	"""
+	def __init__(self, node, name):
+		self.node = node
+		self.name = name
+
+
+
+	def update(self, value):
+		return getattr(self.node.operation, self.name)
+
+
+
+"""
+Sum of the last period rows of x, for every row of x.
+This and the functions below compute the indicators above over a whole history at once, eg over a year of 1 minute closes of hundreds of securities,
+for offline research. Each gives exactly the values, bit for bit, that the streaming indicator of the same name would have given had it been
+updated with one row of the history at a time, nan included: a nan only makes the windowed sums of the windows it is in nan, and is skipped by
+the recursive averages (ema, Wilder's smoothing) and the rolling highs and lows. Windowed sums are taken block by block with numpy.cumsum, rolling
+highs and lows from numpy.lib.stride_tricks.sliding_window_view, and recursive averages by stepping through time once with all securities updated
+together.
+Parameters (common to all):
+	x (numpy.ndarray): History of a field, one row per candlestick (oldest first) and one column per security, eg bars.closes.
+	period (Int):
+Returns:
+	(numpy.ndarray): Values of the indicator, of the same shape as x.
+"""
+def batch_running_sum(x, period):
+	num_blocks = -(-len(x) // period)
+	blocks = np.zeros((num_blocks*period,) + x.shape[1:])
+	blocks[:len(x)] = x
+	blocks = blocks.reshape((num_blocks, period) + x.shape[1:])
+
+	#As in RunningSum, each window is the tail of the previous block plus the head of the current one
+	prefix_sums = np.cumsum(blocks, axis=1)
+	suffix_sums = np.zeros((num_blocks, period + 1) + x.shape[1:])
+	if num_blocks > 1:
+		suffix_sums[1:, :period] = np.cumsum(blocks[:-1, ::-1], axis=1)[:, ::-1]
+
+	total = (suffix_sums[:, 1:] + prefix_sums).reshape((num_blocks*period,) + x.shape[1:])[:len(x)]
+	total[:period-1] = np.nan
+	return total
+
+
+
+def batch_sma(x, period):
+	return batch_running_sum(x, period) / period
+
+
+
+def batch_ema(x, period):
+	k = 2/(period+1)
+	ema = np.full(x.shape, np.nan)
+	if np.isnan(x).any():
+		#Each security starts and skips values on its own
+		stream = EMA(x.shape[1:], period)
+		for t in range(0, len(x)):
+			ema[t] = stream.update(x[t])
+		return ema
+	if len(x) < period:
+		return ema
+
+	value = np.cumsum(x[:period], axis=0)[-1] / period
+	ema[period-1] = value
+	for t in range(period, len(x)):
+		value = np.add(np.multiply(np.subtract(x[t], value), k), value)
+		ema[t] = value
+	return ema
+
+
+
+"""
+Wilder's smoothing of x: the mean of the first period values, after which each value is (previous value * (period - 1) + x) / period.
+nan values are skipped, as by wilder_step().
+Parameters:
+	axis (Int): Axis of x running through time.
+"""
+def batch_wilder(x, period, axis=0):
+	x = np.moveaxis(x, axis, 0)
+	smoothed = np.full(x.shape, np.nan)
+	if np.isnan(x).any():
+		average = np.zeros(x.shape[1:])
+		count = np.zeros(x.shape[1:], dtype=np.int64)
+		for t in range(0, len(x)):
+			valid = ~np.isnan(x[t])
+			count += valid
+			average = wilder_step(average, x[t], count, period, valid)
+			smoothed[t] = np.where(count >= period, average, np.nan)
+	elif len(x) >= period:
+		value = np.cumsum(x[:period], axis=0)[-1] / period
+		smoothed[period-1] = value
+		for t in range(period, len(x)):
+			value *= period - 1
+			value += x[t]
+			value /= period
+			smoothed[t] = value
+	return np.moveaxis(smoothed, 0, axis)
+
+
+
+def batch_rsi(x, period=14):
+	rsi = np.full(x.shape, np.nan)
+	#Each change is taken from the last value which was not nan
+	change = x[1:] - forward_fill(x)[:-1]
+	if len(change) < period:
+		return rsi
+
+	#Gains and losses are smoothed together, in a single pass through time
+	averages = batch_wilder(np.stack([np.maximum(change, 0.0), np.maximum(-change, 0.0)]), period, axis=1)
+	rsi[1:] = np.where(np.isnan(averages[0]), np.nan, rsi_from_averages(averages[0], averages[1]))
+	return rsi
+
+
+
+"""
+Returns:
+	macd, signal, histogram (numpy.ndarray): Same as the value, signal and histogram attributes of MACD.
+"""
+def batch_macd(x, fast=12, slow=26, signal=9):
+	macd = batch_ema(x, fast) - batch_ema(x, slow)
+	signal_line = np.full(x.shape, np.nan)
+	if len(x) >= slow:
+		signal_line[slow-1:] = batch_ema(macd[slow-1:], signal)
+	return macd, signal_line, macd - signal_line
+
+
+
+def batch_atr(highs, lows, closes, period=14):
+	true_range = np.empty(highs.shape)
+	true_range[:1] = true_range_of(highs[:1], lows[:1], None)
+	true_range[1:] = true_range_of(highs[1:], lows[1:], forward_fill(closes)[:-1])
+	return batch_wilder(true_range, period)
+
+
+
+"""
+Returns:
+	sma, upper, lower (numpy.ndarray): Same as the value, upper and lower attributes of BollingerBands.
+"""
+def batch_bollinger_bands(x, period=20, num_std=2):
+	return bollinger_from_sums(batch_running_sum(x, period), batch_running_sum(x * x, period), period, num_std)
+
+
+
+def batch_rolling_vwap(prices, volumes, period):
+	return vwap_from_sums(batch_running_sum(prices * volumes, period), batch_running_sum(volumes, period))
+
+
+
+"""
+Highest (or lowest) value of x over the last period rows, nan values aside (nan if they all are).
+"""
+def batch_rolling_extreme(x, period, highest=True):
+	extreme = np.full(x.shape, np.nan)
+	if len(x) >= period:
+		windows = np.lib.stride_tricks.sliding_window_view(x, period, axis=0)
+		extreme[period-1:] = np.fmax.reduce(windows, axis=-1) if highest else np.fmin.reduce(windows, axis=-1)
+	return extreme
+
+
+
+def batch_rolling_max(x, period):
+	return batch_rolling_extreme(x, period, True)
+
+
+
+def batch_rolling_min(x, period):
+	return batch_rolling_extreme(x, period, False)
+
+
+
+"""
+Fills each nan of x with the last value before it in its column which is not nan. Leading nans are left as they are.
+"""
+def forward_fill(x):
+	if not np.isnan(x).any():
+		return x
+	rows = np.arange(len(x)).reshape((-1,) + (1,)*(x.ndim - 1))
+	last_rows = np.maximum.accumulate(np.where(np.isnan(x), 0, rows), axis=0)
+	return np.take_along_axis(x, last_rows, axis=0)
@@ -14,7 +14,7 @@ class Plot:
 	
 
 
-	def __init__(self, num_assets):
+	def __init__(self, num_assets, num_timeframes=3):
 
 		self.ax = mplt.gca()
 		self.ax1 = mplt.subplot2grid((1,1), (0,0))	
@@ -27,10 +27,10 @@ class Plot:
 		self.ohlc = []
 
 		for i in range(0, num_assets):
-			self.time_list.append([[],[],[]])
-			self.price_list.append([[],[],[]])
-			self.ema12_list.append([[],[],[]])
-			self.ohlc.append([[],[],[]])		
+			self.time_list.append([[] for j in range(0, num_timeframes)])
+			self.price_list.append([[] for j in range(0, num_timeframes)])
+			self.ema12_list.append([[] for j in range(0, num_timeframes)])
+			self.ohlc.append([[] for j in range(0, num_timeframes)])		
 
 
 
@@ -39,16 +39,19 @@ class Plot:
 	Parameters:
 		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
 		time (pandas.TimeFrame): Current minute.
-		price ([Float]): List of close prices for all securities in play, for the specified timeframe and the current minute
+		bars (BarBlock): Candlesticks of the specified timeframe. The last one is the candlestick as of the current minute.
 		ema12 ([Float]): List of ema12 for all securities in play, for the specified timeframe and the current minute
-		candlestick ([(Float, Float, Float, Float, Float, Float)]): ohlcv for all securities in play for specified timeframe and current minute. 
+		timeframe_index (Int): Position of the timeframe in the registry, eg 0, 1 or 2 for the 1, 5 or 15 minute timeframe.
 	"""
-	def populate_axes(self, assets, time, price, ema12, candlestick, timeframe_index):
+	def populate_axes(self, assets, time, bars, ema12, timeframe_index):
+		timestamp = time.timestamp()
+		price = bars.closes[-1].tolist()
+		candlestick = list(zip(bars.opens[-1].tolist(), bars.highs[-1].tolist(), bars.lows[-1].tolist(), price, bars.volumes[-1].tolist()))
 		for i in range(0, len(assets)):
-			self.time_list[i][timeframe_index].append(time.timestamp())#Each entry is a time obj
+			self.time_list[i][timeframe_index].append(timestamp)#Each entry is a time obj
 			self.price_list[i][timeframe_index].append(price[i])#Each entry is a list of the closing price of each stock		
 			self.ema12_list[i][timeframe_index].append(ema12[i])#Each entry is a list of the ema12 of each stock
-			self.ohlc[i][timeframe_index].append(candlestick[i])
+			self.ohlc[i][timeframe_index].append((timestamp,) + candlestick[i])
 	
 
 
@@ -58,11 +61,12 @@ class Plot:
 		strategy (Strategy): Instance of Strategy class.
 		ticker (String): Symbol of the security under consideration
 		i (Int): Indexed position of the security under consideration in assets list.
+		timeframe_index (Int): Position of the timeframe to plot in the registry, eg tfs.index('5min').
 		kwargs
 	"""
-	def plot_full_chart(self, ticker, i, kwargs):
+	def plot_full_chart(self, ticker, i, timeframe_index, kwargs):
 		ax1 = mplt.subplot2grid((1,1), (0,0))	
-		candlestick_ohlc(ax1, self.ohlc[i][1], width=40, colorup='green', colordown='red')
+		candlestick_ohlc(ax1, self.ohlc[i][timeframe_index], width=40, colorup='green', colordown='red')
 		ax1.xaxis.set_major_locator(mticker.MaxNLocator(10))
 		ax1.grid(True)
 
@@ -70,7 +74,7 @@ class Plot:
 		mplt.ylabel('Price')
 		mplt.title(ticker)
 		mplt.subplots_adjust(left=0.09, bottom=0.02, right=0.94, top=0.90, wspace=0.4, hspace=0)
-		ax1.plot(self.time_list[i][1], self.ema12_list[i][1])
+		ax1.plot(self.time_list[i][timeframe_index], self.ema12_list[i][timeframe_index])
 	
 		mplt.show()	
 
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap']
+
+#Arrays of a session
+ARRAYS = ['timestamps', 'symbols', 'values']
+
+
+
+class SessionReplay:
+
+
+
+	"""
+	Holds the bars of an entire trading session in memory, one set of arrays per timeframe, so that the minute by minute requests made during
+	the simulation can be answered by slicing those arrays rather than by calling the API.
+	Parameters:
+		lookback_multiple (Int): How many multiples of rows_limit candlesticks prior to the trigger time are prefetched along with the session.
+	"""
+	def __init__(self, lookback_multiple=3):
+		self.lookback_multiple = lookback_multiple
+		self.sessions = {}
+
+
+
+	"""
+	Pulls the whole session plus the lookback window for a timeframe in a single get_bars() call, and stores it sorted by timestamp.
+	Parameters:
+		backtrader (Backtrader): Instance of backtrader class.
+		config: Reference to config.py
+		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+		time_delta (String):
+		time_frame (TimeFrame):
+		limit (Int): Number of candlsticks represented in dataframe.
+		start_date (pandas.Timestamp): First minute of the simulation.
+		end_date (pandas.Timestamp): Last minute of the simulation.
+	"""
+	def load(self, backtrader, config, assets, time_delta, time_frame, limit, start_date, end_date):
+		start_dt = start_date - pd.Timedelta(time_delta)*limit*self.lookback_multiple
+
+		session = self.sessions.get(str(time_frame))
+		if session is not None and session['assets'] == list(assets) and session['start'] <= start_dt.value and session['end'] >= end_date.value:
+			#Already held, eg loaded once for several sessions
+			return
+		df = backtrader._get_df(config, assets, time_frame, start_dt.isoformat(), end_date.isoformat())
+		if backtrader.bar_cache is not None:
+			backtrader.bar_cache.flush()
+
+		df_indexed = df.reset_index()
+		if len(df_indexed.index) > 0:
+			timestamps = pd.to_datetime(df_indexed['timestamp'], utc=True).to_numpy(dtype='datetime64[ns]').view(np.int64)
+			order = np.argsort(timestamps, kind='stable')
+			symbols = df_indexed['symbol'].to_numpy(dtype=str)[order]
+			values = df_indexed[COLUMNS].to_numpy(dtype=np.float64)[order]
+			timestamps = timestamps[order]
+		else:
+			timestamps = np.empty(0, dtype=np.int64)
+			symbols = np.empty(0, dtype=str)
+			values = np.empty((0, len(COLUMNS)), dtype=np.float64)
+
+		self.sessions[str(time_frame)] = {
+			'assets':list(assets),
+			'start':start_dt.value,
+			'end':end_date.value,
+			'timestamps':timestamps,
+			'symbols':symbols,
+			'values':values
+		}
+
+
+
+	"""
+	Returns the bars for the requested range if it lies within a prefetched session, otherwise None.
+	Parameters:
+		assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+		time_frame (TimeFrame):
+		start_dt (pandas.Timestamp): Specifies the begining of the time range for which the dataframe is requested.
+		end_dt (pandas.Timestamp): Specifies the end of the time range for which the dataframe is requested.
+	Returns:
+		df (pandas.DataFrame): Dataframe in the same layout get_bars() returns, or None if the range was not prefetched.
+	"""
+	def get(self, assets, time_frame, start_dt, end_dt):
+		session = self.sessions.get(str(time_frame))
+		if session is None or session['assets'] != list(assets):
+			return None
+
+		start = start_dt.value
+		end = end_dt.value
+		if start < session['start'] or end > session['end']:
+			return None
+
+		timestamps = session['timestamps']
+		lo = np.searchsorted(timestamps, start, side='left')
+		hi = np.searchsorted(timestamps, end, side='right')
+
+		#get_bars() returns rows grouped by symbol, so reproduce that order within the slice
+		symbols = session['symbols'][lo:hi]
+		order = np.argsort(symbols, kind='stable')
+		values = session['values'][lo:hi][order]
+
+		df = pd.DataFrame(values, columns=COLUMNS)
+		df['symbol'] = symbols[order]
+		df.index = pd.to_datetime(timestamps[lo:hi][order], utc=True)
+		df.index.name = 'timestamp'
+
+		return df
+
+
+
+	"""
+	Copies the arrays of every session into shared memory, so other processes can read them through attach() rather than load them again.
+	Returns:
+		blocks ([SharedMemory]): To be closed and unlinked once the other processes are done with them.
+		shared ({}): The sessions, with each array replaced by the name, shape and dtype of the block holding it. Can be pickled.
+	"""
+	def share(self):
+		blocks = []
+		shared = {}
+		for key, session in self.sessions.items():
+			shared[key] = dict(session)
+			for name in ARRAYS:
+				array = session[name]
+				block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+				np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+				blocks.append(block)
+				shared[key][name] = (block.name, array.shape, array.dtype.str)
+		return blocks, shared
+
+
+
+"""
+Returns a SessionReplay whose sessions are read straight from the shared memory blocks of another process's SessionReplay.share(), without copying.
+Parameters:
+	shared ({}): Sessions returned by SessionReplay.share().
+	lookback_multiple (Int):
+Returns:
+	(SessionReplay)
+"""
+def attach(shared, lookback_multiple=3):
+	replay = SessionReplay(lookback_multiple)
+	#The blocks must stay open for as long as the arrays are in use
+	replay.blocks = []
+	for key, session in shared.items():
+		session = dict(session)
+		for name in ARRAYS:
+			block_name, shape, dtype = session[name]
+			block = shared_memory.SharedMemory(name=block_name)
+			replay.blocks.append(block)
+			session[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+		replay.sessions[key] = session
+	return replay
@@ -3,12 +3,23 @@ Author: Ngusum Akofu
 Date Created: Sept 09, 2021
 """
 
+import os
 import sys
+import shutil
+import warnings
+import itertools
+import concurrent.futures
 import strategy
 import indicators 
 import backtrader as bt
 import plot 
 import data
+import barfile
+import cache
+import replay
+import checkpoint
+import timeframes
+import numpy as np
 import pandas as pd
 from pytz import timezone
 import config
@@ -18,6 +29,13 @@ TimeFrameUnit = config.TimeFrameUnit
 
 TIMEZONE = timezone('US/Pacific')
 
+#Securities in play, sorted alphabetically by ticker symbol
+ASSETS = sorted(['TSLA', 'XOM', 'AAPL'])
+#ASSETS = sorted(['TSLA', 'XOM', 'AAPL', 'AAL', 'C', 'BABA', 'BAC', 'TQQQ', 'SQQQ', 'T', 'CMCSA', 'F', 'GOOG', 'PYPL'])
+
+#Number of candlesticks of each timeframe the strategy is given
+ROWS_LIMIT = 13
+
 
 
 """
@@ -39,81 +57,461 @@ def fill_asset_ohlc(df):
 
 
 """
-Retrieves ohlc for all candlesticks within the specified start and end dates.
+Lists the trading sessions between two dates, along with the previous trading day's daily ohlc of each security in play, out of a single request
+for the daily candlesticks of the whole range. A day is a trading session if it has a daily candlestick.
 Parameters:
-	assets (List): List of tickers of all securities in play.
+	assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
 	backtrader (Backtrader): Instance of backtrader class
-	time_delta (String):
-	time_frame (TimeFrame):
-	date (pandas.Timestamp): Date for which we need previous day's daily ohlc 
-
+	time_delta (String): Time spanned by a daily candlestick.
+	time_frame (TimeFrame): Time frame of daily candlesticks.
+	first_day (pandas.Timestamp): First day of the range.
+	last_day (pandas.Timestamp): Last day of the range.
+	lookback_days (Int): Number of days before first_day searched for the trading day preceding it (to step over weekends and holidays).
 Returns:
-	assets_ohlc (List): List of dictionaries of each security in play's ohlcv plus ticker symbol.
-	df_was_returned (Boolean): True if an actual dataframe is returned and not an empty list.
+	sessions ([(pandas.Timestamp, [{Float}])]): The date of each trading session, and the list of dictionaries of each security in play's previous day ohlc plus ticker symbol.
 """
-def get_assets_ohlc(assets, backtrader, time_delta, time_frame, date):
-	assets_ohlc = []
-	df_was_returned = False
+def trading_sessions(assets, backtrader, time_delta, time_frame, first_day, last_day, lookback_days=10):
+	start_date = first_day - pd.Timedelta(time_delta)*lookback_days
+	end_date = last_day + pd.Timedelta(time_delta)
+	df = backtrader.get_df(config, assets, time_frame, start_date, end_date)
+	if len(df) == 0:
+		return []
 
-	limit = 1
+	#Daily candlesticks are stamped at the start of the day they belong to, in UTC
+	days = pd.to_datetime(df.index, utc=True).normalize().tz_localize(None)
+	trading_days = sorted(set(days))
 
-	date -= pd.Timedelta(time_delta) #Go to prev day
-	
-	end_date = date 
-	start_date = end_date - pd.Timedelta(time_delta)*limit	
+	sessions = []
+	for i in range(1, len(trading_days)):
+		if first_day.tz_localize(None).normalize() <= trading_days[i] <= last_day.tz_localize(None).normalize():
+			sessions.append((trading_days[i], fill_asset_ohlc(df[days == trading_days[i-1]])))
 
-	df = backtrader.get_df(config, assets, time_frame, start_date, end_date)#, False, False)
-	
-	if len(df) > 0:
-		assets_ohlc = fill_asset_ohlc(df)
-		df_was_returned = True
+	return sessions
+
+
+
+"""
+Runs the simulation over every trading session between two dates, one session after another, with the same Strategy, Indicators, Plot and Data
+instances throughout: the candlesticks, indicators and plot series of one session carry over into the next. Each session's candlesticks are loaded
+in bulk, along with the overnight lookback, when it starts. Should the run die midway, starting it again resumes it from the last completed session.
+Parameters:
+	first_day (pandas.Timestamp): First day of the simulation.
+	last_day (pandas.Timestamp): Last day of the simulation.
+	tfs (Timeframes): Registry of the timeframes to keep track of.
+	session_open (String): Time of day the simulation of each session starts, eg "06:30".
+	session_close (String): Time of day the simulation of each session ends, eg "13:00".
+	chart_timeframe (String): Name of the timeframe charted once the simulation is over. Defaults to the first derived timeframe.
+"""
+def run(first_day, last_day, tfs, session_open='06:30', session_close='13:00', chart_timeframe=None):	
+
+	backtrader = bt.Backtrader(bar_cache=cache.BarCache('data_files/bar_cache'), replay=replay.SessionReplay(), checkpointer=checkpoint.Checkpointer('data_files/checkpoints'))
+	assets = ASSETS
+
+	sessions = trading_sessions(assets, backtrader, tfs.day.time_delta, tfs.day.time_frame, first_day, last_day)
+	if len(sessions) == 0:
+		print("No trading sessions between "+str(first_day)+" and "+str(last_day))
+		return
+
+	stg = strategy.Strategy(len(assets), ROWS_LIMIT, [timeframe.interval for timeframe in tfs.derived]) #New instance of strategy used in run func
+	ind = indicators.Indicators(len(assets)) #New instamce of Indicators
+	plt = plot.Plot(len(assets), len(tfs)) #New instamce of Plot
+	dt = data.Data(len(assets)) #New instance of Data
 
-	return assets_ohlc, df_was_returned
+	#All sessions share one snapshot file, holding the state as of the latest minute snapshotted, within a session or at its end
+	checkpoint_file = None
+	resumed_date = None
+	if len(sessions) > 1:
+		checkpoint_file = backtrader.checkpointer.checkpoint_file(assets, first_day, last_day, stg.rows_limit)
+		resumed_date = backtrader.checkpointer.saved_date(checkpoint_file)
+
+	run_sessions(backtrader, assets, sessions, tfs, stg, ind, plt, dt, session_open, session_close, checkpoint_file, resumed_date)
+
+	#Charts are drawn once, after the last session, rather than at the end of every session
+	plot_charts(plt, assets, tfs, chart_timeframe)
+
+
+
+"""
+Simulates trading sessions one after another with the same Strategy, Indicators, Plot and Data instances, carrying their state over from one
+session to the next.
+Parameters:
+	backtrader (Backtrader): Instance of backtrader class
+	assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+	sessions ([(pandas.Timestamp, [{Float}])]): Sessions returned by trading_sessions().
+	tfs (Timeframes): Registry of the timeframes to keep track of.
+	stg (Strategy):
+	ind (Indicators):
+	plt (Plot):
+	dt (Data):
+	session_open (String): eg "06:30".
+	session_close (String): eg "13:00".
+	checkpoint_file (String): Snapshot file shared by all sessions, or None.
+	resumed_date (pandas.Timestamp): Last minute held by the snapshot. Sessions completed by then are skipped.
+"""
+def run_sessions(backtrader, assets, sessions, tfs, stg, ind, plt, dt, session_open, session_close, checkpoint_file=None, resumed_date=None):
+	first_session = True
+	for i in range(0, len(sessions)):
+		day, assets_ohlc = sessions[i]
+		start_date, end_date = session_bounds(day, session_open, session_close)
+		if resumed_date is not None and resumed_date >= end_date - pd.Timedelta(tfs.base.time_delta):
+			#Completed before the run died
+			continue
+
+		backtrader.assets_ohlc = assets_ohlc
+		#Only the first session simulated can have a snapshot to resume from: a single day run looks for its own, a multi-day run one found by run()
+		resume = first_session and (checkpoint_file is None or resumed_date is not None)
+		backtrader.run(stg, assets, start_date, end_date, tfs, first_session, i == len(sessions) - 1, checkpoint_file, resume, dt=dt, ind=ind, bt=backtrader, stg=stg, config=config, num_assets=len(assets), plt=plt, MY_TZ=TIMEZONE)
+		first_session = False
+
+
+
+"""
+Start and end of the simulation of a trading session.
+Parameters:
+	day (pandas.Timestamp): Date of the session.
+	session_open (String): eg "06:30".
+	session_close (String): eg "13:00".
+Returns:
+	start_date, end_date (pandas.Timestamp):
+"""
+def session_bounds(day, session_open, session_close):
+	return pd.Timestamp(day.strftime('%Y-%m-%d')+' '+session_open, tz=TIMEZONE), pd.Timestamp(day.strftime('%Y-%m-%d')+' '+session_close, tz=TIMEZONE)
 
 
 
 """
-Retrieves ohlcv for the previous trading day's daily timeframe candlestick for each security in play. Then invokes Backtrader's run() function.
+Runs the simulation over every trading session between two dates, spreading the sessions across a pool of processes, one session at a time per
+process. Each session is simulated on its own, warmed up from the candlesticks leading up to it as a single day run() would be, so unlike run(),
+indicators do not carry over from one session to the next. Before the pool starts, the candlesticks each session needs, warm-up included, are pulled
+into the bar cache one session at a time, so the workers make no API calls of their own.
+Each worker writes its data files and snapshots to a folder of its own. Once all sessions are done, the data files and plot series of the sessions are merged in
+date order, whatever order the sessions completed in, so the outcome does not depend on the number of workers.
 Parameters:
-	start_date (pandas.Timestamp): The time specified by developer to represent the start of the simulation
-	end_date (pandas.Timestamp): The time specified by developer to represent the end of the simulation
-	_1min_time_delta (String):
-	_1min_time_frame (TimeFrame):  
-	_5min_time_delta (String): 
-	_5min_time_frame (TimeFrame): 
-	_15min_time_delta (String): 
-	_15min_time_frame (TimeFrame): 
-	day_time_delta (String): 
-	day_time_frame (TimeFrame): 	
+	first_day (pandas.Timestamp): First day of the simulation.
+	last_day (pandas.Timestamp): Last day of the simulation.
+	tfs (Timeframes): Registry of the timeframes to keep track of.
+	max_workers (Int): Number of processes. Defaults to the number of cores.
+	session_open (String): Time of day the simulation of each session starts, eg "06:30".
+	session_close (String): Time of day the simulation of each session ends, eg "13:00".
+	chart_timeframe (String): Name of the timeframe charted once the simulation is over. Defaults to the first derived timeframe.
+Returns:
+	plt (Plot): Plot series of all sessions.
+"""
+def run_parallel(first_day, last_day, tfs, max_workers=None, session_open='06:30', session_close='13:00', chart_timeframe=None):
+
+	backtrader = bt.Backtrader(bar_cache=cache.BarCache('data_files/bar_cache'), replay=replay.SessionReplay())
+	assets = ASSETS
+
+	sessions = trading_sessions(assets, backtrader, tfs.day.time_delta, tfs.day.time_frame, first_day, last_day)
+	if len(sessions) == 0:
+		print("No trading sessions between "+str(first_day)+" and "+str(last_day))
+		return None
+
+	#Seed the bar cache with each session's bulk load, as Backtrader.run() will request it
+	for day, assets_ohlc in sessions:
+		start_date, end_date = session_bounds(day, session_open, session_close)
+		backtrader.replay.load(backtrader, config, assets, tfs.longest.time_delta, tfs.base.time_frame, ROWS_LIMIT, start_date, end_date)
+
+	shards = [os.path.join('data_files', 'shards', day.strftime('%Y-%m-%d')) for day, assets_ohlc in sessions]
+	with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker) as executor:
+		#map() hands the results back in the order of the sessions
+		results = list(executor.map(simulate_session, [day for day, assets_ohlc in sessions], [assets_ohlc for day, assets_ohlc in sessions], [tfs]*len(sessions), [session_open]*len(sessions), [session_close]*len(sessions), shards))
+
+	merge_data_files(shards, 'data_files')
+	shutil.rmtree(os.path.join('data_files', 'shards'), ignore_errors=True)
 
+	plt = plot.Plot(len(assets), len(tfs))
+	for series in results:
+		for key in checkpoint.PLOT_SERIES:
+			for i in range(0, len(assets)):
+				for j in range(0, len(tfs)):
+					getattr(plt, key)[i][j].extend(series[key][i][j])
+
+	plot_charts(plt, assets, tfs, chart_timeframe)
+
+	return plt
+
+
+
+"""
+Draws the chart of the candlesticks and ema12 of each security in play, at one of the timeframes kept track of.
+Parameters:
+	plt (Plot): Plot series of the simulation.
+	assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+	tfs (Timeframes): Registry of the timeframes to keep track of.
+	chart_timeframe (String): Name of the timeframe charted, eg "15min". Defaults to the first timeframe added after the base timeframe (the base
+		timeframe if it is the only one).
 """
-def run(start_date, end_date, _1min_time_delta, _1min_time_frame, _5min_time_delta, _5min_time_frame, _15min_time_delta, _15min_time_frame, day_time_delta, day_time_frame):	
+def plot_charts(plt, assets, tfs, chart_timeframe=None):
+	if chart_timeframe is None:
+		chart_timeframe = (tfs.derived + [tfs.base])[0].name
+	timeframe_index = tfs.index(chart_timeframe)
+	for i in range(0, len(assets)):
+		plt.plot_full_chart(assets[i], i, timeframe_index, {})
 
-	backtrader = bt.Backtrader()
-	curr_date = start_date
 
-	assets = ['TSLA', 'XOM', 'AAPL']
-	#assets = ['TSLA', 'XOM', 'AAPL', 'AAL', 'C', 'BABA', 'BAC', 'TQQQ', 'SQQQ', 'T', 'CMCSA', 'F', 'GOOG', 'PYPL']
-	assets = sorted(assets)
 
-	assets_ohlc = []
-	df_was_returned = False
+"""
+Sets up a worker process of run_parallel(). Charts are only drawn once all sessions are merged, so workers draw nothing on screen.
+"""
+def init_worker():
+	plot.mplt.switch_backend('Agg')
+	warnings.filterwarnings('ignore', message='.*non-interactive.*')
 
-	assets_ohlc, df_was_returned = get_assets_ohlc(assets, backtrader, day_time_delta, day_time_frame, curr_date)
 
-	while not df_was_returned: 
-		#As long as no df was returned (meaning either holiday or weekend), continue stepping back one day and attempting to return a df
-		curr_date -= pd.Timedelta(day_time_delta)	
-		assets_ohlc, df_was_returned = get_assets_ohlc(assets, backtrader, day_time_delta, day_time_frame, curr_date)	
 
+"""
+Simulates a single trading session in a worker process of run_parallel().
+Parameters:
+	day (pandas.Timestamp): Date of the session.
+	assets_ohlc ([{Float}]): Previous day ohlc of each security in play plus ticker symbol.
+	tfs (Timeframes): Registry of the timeframes to keep track of.
+	session_open (String): eg "06:30".
+	session_close (String): eg "13:00".
+	directory (String): Folder the session's data files and snapshots are written to.
+Returns:
+	({String:[]}): Plot series of the session, keyed as in checkpoint.PLOT_SERIES.
+"""
+def simulate_session(day, assets_ohlc, tfs, session_open, session_close, directory):
+	#Snapshots are kept with the session's data files, as they are only valid along with them. A single-day run() of the same session has its
+	#own, in data_files/checkpoints, for its own data files.
+	backtrader = bt.Backtrader(bar_cache=cache.BarCache('data_files/bar_cache'), replay=replay.SessionReplay(), checkpointer=checkpoint.Checkpointer(os.path.join(directory, 'checkpoints')))
 	backtrader.assets_ohlc = assets_ohlc
+	assets = ASSETS
+
+	stg = strategy.Strategy(len(assets), ROWS_LIMIT, [timeframe.interval for timeframe in tfs.derived])
+	ind = indicators.Indicators(len(assets))
+	plt = plot.Plot(len(assets), len(tfs))
+	os.makedirs(directory, exist_ok=True)
+	dt = data.Data(len(assets), directory=directory)
+
+	start_date, end_date = session_bounds(day, session_open, session_close)
+	backtrader.run(stg, assets, start_date, end_date, tfs, dt=dt, ind=ind, bt=backtrader, stg=stg, config=config, num_assets=len(assets), plt=plt, MY_TZ=TIMEZONE)
+
+	return {key: getattr(plt, key) for key in checkpoint.PLOT_SERIES}
+
+
+
+"""
+Concatenates the data files of several folders, in the order the folders are given, into files of the same names in another folder.
+Each folder's files begin with the warm-up candlesticks of its session, some of which the session before already holds. As when run() carries its
+buffers over from one session to the next (see Data.carry_over_buffer()), only the rows newer than the last one merged so far are added.
+Parameters:
+	directories ([String]): Folders holding the files to be merged.
+	directory (String): Folder the merged files are written to.
+"""
+def merge_data_files(directories, directory):
+	filenames = sorted(set(filename for folder in directories if os.path.isdir(folder) for filename in os.listdir(folder) if filename.endswith('.cvs') or filename.endswith('.bars')))
+	for filename in filenames:
+		paths = [os.path.join(folder, filename) for folder in directories if os.path.exists(os.path.join(folder, filename))]
+		if filename.endswith('.bars'):
+			merge_bar_files(paths, os.path.join(directory, filename))
+		else:
+			merge_csv_files(paths, os.path.join(directory, filename))
 
-	stg = strategy.Strategy(len(assets), 13) #New instance of strategy used in run func
-	ind = indicators.Indicators(len(assets)) #New instamce of Indicators
-	plt = plot.Plot(len(assets)) #New instamce of Plot
-	dt = data.Data(len(assets)) #New instance of Data
 
-	backtrader.run(stg, assets, start_date, end_date, _1min_time_delta, _1min_time_frame, _5min_time_delta, _5min_time_frame, _15min_time_delta, _15min_time_frame, day_time_delta, day_time_frame, dt=dt, ind=ind, bt=backtrader, stg=stg, config=config, num_assets=len(assets), plt=plt, MY_TZ=TIMEZONE)
+
+"""
+Concatenates .cvs data files, keeping the header row of the first and, from each file, the rows newer than the last one merged.
+Parameters:
+	paths ([String]): Files to be merged, oldest first.
+	filename (String): Merged file.
+"""
+def merge_csv_files(paths, filename):
+	newest = None
+	with open(filename, 'wb') as merged:
+		for i in range(0, len(paths)):
+			with open(paths[i], 'rb') as f_object:
+				header = f_object.readline()
+				rows = f_object.read().splitlines(keepends=True)
+			if i == 0:
+				merged.write(header)
+
+			times = pd.to_datetime([row.split(b',', 1)[0].decode() for row in rows], utc=True).as_unit('ns').asi8
+			newer = times > newest if newest is not None else np.ones(len(rows), dtype=bool)
+			merged.writelines([rows[j] for j in np.nonzero(newer)[0]])
+			if newer.any():
+				newest = times[newer].max()
+
+
+
+"""
+Concatenates binary bar files (see barfile.py), keeping the header of the first and, from each file, the records newer than the last one merged.
+Parameters:
+	paths ([String]): Files to be merged, oldest first.
+	filename (String): Merged file.
+"""
+def merge_bar_files(paths, filename):
+	newest = None
+	with open(filename, 'wb') as merged:
+		for i in range(0, len(paths)):
+			bar_file = barfile.BarFile(paths[i], 'r')
+			if i == 0:
+				with open(paths[i], 'rb') as f_object:
+					merged.write(f_object.read(bar_file.header_len))
+
+			records = bar_file.map()
+			if records is None:
+				continue
+			newer = records['time'] > newest if newest is not None else np.ones(len(records), dtype=bool)
+			merged.write(records[newer].tobytes())
+			if newer.any():
+				newest = records['time'][newer].max()
+
+
+
+#Parameters a sweep can vary, and the default value of each
+SWEEP_PARAMETERS = {'ema_period':12, 'rows_limit':ROWS_LIMIT}
+
+#Sessions shared by the process running a sweep, attached to by each of its workers
+worker_replay = None
+
+
+
+"""
+Runs the simulation of a date range once for every combination of parameter values of a grid, spreading the combinations across a pool of processes,
+and collects a table of results. The 1 minute candlesticks of the whole range (warm-up included) are loaded once, into shared memory, from which
+every worker reads them in place, so no combination loads any data of its own. Each combination runs all sessions of the range in turn, as run() does.
+Parameters:
+	grid ({String:[]}): Values of each parameter to try, eg {'ema_period':[9, 12, 26], 'rows_limit':[13, 26]}. Parameters left out keep their
+		default value (see SWEEP_PARAMETERS).
+	first_day (pandas.Timestamp): First day of the simulation.
+	last_day (pandas.Timestamp): Last day of the simulation.
+	tfs (Timeframes): Registry of the timeframes to keep track of.
+	evaluate (function): Called as evaluate(tfs, stg, ind, plt) once a combination has run all sessions, it returns a dictionary of results.
+		Must be defined at the top level of a module so it can be handed to the workers.
+	max_workers (Int): Number of processes. Defaults to the number of cores.
+	session_open (String): Time of day the simulation of each session starts, eg "06:30".
+	session_close (String): Time of day the simulation of each session ends, eg "13:00".
+Returns:
+	(pandas.DataFrame): One row per combination, in the order of the grid, holding its parameters followed by its results.
+"""
+def sweep(grid, first_day, last_day, tfs, evaluate=None, max_workers=None, session_open='06:30', session_close='13:00'):
+	unknown = [name for name in grid if name not in SWEEP_PARAMETERS]
+	if len(unknown) > 0:
+		raise ValueError("Cannot sweep "+", ".join(unknown)+". Parameters which can be swept: "+", ".join(SWEEP_PARAMETERS))
+	if evaluate is None:
+		evaluate = ema_gaps
+
+	backtrader = bt.Backtrader(bar_cache=cache.BarCache('data_files/bar_cache'), replay=replay.SessionReplay())
+	assets = ASSETS
+
+	sessions = trading_sessions(assets, backtrader, tfs.day.time_delta, tfs.day.time_frame, first_day, last_day)
+	if len(sessions) == 0:
+		print("No trading sessions between "+str(first_day)+" and "+str(last_day))
+		return None
+
+	#A single load covering every session, and the warm-up of the longest rows_limit of the grid
+	start_date = session_bounds(sessions[0][0], session_open, session_close)[0]
+	end_date = session_bounds(sessions[-1][0], session_open, session_close)[1]
+	limit = max(grid.get('rows_limit', [SWEEP_PARAMETERS['rows_limit']]))
+	backtrader.replay.load(backtrader, config, assets, tfs.longest.time_delta, tfs.base.time_frame, limit, start_date, end_date)
+
+	points = [dict(SWEEP_PARAMETERS, **dict(zip(grid.keys(), values))) for values in itertools.product(*grid.values())]
+
+	blocks, shared = backtrader.replay.share()
+	try:
+		with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=init_sweep_worker, initargs=(shared,)) as executor:
+			results = list(executor.map(simulate_point, points, [sessions]*len(points), [tfs]*len(points), [evaluate]*len(points), [session_open]*len(points), [session_close]*len(points)))
+	finally:
+		for block in blocks:
+			block.close()
+			block.unlink()
+
+	return pd.DataFrame([dict(point, **result) for point, result in zip(points, results)])
+
+
+
+"""
+Sets up a worker process of sweep(), attaching to the sessions in shared memory.
+Parameters:
+	shared ({}): Sessions returned by SessionReplay.share().
+"""
+def init_sweep_worker(shared):
+	global worker_replay
+	init_worker()
+	worker_replay = replay.attach(shared)
+
+
+
+"""
+Runs every session of a sweep with one combination of parameters, in a worker process of sweep(). Data files are not written.
+Parameters:
+	point ({String:}): Value of each parameter, see SWEEP_PARAMETERS.
+	sessions ([(pandas.Timestamp, [{Float}])]): Sessions returned by trading_sessions().
+	tfs (Timeframes): Registry of the timeframes to keep track of.
+	evaluate (function): See sweep().
+	session_open (String): eg "06:30".
+	session_close (String): eg "13:00".
+Returns:
+	({}): Results returned by evaluate.
+"""
+def simulate_point(point, sessions, tfs, evaluate, session_open, session_close):
+	backtrader = bt.Backtrader(bar_cache=cache.BarCache('data_files/bar_cache'), replay=worker_replay)
+	assets = ASSETS
+
+	stg = strategy.Strategy(len(assets), point['rows_limit'], [timeframe.interval for timeframe in tfs.derived])
+	ind = indicators.Indicators(len(assets), point['ema_period'])
+	plt = plot.Plot(len(assets), len(tfs))
+	dt = data.Data(len(assets), csv_sink=False, async_writes=False)
+
+	run_sessions(backtrader, assets, sessions, tfs, stg, ind, plt, dt, session_open, session_close)
+
+	return evaluate(tfs, stg, ind, plt)
+
+
+
+"""
+Default results of a sweep: for each timeframe, the mean gap between the close and the ema of the candlesticks plotted, as a fraction of the close,
+over all securities in play. The smaller, the more closely the ema tracks the price.
+Parameters:
+	tfs (Timeframes): Registry of the timeframes to keep track of.
+	stg (Strategy):
+	ind (Indicators):
+	plt (Plot):
+Returns:
+	({String:Float}): eg {'gap_5min':0.004, ...}
+"""
+def ema_gaps(tfs, stg, ind, plt):
+	results = {}
+	for j, timeframe in enumerate(tfs):
+		prices = np.array([plt.price_list[i][j] for i in range(0, len(plt.price_list))], dtype=np.float64)
+		emas = np.array([plt.ema12_list[i][j] for i in range(0, len(plt.ema12_list))], dtype=np.float64)
+		results['gap_'+timeframe.name] = float(np.nanmean(np.abs(prices - emas) / prices)) if prices.size > 0 else np.nan
+	return results
+
+
+
+"""
+Backtests every trading session between two dates in vectorized mode (see Backtrader.run_vectorized()): the strategy's execute_vectorized() is
+called once per session rather than once a minute, and nothing is written to the data files or plotted. Each session is warmed up from the
+candlesticks leading up to it, so as with run_parallel(), nothing carries over from one session to the next.
+Parameters:
+	first_day (pandas.Timestamp): First day of the simulation.
+	last_day (pandas.Timestamp): Last day of the simulation.
+	tfs (Timeframes): Registry of the timeframes to keep track of.
+	commission (Float): Cost of trading a share.
+	session_open (String): Time of day the simulation of each session starts, eg "06:30".
+	session_close (String): Time of day the simulation of each session ends, eg "13:00".
+Returns:
+	(pandas.DataFrame): Profit and loss of each security, one row per session.
+"""
+def run_vectorized(first_day, last_day, tfs, commission=0.0, session_open='06:30', session_close='13:00'):
+
+	backtrader = bt.Backtrader(bar_cache=cache.BarCache('data_files/bar_cache'), replay=replay.SessionReplay())
+	assets = ASSETS
+
+	sessions = trading_sessions(assets, backtrader, tfs.day.time_delta, tfs.day.time_frame, first_day, last_day)
+	stg = strategy.Strategy(len(assets), ROWS_LIMIT, [timeframe.interval for timeframe in tfs.derived])
+
+	pnl = {}
+	for day, assets_ohlc in sessions:
+		start_date, end_date = session_bounds(day, session_open, session_close)
+		backtrader.assets_ohlc = assets_ohlc
+		result = backtrader.run_vectorized(stg, assets, start_date, end_date, tfs, commission, bt=backtrader, stg=stg, config=config, num_assets=len(assets), MY_TZ=TIMEZONE)
+		pnl[day] = result.pnl
+
+	return pd.DataFrame.from_dict(pnl, orient='index', columns=assets)
 
 
 
@@ -122,22 +520,16 @@ The entry portal to the simulation.
 """
 def main():
 
-	MIN1_CANDLESTICK_PERIODS = {'time delta':'1 minutes', 'time frame':TimeFrame(1, TimeFrameUnit.Minute)}
-	MIN5_CANDLESTICK_PERIODS = {'time delta':'5 minutes', 'time frame':TimeFrame(5, TimeFrameUnit.Minute)}
-	MIN15_CANDLESTICK_PERIODS = {'time delta':'15 minutes', 'time frame':TimeFrame(15, TimeFrameUnit.Minute)}
-	DAY_CANDLESTICK_PERIODS = {'time delta':'1 days', 'time frame':'1Day'}	
-
-	_1min_time_delta = MIN1_CANDLESTICK_PERIODS.get('time delta')	
-	_1min_time_frame = MIN1_CANDLESTICK_PERIODS.get('time frame')
-	_5min_time_delta = MIN5_CANDLESTICK_PERIODS.get('time delta')	
-	_5min_time_frame = MIN5_CANDLESTICK_PERIODS.get('time frame')
-	_15min_time_delta = MIN15_CANDLESTICK_PERIODS.get('time delta')	
-	_15min_time_frame = MIN15_CANDLESTICK_PERIODS.get('time frame')	
-	day_time_delta = DAY_CANDLESTICK_PERIODS.get('time delta')
-	day_time_frame = DAY_CANDLESTICK_PERIODS.get('time frame')		
-
-	run(pd.Timestamp('2022-11-03 06:30',tz=TIMEZONE), pd.Timestamp('2022-11-03 13:00',tz=TIMEZONE), _1min_time_delta, _1min_time_frame, _5min_time_delta, _5min_time_frame, _15min_time_delta, _15min_time_frame, day_time_delta, day_time_frame)
+	#The first minute timeframe added is the base timeframe, from which all the others are built.
+	#To keep track of another timeframe, eg 30 minutes, simply add it: tfs.add('30min', '30 minutes', TimeFrame(30, TimeFrameUnit.Minute))
+	tfs = timeframes.Timeframes()
+	tfs.add('1min', '1 minutes', TimeFrame(1, TimeFrameUnit.Minute))
+	tfs.add('5min', '5 minutes', TimeFrame(5, TimeFrameUnit.Minute))
+	tfs.add('15min', '15 minutes', TimeFrame(15, TimeFrameUnit.Minute))
+	tfs.set_day('1 days', '1Day')
+
+	#Simulate every trading session from the first day to the last, 06:30 to 13:00 Pacific time
+	run(pd.Timestamp('2022-11-03',tz=TIMEZONE), pd.Timestamp('2022-11-03',tz=TIMEZONE), tfs)
 	
 if __name__== '__main__':
    main()
- 
\ No newline at end of file
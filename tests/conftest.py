@@ -0,0 +1,8 @@
+"""
+The modules of the simulator sit at the top of the repository. Make them importable from the tests, whatever folder pytest is run from.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
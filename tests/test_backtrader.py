@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+import backtrader as bt
+import benchmark
+
+
+
+"""
+Builds a dataframe of candlesticks in the layout fill_missing_dates() gets it, the rows of each security following one another.
+Parameters:
+	rows ([(String, String)]): Time (UTC) and ticker symbol of each row.
+Returns:
+	df (pandas.DataFrame):
+"""
+def make_rows(rows):
+	prices = 100 + np.arange(len(rows), dtype=float)
+	df = pd.DataFrame({
+		'open':prices,
+		'high':prices + 1,
+		'low':prices - 1,
+		'close':prices + 0.5,
+		'volume':np.arange(len(rows), dtype=float),
+		'trade_count':np.arange(len(rows)),
+		'vwap':prices + 0.25,
+		'symbol':[symbol for timestamp, symbol in rows]
+	}, index=pd.DatetimeIndex([timestamp for timestamp, symbol in rows], tz='UTC'))
+	df.index.name = 'timestamp'
+	return df
+
+
+
+START = pd.Timestamp('2022-11-03 06:30', tz='America/Los_Angeles')
+
+CASES = {
+	'gaps':[('2022-11-03 13:31', 'A'), ('2022-11-03 13:34', 'A'), ('2022-11-03 13:30', 'B'), ('2022-11-03 13:39', 'B')],
+	'off grid':[('2022-11-03 13:30:30', 'A'), ('2022-11-03 13:33', 'A'), ('2022-11-03 13:36:10', 'A'), ('2022-11-03 13:41', 'B'), ('2022-11-03 13:47', 'B')],
+	'duplicates':[('2022-11-03 13:30', 'A'), ('2022-11-03 13:30', 'A'), ('2022-11-03 13:35', 'A'), ('2022-11-03 13:32', 'A'), ('2022-11-03 13:45', 'B'), ('2022-11-03 13:45', 'B')],
+	'outside the range':[('2022-11-03 13:20', 'A'), ('2022-11-03 13:50', 'A'), ('2022-11-03 13:52', 'B')],
+	'complete':[('2022-11-03 13:30', 'A'), ('2022-11-03 13:35', 'A'), ('2022-11-03 13:40', 'A'), ('2022-11-03 13:45', 'A')],
+}
+
+
+
+@pytest.mark.parametrize('case', CASES)
+@pytest.mark.parametrize('time_delta', ['1 minutes', '5 minutes'])
+def test_fill_missing_dates_matches_legacy_loop(case, time_delta):
+	df = make_rows(CASES[case])
+	for start_date in [START, START + pd.Timedelta('20 seconds')]:
+		end_date = start_date + pd.Timedelta('15 minutes')
+		expected = benchmark.legacy_fill_missing_dates(df, time_delta, start_date, end_date)
+		pd.testing.assert_frame_equal(bt.Backtrader().fill_missing_dates(df, time_delta, start_date, end_date), expected)
+
+
+
+def test_fill_missing_dates_matches_legacy_loop_on_random_frames():
+	rng = np.random.default_rng(0)
+	backtrader = bt.Backtrader()
+	for trial in range(0, 50):
+		assets, df = benchmark.make_df(int(rng.integers(1, 6)), int(rng.integers(1, 30)))
+		df = backtrader.rearrange_rows_by_symbol(df, assets)
+		df = df.iloc[rng.random(len(df.index)) > 0.3]
+		#Some rows off the minute, and some repeated
+		df.index = df.index + pd.to_timedelta(np.where(rng.random(len(df.index)) < 0.2, rng.integers(1, 59, len(df.index)), 0), unit='s')
+		df.index.name = 'timestamp'
+		df = df.iloc[np.sort(np.concatenate([np.arange(len(df.index)), rng.integers(0, max(len(df.index), 1), 2)]))] if len(df.index) > 0 else df
+		time_delta = str(int(rng.choice([1, 2, 5]))) + ' minutes'
+		start_date = pd.Timestamp('2022-11-03 13:30', tz='UTC') + pd.Timedelta(minutes=int(rng.integers(-3, 4)))
+		end_date = start_date + pd.Timedelta(minutes=int(rng.integers(0, 40)))
+		expected = benchmark.legacy_fill_missing_dates(df, time_delta, start_date, end_date)
+		pd.testing.assert_frame_equal(backtrader.fill_missing_dates(df, time_delta, start_date, end_date), expected)
+
+
+
+def test_fill_missing_dates_of_an_empty_frame():
+	df = make_rows([])
+	expected = benchmark.legacy_fill_missing_dates(df, '1 minutes', START, START + pd.Timedelta('15 minutes'))
+	pd.testing.assert_frame_equal(bt.Backtrader().fill_missing_dates(df, '1 minutes', START, START + pd.Timedelta('15 minutes')), expected)
+
+
+
+@pytest.mark.parametrize('num_assets, limit, missing', [(3, 13, 0.0), (5, 13, 0.25), (14, 51, 0.3), (14, 13, 0.6)])
+def test_warm_up_matches_the_legacy_paging_loop(num_assets, limit, missing):
+	assets, df = benchmark.make_df(num_assets, 6*limit)
+	df = df.iloc[np.random.default_rng(1).random(len(df.index)) >= missing]
+	start_date = pd.Timestamp('2022-11-03 13:30', tz='UTC')
+	end_date = start_date + pd.Timedelta('1minutes')*(6*limit - 1)
+
+	#The legacy loop stops paging once every security has limit - 1 candlesticks rather than limit, and fills in the oldest time slot of those
+	#one short. It also leaves the time slot of a security without a single candlestick in a page at 0, which its combine_buckets() does not fill
+	#in. Neither happens to the data of these cases.
+	pages = ((end_date - df.index) // pd.Timedelta('1minutes')).to_numpy() // limit
+	rows_per_page = np.zeros((num_assets, 6), dtype=np.int64)
+	np.add.at(rows_per_page, (pd.Categorical(df['symbol'], categories=assets).codes, pages), 1)
+	legacy_pages = np.argmax(np.cumsum(rows_per_page, axis=1).min(axis=0) >= limit - 1) + 1
+	assert (rows_per_page[:, :legacy_pages].sum(axis=1) >= limit).all() and (rows_per_page[:, :legacy_pages] > 0).all()
+
+	backtrader = benchmark.replaying(df, assets, '1Min', start_date, end_date)
+	expected = benchmark.legacy_get_closes_opens_his_los_vols_vwaps(backtrader, None, assets, '1 minutes', '1Min', limit, end_date)
+	bars = backtrader.get_closes_opens_his_los_vols_vwaps(None, assets, '1 minutes', '1Min', limit, end_date)
+
+	for values, col_name in zip(expected, ['close', 'open', 'high', 'low', 'volume', 'vwap']):
+		np.testing.assert_array_equal(bars.field(col_name), np.array(values), err_msg=col_name)
+
+
+
+def test_warm_up_gives_a_security_one_empty_time_slot_per_page_without_candlesticks():
+	assets, df = benchmark.make_df(2, 40)
+	start_date = pd.Timestamp('2022-11-03 13:30', tz='UTC')
+	end_date = start_date + pd.Timedelta('1minutes')*39
+	#The first security has not traded in the last page of 10 minutes, the second one from halfway through the page before to halfway through it
+	minutes = (df.index - start_date) // pd.Timedelta('1minutes')
+	df = df[~(((df['symbol'] == assets[0]) & (minutes >= 30)) | ((df['symbol'] == assets[1]) & (minutes >= 25) & (minutes < 35)))]
+
+	backtrader = benchmark.replaying(df, assets, '1Min', start_date, end_date)
+	bars = backtrader.get_closes_opens_his_los_vols_vwaps(None, assets, '1 minutes', '1Min', 10, end_date)
+
+	closes = df.pivot(columns='symbol', values='close').reindex(index=pd.date_range(start_date, end_date, freq='1min'), columns=assets).to_numpy()
+	#The empty time slot is filled in with the candlestick before it
+	np.testing.assert_array_equal(bars.closes[:, 0], np.concatenate([closes[21:30, 0], closes[29:30, 0]]))
+	np.testing.assert_array_equal(bars.closes[:, 1], np.concatenate([closes[20:25, 1], closes[35:40, 1]]))
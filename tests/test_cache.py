@@ -0,0 +1,97 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import cache
+
+
+
+"""
+Builds a dataframe in the layout returned by get_bars(), one candlestick a minute for each security, from start to end included.
+"""
+def make_bars(assets, start, end, offset=0.0):
+	timestamps = pd.date_range(start, end, freq='1min', tz='UTC')
+	prices = offset + 100 + np.arange(len(timestamps)*len(assets), dtype=float)
+	df = pd.DataFrame({col_name: prices for col_name in cache.COLUMNS}, index=np.tile(timestamps, len(assets)))
+	df['symbol'] = np.repeat(assets, len(timestamps))
+	df.index.name = 'timestamp'
+	return df
+
+
+
+def put(bar_cache, df, start, end):
+	bar_cache.put(['A', 'B'], '1Min', pd.Timestamp(start, tz='UTC').isoformat(), pd.Timestamp(end, tz='UTC').isoformat(), 'raw', df)
+
+
+
+def get(bar_cache, start, end):
+	return bar_cache.get(['A', 'B'], '1Min', pd.Timestamp(start, tz='UTC').isoformat(), pd.Timestamp(end, tz='UTC').isoformat(), 'raw')
+
+
+
+def segment_files(directory):
+	return [filename for filename in os.listdir(directory) if filename.endswith('.npz')]
+
+
+
+def test_abutting_ranges_are_merged_and_served_together(tmp_path):
+	bar_cache = cache.BarCache(str(tmp_path))
+	put(bar_cache, make_bars(['A', 'B'], '2022-11-03 14:00', '2022-11-03 14:30'), '2022-11-03 14:00', '2022-11-03 14:30')
+	put(bar_cache, make_bars(['A', 'B'], '2022-11-03 14:31', '2022-11-03 15:00'), '2022-11-03 14:31', '2022-11-03 15:00')
+
+	assert len(bar_cache.segments) == 1
+	assert len(segment_files(str(tmp_path))) == 1
+	df = get(bar_cache, '2022-11-03 14:10', '2022-11-03 14:50')
+	assert df is not None
+	for symbol in ['A', 'B']:
+		assert list(df[df['symbol'] == symbol].index) == list(pd.date_range('2022-11-03 14:10', '2022-11-03 14:50', freq='1min', tz='UTC'))
+	assert get(bar_cache, '2022-11-03 13:59', '2022-11-03 14:10') is None
+
+
+
+def test_requests_made_minute_by_minute_end_up_in_one_segment(tmp_path):
+	bar_cache = cache.BarCache(str(tmp_path))
+	for minute in pd.date_range('2022-11-03 14:00', '2022-11-03 14:59', freq='1min'):
+		#Each request looks back over the last 5 minutes, as the per-minute requests of run() do
+		put(bar_cache, make_bars(['A', 'B'], minute - pd.Timedelta('4min'), minute), minute - pd.Timedelta('4min'), minute)
+
+	assert len(segment_files(str(tmp_path))) == 1
+	df = get(bar_cache, '2022-11-03 13:56', '2022-11-03 14:59')
+	assert len(df.index) == 2*64
+	assert not df.reset_index().duplicated(subset=['symbol', 'timestamp']).any()
+
+
+
+def test_the_bars_of_the_latest_request_win_where_ranges_overlap(tmp_path):
+	bar_cache = cache.BarCache(str(tmp_path))
+	put(bar_cache, make_bars(['A', 'B'], '2022-11-03 14:00', '2022-11-03 14:30'), '2022-11-03 14:00', '2022-11-03 14:30')
+	latest = make_bars(['A', 'B'], '2022-11-03 14:20', '2022-11-03 14:40', offset=1000.0)
+	put(bar_cache, latest, '2022-11-03 14:20', '2022-11-03 14:40')
+
+	df = get(bar_cache, '2022-11-03 14:20', '2022-11-03 14:40')
+	np.testing.assert_array_equal(df['close'].to_numpy(), latest['close'].to_numpy())
+
+
+
+def test_index_is_written_on_flush_with_the_time_of_last_use(tmp_path):
+	bar_cache = cache.BarCache(str(tmp_path))
+	put(bar_cache, make_bars(['A', 'B'], '2022-11-03 14:00', '2022-11-03 14:30'), '2022-11-03 14:00', '2022-11-03 14:30')
+	assert not os.path.exists(bar_cache.index_file)
+	bar_cache.flush()
+	with open(bar_cache.index_file) as f_object:
+		last_used = json.load(f_object)[0]['last_used']
+
+	reopened = cache.BarCache(str(tmp_path))
+	assert get(reopened, '2022-11-03 14:05', '2022-11-03 14:10') is not None
+	reopened.flush()
+	with open(bar_cache.index_file) as f_object:
+		assert json.load(f_object)[0]['last_used'] > last_used
+
+
+
+def test_index_is_written_every_save_every_changes(tmp_path):
+	bar_cache = cache.BarCache(str(tmp_path), save_every=2)
+	put(bar_cache, make_bars(['A', 'B'], '2022-11-03 14:00', '2022-11-03 14:10'), '2022-11-03 14:00', '2022-11-03 14:10')
+	assert not os.path.exists(bar_cache.index_file)
+	put(bar_cache, make_bars(['A', 'B'], '2022-11-03 16:00', '2022-11-03 16:10'), '2022-11-03 16:00', '2022-11-03 16:10')
+	assert len(cache.BarCache(str(tmp_path)).segments) == 2
@@ -0,0 +1,34 @@
+import numpy as np
+import candles
+import benchmark
+
+
+
+def test_aggregator_grows_the_candlesticks_the_legacy_dictionaries_did():
+	num_assets = 4
+	intervals = [5, 15]
+	dates, bars = benchmark.make_minutes(num_assets, 100)
+	aggregator = candles.CandleAggregator(num_assets, intervals)
+	growing_candlesticks = [[{} for i in range(0, num_assets)] for interval in intervals]
+
+	#The clock starts on the first minute of a candlestick of both timeframes, before which the legacy dictionaries grew from sentinel values
+	for curr_date, bar in zip(dates, bars):
+		aggregator.update(curr_date, bar)
+		for interval, growing_candlestick in zip(intervals, growing_candlesticks):
+			expected = benchmark.legacy_get_growing_candlestick(interval, growing_candlestick, curr_date, bar.closes[-1], bar.opens[-1], bar.highs[-1], bar.lows[-1], bar.volumes[-1])[0]
+			forming = aggregator.bar(interval, curr_date)
+			for field in ['close', 'open', 'high', 'low', 'volume']:
+				np.testing.assert_array_equal(forming.field(field), expected.field(field), err_msg=field)
+
+
+
+def test_aggregator_weights_vwap_by_volume():
+	num_assets = 4
+	dates, bars = benchmark.make_minutes(num_assets, 5)
+	aggregator = candles.CandleAggregator(num_assets, [5])
+	for curr_date, bar in zip(dates, bars):
+		aggregator.update(curr_date, bar)
+
+	vwaps = np.concatenate([bar.vwaps for bar in bars])
+	volumes = np.concatenate([bar.volumes for bar in bars])
+	np.testing.assert_allclose(aggregator.bar(5, dates[-1]).vwaps[0], (vwaps*volumes).sum(axis=0)/volumes.sum(axis=0))
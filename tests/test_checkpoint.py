@@ -0,0 +1,102 @@
+import os
+import types
+import numpy as np
+import pandas as pd
+import pytest
+import barblock
+import checkpoint
+import data
+import indicators
+import plot
+import strategy
+
+
+
+ASSETS = ['AAPL', 'TSLA', 'XOM']
+LIMIT = 5
+
+
+
+"""
+Builds the candlesticks of minutes first to last (excluded) from 2022-11-03 13:30 UTC, with prices that differ from minute to minute.
+"""
+def make_bars(first, last):
+	times = pd.Timestamp('2022-11-03 13:30', tz='UTC').value + pd.Timedelta('1minutes').value*np.arange(first, last, dtype=np.int64)
+	values = 100 + np.arange(len(barblock.FIELDS)*len(times)*len(ASSETS), dtype=float).reshape(len(barblock.FIELDS), len(times), len(ASSETS))
+	return barblock.BarBlock(times, values + first)
+
+
+
+"""
+Sets up the parts of a run a snapshot is taken of, writing their files to directory.
+"""
+def start_run(directory, async_writes):
+	dt = data.Data(len(ASSETS), bar_file_sink=True, async_writes=async_writes, directory=directory)
+	stg = strategy.Strategy(len(ASSETS), LIMIT)
+	kwargs = {'dt':dt, 'ind':indicators.Indicators(len(ASSETS)), 'plt':plot.Plot(len(ASSETS))}
+	return types.SimpleNamespace(assets_ohlc=None), stg, kwargs
+
+
+
+"""
+Simulates minutes first to last (excluded): each one adds a candlestick, which is then replaced the way a forming candlestick is, and grows the
+plot series and the state of the strategy.
+"""
+def simulate(stg, kwargs, first, last):
+	for i in range(first, last):
+		bars = make_bars(i, i+1)
+		kwargs['dt'].add_bar('1min', bars)
+		bars.data[:] += 0.5
+		kwargs['dt'].replace_last_bar('1min', bars)
+		kwargs['plt'].time_list[0][0].append(bars.timelist[0])
+		kwargs['plt'].price_list[0][0].append(bars.closes[0][0])
+		stg.minutes_simulated = i + 1
+
+
+
+def read_files(directory):
+	files = {}
+	for filename in sorted(os.listdir(directory)):
+		with open(os.path.join(directory, filename), 'rb') as f_object:
+			files[filename] = f_object.read()
+	return files
+
+
+
+@pytest.mark.parametrize('async_writes', [False, True])
+def test_restoring_a_snapshot_carries_on_like_an_uninterrupted_run(tmp_path, async_writes):
+	uninterrupted = str(tmp_path / 'uninterrupted')
+	os.makedirs(uninterrupted)
+	backtrader, stg, kwargs = start_run(uninterrupted, async_writes)
+	kwargs['dt'].create_buffer('1min', ASSETS, LIMIT, make_bars(0, LIMIT))
+	simulate(stg, kwargs, LIMIT, 20)
+	kwargs['dt'].close()
+	expected_plot = {key: getattr(kwargs['plt'], key) for key in checkpoint.PLOT_SERIES}
+	expected_bars = kwargs['dt'].get_bars('1min')
+
+	interrupted = str(tmp_path / 'interrupted')
+	os.makedirs(interrupted)
+	checkpointer = checkpoint.Checkpointer(str(tmp_path / 'checkpoints'))
+	filename = checkpointer.checkpoint_file(ASSETS, pd.Timestamp('2022-11-03'), pd.Timestamp('2022-11-03'), LIMIT)
+	backtrader, stg, kwargs = start_run(interrupted, async_writes)
+	kwargs['dt'].create_buffer('1min', ASSETS, LIMIT, make_bars(0, LIMIT))
+	simulate(stg, kwargs, LIMIT, 9)
+	checkpointer.save(filename, backtrader, stg, pd.Timestamp(make_bars(8, 9).times[0], tz='UTC'), kwargs)
+	simulate(stg, kwargs, 9, 12)
+	checkpointer.save(filename, backtrader, stg, pd.Timestamp(make_bars(11, 12).times[0], tz='UTC'), kwargs)
+	#Rows written after the last snapshot, before the run dies, are to be cut off on resuming
+	simulate(stg, kwargs, 12, 16)
+	kwargs['dt'].close()
+
+	checkpointer = checkpoint.Checkpointer(str(tmp_path / 'checkpoints'))
+	backtrader, stg, kwargs = start_run(interrupted, async_writes)
+	assert checkpointer.restore(filename, backtrader, stg, kwargs) == pd.Timestamp(make_bars(11, 12).times[0], tz='UTC')
+	assert stg.minutes_simulated == 12
+	assert stg.bars['1min'].times[-1] == make_bars(11, 12).times[0]
+	simulate(stg, kwargs, 12, 20)
+	kwargs['dt'].close()
+
+	assert read_files(interrupted) == read_files(uninterrupted)
+	assert {key: getattr(kwargs['plt'], key) for key in checkpoint.PLOT_SERIES} == expected_plot
+	np.testing.assert_array_equal(kwargs['dt'].get_bars('1min').times, expected_bars.times)
+	np.testing.assert_array_equal(kwargs['dt'].get_bars('1min').data, expected_bars.data)
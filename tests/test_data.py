@@ -0,0 +1,158 @@
+import os
+from csv import writer
+import numpy as np
+import pandas as pd
+import pytest
+import barblock
+import benchmark
+import data
+
+
+
+ASSETS = ['AAPL', 'TSLA', 'XOM']
+
+
+
+"""
+Builds the candlesticks of minutes first to last (excluded) from 2022-11-03 13:30 UTC. Prices are offset by shift, so that candlesticks of the
+same minute built with different shifts can stand in for a forming candlestick and the one replacing it.
+"""
+def make_bars(first, last, shift=0.0):
+	times = pd.Timestamp('2022-11-03 13:30', tz='UTC').value + pd.Timedelta('1minutes').value*np.arange(first, last, dtype=np.int64)
+	values = 100 + np.arange(len(barblock.FIELDS)*len(times)*len(ASSETS), dtype=float).reshape(len(barblock.FIELDS), len(times), len(ASSETS))
+	return barblock.BarBlock(times, values + first + shift)
+
+
+
+"""
+Writes the .cvs files of bars the way the simulator did before rows could be replaced: the header and every row in one go.
+"""
+def write_expected(directory, bars):
+	dt = data.Data(len(ASSETS), directory=directory)
+	for filename, field in zip(dt.data_files('1min'), ['open', 'high', 'low', 'close', 'volume']):
+		with open(filename, 'w', newline='') as f_object:
+			writer_object = writer(f_object)
+			writer_object.writerow(['timeframe'] + ASSETS)
+			for time, row in zip(bars.timelist, bars.field(field)):
+				writer_object.writerow([time] + list(row))
+
+
+
+def concat(*blocks):
+	return barblock.BarBlock(np.concatenate([bars.times for bars in blocks]), np.concatenate([bars.data for bars in blocks], axis=1))
+
+
+
+def assert_same_files(directory, expected):
+	for filename in sorted(os.listdir(expected)):
+		with open(os.path.join(expected, filename), 'rb') as expected_file, open(os.path.join(directory, filename), 'rb') as f_object:
+			assert f_object.read() == expected_file.read(), filename
+
+
+
+@pytest.fixture
+def directories(tmp_path):
+	os.makedirs(tmp_path / 'files')
+	os.makedirs(tmp_path / 'expected')
+	return str(tmp_path / 'files'), str(tmp_path / 'expected')
+
+
+
+@pytest.mark.parametrize('async_writes', [False, True])
+def test_replace_last_row_after_an_append(directories, async_writes):
+	directory, expected = directories
+	dt = data.Data(len(ASSETS), async_writes=async_writes, directory=directory)
+	dt.create_buffer('1min', ASSETS, 5, make_bars(0, 5))
+	dt.add_bar('1min', make_bars(5, 6))
+	dt.replace_last_bar('1min', make_bars(5, 6, shift=0.5))
+	dt.replace_last_bar('1min', make_bars(5, 6, shift=0.25))
+	dt.add_bar('1min', make_bars(6, 7))
+	dt.replace_last_bar('1min', make_bars(6, 7, shift=0.5))
+	dt.close()
+
+	write_expected(expected, concat(make_bars(0, 5), make_bars(5, 6, shift=0.25), make_bars(6, 7, shift=0.5)))
+	assert_same_files(directory, expected)
+
+
+
+@pytest.mark.parametrize('async_writes', [False, True])
+def test_replace_last_row_after_a_reopen(directories, async_writes):
+	directory, expected = directories
+	dt = data.Data(len(ASSETS), async_writes=async_writes, directory=directory)
+	dt.create_buffer('1min', ASSETS, 5, make_bars(0, 5))
+	dt.add_bar('1min', make_bars(5, 6))
+	dt.close()
+
+	#A new instance knows nothing of where the last rows start, so it has to find them in the files
+	dt = data.Data(len(ASSETS), async_writes=async_writes, directory=directory)
+	dt.replace_last_row_in_data_files(make_bars(5, 6, shift=0.5), *dt.data_files('1min'))
+	dt.add_row_to_data_files(make_bars(6, 7), *dt.data_files('1min'))
+	dt.replace_last_row_in_data_files(make_bars(6, 7, shift=0.5), *dt.data_files('1min'))
+	dt.close()
+
+	write_expected(expected, concat(make_bars(0, 5), make_bars(5, 6, shift=0.5), make_bars(6, 7, shift=0.5)))
+	assert_same_files(directory, expected)
+
+
+
+@pytest.mark.parametrize('async_writes', [False, True])
+def test_delete_last_row_then_replace(directories, async_writes):
+	directory, expected = directories
+	dt = data.Data(len(ASSETS), async_writes=async_writes, directory=directory)
+	dt.create_buffer('1min', ASSETS, 5, make_bars(0, 5))
+	dt.add_bar('1min', make_bars(5, 6))
+	dt.add_bar('1min', make_bars(6, 7))
+	dt.delete_last_row_from_data_files(*dt.data_files('1min'))
+	#The row replaced is the one the deleted row followed, not the deleted row itself
+	dt.replace_last_row_in_data_files(make_bars(5, 6, shift=0.5), *dt.data_files('1min'))
+	dt.close()
+
+	write_expected(expected, concat(make_bars(0, 5), make_bars(5, 6, shift=0.5)))
+	assert_same_files(directory, expected)
+
+
+
+@pytest.mark.parametrize('async_writes', [False, True])
+def test_tail_reads_match_reading_the_whole_file(directories, async_writes):
+	directory, expected = directories
+	dt = data.Data(len(ASSETS), async_writes=async_writes, directory=directory)
+	#Enough rows for the tail to span several of the 4096 byte blocks read
+	dt.create_buffer('1min', ASSETS, 150, make_bars(0, 150))
+	filename = dt.data_files('1min')[3]
+
+	def check(limit):
+		time_arr, rows_arr = dt.get_rows_from_file(filename, limit)
+		assert (time_arr, rows_arr) == benchmark.legacy_get_rows_from_file(filename, limit)
+
+	for limit in [1, 10, 149, 150, 200]:
+		check(limit)
+
+	#Rows appended or replaced after a read must show up in the next one, though only they are parsed
+	for i in range(150, 160):
+		dt.add_bar('1min', make_bars(i, i+1))
+		check(10)
+		dt.replace_last_bar('1min', make_bars(i, i+1, shift=0.5))
+		check(10)
+	dt.delete_last_row_from_data_files(*dt.data_files('1min'))
+	check(10)
+	check(40)
+	dt.close()
+
+
+
+def test_ring_buffer_holds_what_the_legacy_simulation_read_back_from_the_files(directories):
+	directory, expected = directories
+	limit = 5
+	dt = data.Data(len(ASSETS), async_writes=False, directory=directory)
+	dt.create_buffer('1min', ASSETS, limit, make_bars(0, limit))
+
+	for i in range(limit, 3*limit + 2):
+		dt.add_bar('1min', make_bars(i, i+1))
+		if i % 3 == 0:
+			dt.replace_last_bar('1min', make_bars(i, i+1, shift=0.5))
+
+		bars = dt.get_bars('1min')
+		for filename, field in zip(dt.data_files('1min'), ['open', 'high', 'low', 'close', 'volume']):
+			time_arr, rows_arr = benchmark.legacy_get_rows_from_file(filename, limit)
+			assert list(pd.to_datetime(time_arr).asi8) == list(bars.times)
+			np.testing.assert_array_equal(bars.field(field), np.array(rows_arr))
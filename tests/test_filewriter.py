@@ -0,0 +1,117 @@
+import pytest
+import filewriter
+
+
+
+ROWS = [['2022-11-03 13:30:00+00:00', 1.0, 2.0], ['2022-11-03 13:31:00+00:00', 3.0, 4.0], ['2022-11-03 13:32:00+00:00', 5.0, 6.0]]
+
+
+
+"""
+Makes the writes of a BackgroundWriter fail, after writing part of the rows, the first failures times they are attempted.
+"""
+def fail_writes(background_writer, failures):
+	write_rows = background_writer.write_rows
+	calls = []
+
+	def failing_write_rows(filename, rows):
+		calls.append(rows)
+		if len(calls) <= failures:
+			background_writer.open_file(filename).write(filewriter.to_csv(rows[:1]))
+			raise IOError("Injected write failure")
+		write_rows(filename, rows)
+
+	background_writer.write_rows = failing_write_rows
+	return calls
+
+
+
+def read(filename):
+	with open(filename, 'rb') as f_object:
+		return f_object.read()
+
+
+
+def test_a_failed_append_is_rolled_back_before_it_is_retried(tmp_path):
+	filename = str(tmp_path / 'rows.cvs')
+	background_writer = filewriter.BackgroundWriter()
+	background_writer.append_rows(filename, ROWS[:1], ['timeframe', 'AAPL', 'TSLA'])
+	background_writer.flush()
+
+	calls = fail_writes(background_writer, 1)
+	background_writer.append_rows(filename, ROWS[1:])
+	background_writer.flush()
+	background_writer.replace_last_row(filename, ROWS[0])
+	background_writer.close()
+
+	assert len(calls) == 3
+	assert read(filename) == filewriter.to_csv([['timeframe', 'AAPL', 'TSLA'], ROWS[0], ROWS[1], ROWS[0]])
+
+
+
+def test_a_failed_replace_is_rolled_back_before_it_is_retried(tmp_path):
+	filename = str(tmp_path / 'rows.cvs')
+	background_writer = filewriter.BackgroundWriter()
+	background_writer.append_rows(filename, ROWS)
+
+	fail_writes(background_writer, 2)
+	background_writer.replace_last_row(filename, ROWS[0])
+	background_writer.close()
+
+	assert read(filename) == filewriter.to_csv([ROWS[0], ROWS[1], ROWS[0]])
+
+
+
+def test_flush_and_close_return_once_an_operation_is_given_up(tmp_path):
+	filename = str(tmp_path / 'rows.cvs')
+	background_writer = filewriter.BackgroundWriter(max_trials=3)
+	background_writer.append_rows(filename, ROWS[:1])
+	background_writer.flush()
+
+	calls = fail_writes(background_writer, 3)
+	background_writer.append_rows(filename, ROWS[1:2])
+	background_writer.flush()
+	assert len(calls) == 3
+	#The dropped append leaves the file as it was, and the writer carries on with the next operations
+	assert read(filename) == filewriter.to_csv(ROWS[:1])
+
+	background_writer.append_rows(filename, ROWS[2:])
+	background_writer.close()
+	assert read(filename) == filewriter.to_csv([ROWS[0], ROWS[2]])
+	assert not background_writer.thread.is_alive()
+
+
+
+def test_a_dropped_replace_leaves_the_last_row_as_it_was(tmp_path):
+	filename = str(tmp_path / 'rows.cvs')
+	background_writer = filewriter.BackgroundWriter(max_trials=2)
+	background_writer.append_rows(filename, ROWS[:2])
+	background_writer.flush()
+
+	fail_writes(background_writer, 2)
+	background_writer.replace_last_row(filename, ROWS[2])
+	background_writer.flush()
+	assert read(filename) == filewriter.to_csv(ROWS[:2])
+
+	background_writer.replace_last_row(filename, ROWS[0])
+	background_writer.close()
+	assert read(filename) == filewriter.to_csv([ROWS[0], ROWS[0]])
+
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_flush_raises_rather_than_hangs_once_the_background_thread_has_died(tmp_path):
+	background_writer = filewriter.BackgroundWriter(flush_timeout=5.0)
+
+	def apply(operation, filename, arg):
+		raise RuntimeError("Injected failure")
+
+	background_writer.apply = apply
+	background_writer.append_rows(str(tmp_path / 'rows.cvs'), ROWS)
+	background_writer.thread.join(5.0)
+	assert not background_writer.thread.is_alive()
+
+	with pytest.raises(RuntimeError):
+		background_writer.flush()
+	#Nothing is left to flush or stop
+	background_writer.close()
@@ -0,0 +1,81 @@
+import numpy as np
+import indicators
+import benchmark
+
+
+
+def test_graph_shares_the_emas_of_a_macd_and_a_crossover():
+	graph = indicators.IndicatorGraph(3)
+	macd, signal, histogram = graph.macd('close')
+	crossover = graph.crossover(graph.ema('close', 12), graph.ema('close', 26))
+
+	assert graph.ema('close', 12) is macd.inputs[0]
+	assert crossover.inputs == macd.inputs
+	#The ema12, ema26 and signal line, over the closes and the macd
+	assert len([key for key in graph.nodes if key[0] == 'EMA']) == 3
+
+
+
+def test_graph_matches_the_indicators_kept_separately():
+	rng = np.random.default_rng(0)
+	closes = 100 + np.cumsum(rng.normal(size=(120, 5)), axis=0)
+	closes[40:45, 2] = np.nan
+	expected = benchmark.legacy_macd_and_crossover(closes)
+	values = benchmark.graph_macd_and_crossover(closes)
+
+	for name in ['macd', 'signal', 'histogram']:
+		np.testing.assert_array_equal(values[name], expected[name], err_msg=name)
+	#The crossover is only evaluated once both emas have a value, whereas on its own it took in the nan of the ema26 until then
+	np.testing.assert_array_equal(values['crossover'][:25], np.nan)
+	np.testing.assert_array_equal(values['crossover'][25:], expected['crossover'][25:])
+
+
+
+"""
+Builds (time, security) histories of closes, highs, lows and volumes, with a few nan values scattered through them.
+"""
+def make_history(num_rows=200, num_assets=4):
+	rng = np.random.default_rng(0)
+	closes = 100 + np.cumsum(rng.normal(size=(num_rows, num_assets)), axis=0)
+	highs = closes + rng.random(closes.shape)
+	lows = closes - rng.random(closes.shape)
+	volumes = rng.integers(0, 1000, closes.shape).astype(float)
+	for x in [closes, highs, lows, volumes]:
+		x[rng.random(closes.shape) < 0.03] = np.nan
+	return closes, highs, lows, volumes
+
+
+
+def test_batch_kernels_match_the_streaming_indicators():
+	closes, highs, lows, volumes = make_history()
+	num_assets = closes.shape[1]
+
+	for batch, streaming in [
+		(indicators.batch_sma(closes, 20), indicators.SMA(num_assets, 20)),
+		(indicators.batch_ema(closes, 12), indicators.EMA(num_assets, 12)),
+		(indicators.batch_rsi(closes, 14), indicators.RSI(num_assets, 14)),
+		(indicators.batch_rolling_max(closes, 30), indicators.RollingMax(num_assets, 30)),
+		(indicators.batch_rolling_min(closes, 30), indicators.RollingMin(num_assets, 30))]:
+		np.testing.assert_array_equal(batch, benchmark.stream(streaming, closes), err_msg=type(streaming).__name__)
+
+	macd = indicators.MACD(num_assets)
+	bands = indicators.BollingerBands(num_assets, 20)
+	atr = indicators.ATR(num_assets, 14)
+	vwap = indicators.RollingVWAP(num_assets, 20)
+	streamed = {'macd':[], 'signal':[], 'histogram':[], 'sma':[], 'upper':[], 'lower':[], 'atr':[], 'vwap':[]}
+	for t in range(0, len(closes)):
+		streamed['macd'].append(macd.update(closes[t]))
+		streamed['signal'].append(macd.signal)
+		streamed['histogram'].append(macd.histogram)
+		streamed['sma'].append(bands.update(closes[t]))
+		streamed['upper'].append(bands.upper)
+		streamed['lower'].append(bands.lower)
+		streamed['atr'].append(atr.update(highs[t], lows[t], closes[t]))
+		streamed['vwap'].append(vwap.update(closes[t], volumes[t]))
+
+	batched = dict(zip(['macd', 'signal', 'histogram'], indicators.batch_macd(closes)))
+	batched.update(zip(['sma', 'upper', 'lower'], indicators.batch_bollinger_bands(closes, 20)))
+	batched['atr'] = indicators.batch_atr(highs, lows, closes, 14)
+	batched['vwap'] = indicators.batch_rolling_vwap(closes, volumes, 20)
+	for name, values in streamed.items():
+		np.testing.assert_array_equal(batched[name], np.array(values), err_msg=name)
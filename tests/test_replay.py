@@ -0,0 +1,28 @@
+import pandas as pd
+import replay
+import benchmark
+
+
+
+def test_a_replay_attached_from_shared_memory_answers_like_the_one_loaded():
+	assets, df = benchmark.make_df(5, 120)
+	start_date = pd.Timestamp('2022-11-03 13:30', tz='UTC')
+	end_date = start_date + pd.Timedelta('1minutes')*119
+	loaded = benchmark.replaying(df.iloc[::2], assets, '1Min', start_date, end_date).replay
+
+	blocks, shared = loaded.share()
+	try:
+		attached = replay.attach(shared, loaded.lookback_multiple)
+		for first, last in [(0, 119), (10, 20), (37, 37), (100, 119)]:
+			start_dt = start_date + pd.Timedelta('1minutes')*first
+			end_dt = start_date + pd.Timedelta('1minutes')*last
+			pd.testing.assert_frame_equal(attached.get(assets, '1Min', start_dt, end_dt), loaded.get(assets, '1Min', start_dt, end_dt))
+		#Neither holds bars from before the session was loaded, nor of another timeframe
+		assert attached.get(assets, '1Min', start_date - pd.Timedelta('1minutes'), end_date) is None
+		assert attached.get(assets, '5Min', start_date, end_date) is None
+		for block in attached.blocks:
+			block.close()
+	finally:
+		for block in blocks:
+			block.close()
+			block.unlink()
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import pandas as pd
+import barblock
+import data
+import simulator
+
+
+
+"""
+Builds the candlesticks of minutes first to last (excluded) from 2022-11-03 13:30 UTC, with prices that differ from minute to minute.
+"""
+def make_bars(first, last, num_assets=3):
+	times = pd.Timestamp('2022-11-03 13:30', tz='UTC').value + pd.Timedelta('1minutes').value*np.arange(first, last, dtype=np.int64)
+	values = 100 + np.arange(len(barblock.FIELDS)*len(times)*num_assets, dtype=float).reshape(len(barblock.FIELDS), len(times), num_assets)
+	return barblock.BarBlock(times, values + first)
+
+
+
+def add_bars(dt, bars):
+	for i in range(0, len(bars)):
+		dt.add_bar('1min', barblock.BarBlock(bars.times[i:i+1], bars.data[:, i:i+1]))
+
+
+
+def test_merged_shards_match_a_run_carried_over_from_session_to_session(tmp_path):
+	assets = ['AAPL', 'TSLA', 'XOM']
+	limit = 5
+	#The second session's warm-up reaches back into the first session
+	sessions = [(make_bars(0, limit), make_bars(limit, 15)), (make_bars(12, 12 + limit), make_bars(12 + limit, 26))]
+
+	sequential = str(tmp_path / 'sequential')
+	os.makedirs(sequential)
+	dt = data.Data(len(assets), bar_file_sink=True, async_writes=False, directory=sequential)
+	dt.create_buffer('1min', assets, limit, sessions[0][0])
+	add_bars(dt, sessions[0][1])
+	dt.carry_over_buffer('1min', sessions[1][0])
+	add_bars(dt, sessions[1][1])
+
+	shards = []
+	for warm_up, session in sessions:
+		shards.append(str(tmp_path / ('shard'+str(len(shards)))))
+		os.makedirs(shards[-1])
+		dt = data.Data(len(assets), bar_file_sink=True, async_writes=False, directory=shards[-1])
+		dt.create_buffer('1min', assets, limit, warm_up)
+		add_bars(dt, session)
+	merged = str(tmp_path / 'merged')
+	os.makedirs(merged)
+	simulator.merge_data_files(shards, merged)
+
+	filenames = sorted(os.listdir(sequential))
+	assert '_1min_close.cvs' in filenames and '_1min.bars' in filenames
+	assert sorted(os.listdir(merged)) == filenames
+	for filename in filenames:
+		with open(os.path.join(sequential, filename), 'rb') as expected, open(os.path.join(merged, filename), 'rb') as f_object:
+			assert f_object.read() == expected.read(), filename
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+import barblock
+import candles
+import timeframes
+import vectorized
+
+
+
+MINUTE = pd.Timedelta('1minutes').value
+
+
+
+"""
+Builds 1 minute candlesticks on a 1 minute clock, starting off the boundary of any longer timeframe.
+"""
+def make_clock(num_minutes, num_assets=4):
+	rng = np.random.default_rng(0)
+	times = pd.Timestamp('2022-11-03 13:32', tz='UTC').value + MINUTE*np.arange(num_minutes, dtype=np.int64)
+	closes = 100 + np.cumsum(rng.normal(0, 1, (num_minutes, num_assets)), axis=0)
+	opens = closes + rng.normal(0, 0.5, closes.shape)
+	highs = np.maximum(opens, closes) + rng.random(closes.shape)
+	lows = np.minimum(opens, closes) - rng.random(closes.shape)
+	volumes = np.where(rng.random(closes.shape) < 0.1, 0.0, rng.integers(1, 1000, closes.shape).astype(float))
+	vwaps = (highs + lows + closes)/3
+	return barblock.BarBlock(times, np.stack([closes, opens, highs, lows, volumes, vwaps]))
+
+
+
+@pytest.mark.parametrize('interval', [5, 15, 45])
+def test_forming_candles_match_candle_aggregator_fed_minute_by_minute(interval):
+	bars = make_clock(200)
+	forming = vectorized.forming_candles(bars, interval)
+	aggregator = candles.CandleAggregator(bars.data.shape[2], [interval])
+
+	#The candlestick the clock starts within is grown differently (see forming_candles()), so the two are compared from the first one after it
+	first_candle = -(bars.times[0]//MINUTE) % interval
+	assert first_candle > 0
+	for t in range(0, len(bars)):
+		#run() takes in the 1 minute candlestick starting at t on the minute after, once it is complete
+		curr_date = pd.Timestamp(bars.times[t] + MINUTE, tz='UTC')
+		aggregator.update(curr_date, barblock.BarBlock(bars.times[t:t+1], bars.data[:, t:t+1]))
+		if t >= first_candle:
+			np.testing.assert_array_equal(aggregator.bar(interval, curr_date).data[:, 0], forming.data[:, t])
+
+
+
+@pytest.mark.parametrize('interval', [5, 15, 45])
+def test_run_treats_a_candle_as_mature_one_minute_before_its_last_row(interval):
+	bars = make_clock(200)
+	timeframe = timeframes.Timeframe(str(interval)+'min', str(interval)+' minutes', None)
+	for t in range(0, len(bars)):
+		curr_date = pd.Timestamp(bars.times[t] + MINUTE, tz='UTC')
+		#forming_candles() rows whose 1 minute candlestick starts on the last minute of the interval hold the complete candlestick, whereas run()
+		#generates the timeframe's indicators one minute earlier (see the README)
+		assert timeframe.is_closing_minute(curr_date) == ((bars.times[t]//MINUTE) % interval == interval - 2)
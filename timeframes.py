@@ -0,0 +1,163 @@
+import pandas as pd
+
+#Number of minutes in a day. Every minute timeframe must divide it, so that its candlesticks line up with the day.
+DAY_MINUTES = 24*60
+
+
+
+"""
+Number of whole minutes since the epoch, from which the position of a minute within a candlestick of any interval is found. Candlesticks are
+counted from the epoch (ie from midnight UTC), as resample_df() counts them, rather than from the top of the hour, so intervals such as 45 minutes
+or 2 hours also line up.
+Parameters:
+	curr_date (pandas.Timestamp): Current minute.
+Returns:
+	(Int)
+"""
+def minutes_since_epoch(curr_date):
+	return curr_date.value // pd.Timedelta('1minutes').value
+
+
+
+class Timeframe:
+
+
+
+	"""
+	A timeframe of candlesticks the simulation keeps track of.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min". Used to key its bar buffer and data files.
+		time_delta (String): Time spanned by a candlestick, eg "5 minutes".
+		time_frame (TimeFrame): Time frame passed to get_bars().
+	"""
+	def __init__(self, name, time_delta, time_frame):
+		self.name = name
+		self.time_delta = time_delta
+		self.time_frame = time_frame
+		#Number of minutes spanned by a candlestick
+		self.interval = int(pd.Timedelta(time_delta) / pd.Timedelta('1minutes'))
+
+
+
+	def __repr__(self):
+		return "Timeframe("+self.name+")"
+
+
+
+	"""
+	Determines whether the current minute is the last minute of a candlestick, ie the candlestick is mature once the minute has been taken in.
+	Parameters:
+		curr_date (pandas.Timestamp): Current minute.
+	Returns:
+		(Boolean)
+	"""
+	def is_closing_minute(self, curr_date):
+		return minutes_since_epoch(curr_date) % self.interval == self.interval - 1
+
+
+
+class Timeframes:
+
+
+
+	"""
+	Registry of the timeframes the simulation keeps track of. The first minute timeframe added is the base timeframe: its candlesticks are the only
+	ones requested during a run, and all other minute timeframes are built from them. The daily timeframe is only used to get the previous day's ohlcv.
+	Adding a 30 minute or 1 hour timeframe takes a single call to add().
+	"""
+	def __init__(self):
+		self.minute_timeframes = []
+		self.day = None
+
+
+
+	"""
+	Adds a minute timeframe.
+	Parameters:
+		name (String): Name of the timeframe, eg "5min".
+		time_delta (String): Time spanned by a candlestick, eg "5 minutes".
+		time_frame (TimeFrame): Time frame passed to get_bars().
+	Returns:
+		(Timeframe)
+	"""
+	def add(self, name, time_delta, time_frame):
+		timeframe = Timeframe(name, time_delta, time_frame)
+		if timeframe.interval < 1 or DAY_MINUTES % timeframe.interval != 0:
+			raise ValueError(name+" does not divide a day into whole candlesticks")
+		if len(self.minute_timeframes) > 0 and timeframe.interval % self.base.interval != 0:
+			raise ValueError(name+" is not a multiple of the base timeframe "+self.base.name)
+		self.minute_timeframes.append(timeframe)
+		return timeframe
+
+
+
+	"""
+	Sets the daily timeframe.
+	Parameters:
+		time_delta (String): eg "1 days".
+		time_frame (TimeFrame): Time frame passed to get_bars().
+	"""
+	def set_day(self, time_delta, time_frame):
+		self.day = Timeframe('day', time_delta, time_frame)
+		return self.day
+
+
+
+	def __iter__(self):
+		return iter(self.minute_timeframes)
+
+
+
+	def __len__(self):
+		return len(self.minute_timeframes)
+
+
+
+	@property
+	def base(self):
+		return self.minute_timeframes[0]
+
+
+
+	"""
+	Minute timeframes built from the base timeframe, ie all but the base timeframe.
+	"""
+	@property
+	def derived(self):
+		return self.minute_timeframes[1:]
+
+
+
+	"""
+	Minute timeframe with the longest candlesticks.
+	"""
+	@property
+	def longest(self):
+		return max(self.minute_timeframes, key=lambda timeframe: timeframe.interval)
+
+
+
+	"""
+	Returns the minute timeframe of the name given.
+	Parameters:
+		name (String): eg "5min".
+	Returns:
+		(Timeframe)
+	"""
+	def get(self, name):
+		for timeframe in self.minute_timeframes:
+			if timeframe.name == name:
+				return timeframe
+		raise KeyError(name)
+
+
+
+	"""
+	Position of a minute timeframe in the registry. Used by Plot to pick the series of the timeframe.
+	Parameters:
+		name (String): eg "5min".
+	Returns:
+		(Int)
+	"""
+	def index(self, name):
+		return self.minute_timeframes.index(self.get(name))
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+import barblock
+
+
+
+"""
+Lays the 1 minute candlesticks of a dataframe out on a 1 minute clock, as a BarBlock holding a (time, security) matrix per field.
+A minute without a candlestick for a security is filled with a flat candlestick at the security's last close (open, high, low, close and vwap all
+equal to it) and no volume. Before its first candlestick, the last close is taken from fallback_closes. Only earlier minutes are ever used to fill
+a minute, never later ones, so nothing is known at a minute that was not known by then.
+Parameters:
+	df (pandas.DataFrame): Dataframe in the layout returned by get_bars().
+	assets ([String]): A list of the securities in play sorted alphabetically by ticker symbol.
+	times (numpy.ndarray): int64 epoch nanoseconds of each minute of the clock, oldest first, one minute apart.
+	fallback_closes (numpy.ndarray): Close of each security before the first minute, eg the previous day's close. nan if unknown.
+Returns:
+	(BarBlock): Row t holds the candlestick starting at times[t], which is complete once the minute is over.
+"""
+def to_matrices(df, assets, times, fallback_closes):
+	data = np.full((len(barblock.FIELDS), len(times), len(assets)), np.nan)
+
+	if len(df.index) > 0:
+		minute = pd.Timedelta('1minutes').value
+		timestamps = barblock.to_epoch_ns(df.index)//minute*minute
+		rows = np.searchsorted(times, timestamps)
+		columns = pd.Categorical(df['symbol'], categories=assets).codes
+		on_clock = (rows < len(times)) & (columns >= 0)
+		on_clock[on_clock] &= times[rows[on_clock]] == timestamps[on_clock]
+		for i, name in enumerate(barblock.FIELDS):
+			data[i, rows[on_clock], columns[on_clock]] = df[name].to_numpy(dtype=np.float64)[on_clock]
+
+	closes, opens, highs, lows, volumes, vwaps = data
+
+	#Last minute at or before each minute with a candlestick, -1 if none
+	present = ~np.isnan(closes)
+	last_present = np.maximum.accumulate(np.where(present, np.arange(len(times))[:, np.newaxis], -1), axis=0)
+	last_close = np.where(last_present >= 0, np.take_along_axis(closes, np.maximum(last_present, 0), axis=0), np.broadcast_to(fallback_closes, closes.shape))
+
+	for i in [0, 1, 2, 3, 5]:
+		data[i] = np.where(present, data[i], last_close)
+	data[4] = np.where(present, np.nan_to_num(volumes), 0.0)
+
+	return barblock.BarBlock(times, data)
+
+
+
+"""
+Grows the candlesticks of a longer minute timeframe out of 1 minute candlesticks on a 1 minute clock, the way CandleAggregator grows them minute by
+minute. Row t holds the candlestick forming as of the end of minute t: opened by the first minute of its interval, with the high, low and volume of
+its minutes so far and the close of minute t. It is mature on the last minute of its interval. The candlestick the clock starts within is grown
+from the first minute of the clock, whereas CandleAggregator starts it afresh every minute until its first whole candlestick.
+Note that run() generates a timeframe's indicators when Timeframe.is_closing_minute() holds, which is one minute before the last minute of the
+interval has been taken in, ie on row t where minute t is the second to last of its interval.
+Parameters:
+	bars (BarBlock): 1 minute candlesticks, one row per minute of the clock (see to_matrices()).
+	interval (Int): Number of minutes spanned by the candlesticks of the timeframe, eg 5.
+Returns:
+	(BarBlock): Same clock as bars.
+"""
+def forming_candles(bars, interval):
+	num_times = len(bars.times)
+	minute = pd.Timedelta('1minutes').value
+	#Pad the clock on both ends so each row of the reshaped arrays is one interval
+	offset = int((bars.times[0]//minute) % interval) if num_times > 0 else 0
+	num_groups = -(-(offset + num_times)//interval)
+	padded = np.full((len(barblock.FIELDS), num_groups*interval, bars.data.shape[2]), np.nan)
+	padded[:, offset:offset+num_times] = bars.data
+	groups = padded.reshape(len(barblock.FIELDS), num_groups, interval, bars.data.shape[2])
+
+	closes, opens, highs, lows, volumes, vwaps = groups
+	volume = np.cumsum(np.nan_to_num(volumes), axis=1)
+	vwap_volume = np.cumsum(np.nan_to_num(vwaps*volumes), axis=1)
+
+	data = np.empty(groups.shape)
+	data[0] = closes
+	data[2] = np.fmax.accumulate(highs, axis=1)
+	data[3] = np.fmin.accumulate(lows, axis=1)
+	data[4] = volume
+	#Candlesticks without any volume keep the vwap of their last minute
+	data[5] = np.divide(vwap_volume, volume, out=vwaps.copy(), where=volume > 0)
+
+	data = data.reshape(padded.shape)[:, offset:offset+num_times]
+
+	#Open of the first minute of each candlestick, or of the first minute of the clock for the candlestick the clock starts within
+	first_minutes = np.maximum(np.arange(num_times) - (np.arange(num_times) + offset) % interval, 0)
+	data[1] = bars.opens[first_minutes]
+
+	return barblock.BarBlock(bars.times, np.ascontiguousarray(data))
+
+
+
+class SessionResult:
+
+
+
+	"""
+	Fills and profit and loss of a vectorized session. All matrices are (time, security), on the 1 minute clock of the session.
+	Parameters:
+		times (numpy.ndarray): int64 epoch nanoseconds of each minute.
+		signals (numpy.ndarray): Signals returned by the strategy, as is. None if it returned none.
+		positions (numpy.ndarray): Positions the strategy decided on at the end of each minute, zeroed outside of the session.
+		held (numpy.ndarray): Position held through each minute, ie decided on at the end of the minute before.
+		trades (numpy.ndarray): Quantity bought (positive) or sold (negative) at the open of each minute.
+		fill_prices (numpy.ndarray): Price of each trade, nan where there was none.
+		equity (numpy.ndarray): Cash from the trades so far plus the position held valued at the close, at the end of each minute.
+	"""
+	def __init__(self, times, signals, positions, held, trades, fill_prices, equity):
+		self.times = times
+		self.signals = signals
+		self.positions = positions
+		self.held = held
+		self.trades = trades
+		self.fill_prices = fill_prices
+		self.equity = equity
+
+
+
+	"""
+	Profit and loss of each security over the session, the position still held at the end being valued at the last close.
+	"""
+	@property
+	def pnl(self):
+		return self.equity[-1] if len(self.equity) > 0 else np.zeros(self.equity.shape[1])
+
+
+
+	@property
+	def total_pnl(self):
+		return float(np.sum(self.pnl))
+
+
+
+"""
+Fills the positions a strategy decided on, and computes the profit and loss. A position decided on at the end of a minute is traded into at the
+open of the next minute, so a strategy can never trade on a price it has not seen yet. Positions decided on outside of the session are ignored,
+as are those decided on at the last minute of the clock, which has no next minute.
+Parameters:
+	bars (BarBlock): 1 minute candlesticks of the clock.
+	signals (numpy.ndarray): Signals returned by the strategy, passed on as is. May be None.
+	positions (numpy.ndarray): (time, security) number of shares the strategy wants held at the end of each minute. nan is taken as 0.
+	in_session (numpy.ndarray): Boolean per minute of the clock, True within the session.
+	commission (Float): Cost of trading a share.
+Returns:
+	(SessionResult)
+"""
+def fill(bars, signals, positions, in_session, commission=0.0):
+	positions = np.where(in_session[:, np.newaxis], np.nan_to_num(np.asarray(positions, dtype=np.float64)), 0.0)
+
+	held = np.zeros(positions.shape)
+	held[1:] = positions[:-1]
+	trades = np.diff(held, axis=0, prepend=0.0)
+
+	traded = trades != 0
+	fill_prices = np.where(traded, bars.opens, np.nan)
+	cash = -np.cumsum(np.where(traded, trades*bars.opens + commission*np.abs(trades), 0.0), axis=0)
+	equity = cash + np.where(held != 0, held*bars.closes, 0.0)
+
+	return SessionResult(bars.times, signals, positions, held, trades, fill_prices, equity)